@@ -0,0 +1,224 @@
+# backend/app/async_calendar.py
+
+import asyncio
+import functools
+import itertools
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from backend.app.calendar_cache import record_created
+from backend.app.calendar_tool import (
+    CALENDAR_BATCH_LIMIT,
+    GoogleCalendarTool,
+    build_event_body,
+    client_pool,
+    resolve_token_dict,
+    token_key,
+)
+from backend.app.concurrency import upstream_limit
+from backend.app.metrics import stage
+from backend.app.outbound import BULK, INTERACTIVE, OutboundScheduler, outbound_scheduler, throttle_signal
+from backend.app.config import CALENDAR_BACKEND, GOOGLE_API_ROOT, UPSTREAM_LIMITS
+
+logger = logging.getLogger("calendar")
+
+
+class CalendarAPIError(Exception):
+    def __init__(self, status: int, detail: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}: {detail}")
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def _retry_after(resp) -> Optional[float]:
+    try:
+        return float(resp.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class AsyncCalendarClient:
+    """Non-blocking calendar writes. Swap in FakeAsyncCalendarClient for local runs."""
+
+    async def create_event(self, summary, start, end, token_dict: Optional[dict] = None,
+                           recurrence: Optional[str] = None, time_zone: Optional[str] = None) -> dict:
+        raise NotImplementedError
+
+    async def create_events(self, events: List[dict], token_dict: Optional[dict] = None,
+                            cancel: Optional[threading.Event] = None) -> dict:
+        """Insert many events; see GoogleCalendarTool.create_events for the result and `cancel`."""
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+
+class AsyncGoogleCalendarClient(AsyncCalendarClient):
+    """Calls the Calendar REST API over httpx using tokens from the shared client pool.
+
+    Calls go through the outbound scheduler, which paces them per user and
+    per project and retries the throttled ones.
+    """
+
+    def __init__(self, root_url: str = GOOGLE_API_ROOT, transport=None,
+                 scheduler: Optional[OutboundScheduler] = None):
+        self.root_url = root_url
+        self.transport = transport  # e.g. httpx.ASGITransport for a local stand-in
+        self._scheduler = scheduler
+        self._http = None
+        self._refresh_locks: Dict[str, asyncio.Lock] = {}
+
+    def scheduler(self) -> OutboundScheduler:
+        return self._scheduler or outbound_scheduler()
+
+    def _client(self):
+        if self._http is None:
+            import httpx
+
+            limit = UPSTREAM_LIMITS["google_calendar"]
+            self._http = httpx.AsyncClient(
+                base_url=self.root_url,
+                timeout=httpx.Timeout(15.0, connect=5.0),
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+                transport=self.transport,
+            )
+        return self._http
+
+    async def access_token(self, token_dict: Optional[dict]) -> str:
+        token_dict = resolve_token_dict(token_dict or {})
+        client = client_pool().cached(token_dict)
+        if client is None:
+            # a new token loads the discovery document and builds the service
+            client = await asyncio.get_running_loop().run_in_executor(None, client_pool().get, token_dict)
+        if not client.token_fresh():
+            # Refresh is a blocking HTTP call; only one coroutine per token
+            # does it, the others wait here and reuse the result.
+            key = token_key(token_dict)
+            lock = self._refresh_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                if not client.token_fresh():
+                    await asyncio.get_running_loop().run_in_executor(None, client.ensure_token)
+        return client.creds.token
+
+    async def request(self, method: str, path: str, token_dict: Optional[dict] = None,
+                      priority: int = INTERACTIVE, **kwargs):
+        token_dict = resolve_token_dict(token_dict or {})
+        with stage("confirm", "token_lookup"):
+            token = await self.access_token(token_dict)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def send():
+            async with upstream_limit("google_calendar"):
+                with stage("confirm", "insert"):
+                    resp = await self._client().request(method, path, headers=headers, **kwargs)
+            if resp.status_code >= 400:
+                raise CalendarAPIError(resp.status_code, resp.text, _retry_after(resp))
+            return resp
+
+        return await self.scheduler().submit(token_key(token_dict), send, priority)
+
+    async def create_event(self, summary, start, end, token_dict=None, recurrence=None, time_zone=None):
+        resp = await self.request(
+            "POST",
+            "/calendar/v3/calendars/primary/events",
+            token_dict,
+            json=build_event_body(summary, start, end, recurrence, time_zone),
+        )
+        created = resp.json()
+        record_created(created)
+        return created
+
+    async def create_events(self, events, token_dict=None, cancel=None):
+        loop = asyncio.get_running_loop()
+        tool = await loop.run_in_executor(None, GoogleCalendarTool, token_dict or {})
+        scheduler = self.scheduler()
+        # the executor thread can't be interrupted; it checks this between sub-batches
+        cancel = cancel or threading.Event()
+
+        def sender(chunk):
+            async def send():
+                async with upstream_limit("google_calendar"):
+                    return await loop.run_in_executor(None, functools.partial(tool.create_events, chunk, cancel=cancel))
+            return send
+
+        # every sub-request counts against quota, so a chunk costs one token
+        # per event; chunks no bigger than a full bucket let interactive
+        # calls in between them
+        size = min(CALENDAR_BATCH_LIMIT, scheduler.bulk_chunk())
+        starts = range(0, len(events), size)
+        try:
+            outcomes = await asyncio.gather(*(
+                scheduler.submit(tool.user_key, sender(events[i:i + size]), BULK, cost=len(events[i:i + size]))
+                for i in starts
+            ))
+        except BaseException:
+            cancel.set()
+            raise
+        outcome = {"results": [dict(r, index=i + r["index"]) for i, part in zip(starts, outcomes)
+                               for r in part["results"]],
+                   "round_trips": sum(part["round_trips"] for part in outcomes)}
+        # throttled sub-requests were retried inside the batch; still let the
+        # buckets know, once per batch
+        for r in outcome["results"]:
+            if r["status"] == "ok":
+                continue
+            signal = throttle_signal(CalendarAPIError(r.get("http_status", 0), r.get("message", "")))
+            if signal is not None:
+                scheduler.record(tool.user_key, signal)
+                break
+        return outcome
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+class FakeAsyncCalendarClient(AsyncCalendarClient):
+    """In-memory stand-in that records inserts; optional latency simulates the network."""
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.events: List[dict] = []
+        self._ids = itertools.count(1)
+
+    async def create_event(self, summary, start, end, token_dict=None, recurrence=None, time_zone=None):
+        async with upstream_limit("google_calendar"):
+            if self.latency_s:
+                await asyncio.sleep(self.latency_s)
+            created = dict(build_event_body(summary, start, end, recurrence, time_zone), id=f"fake{next(self._ids)}", status="confirmed")
+        self.events.append(created)
+        return created
+
+    async def create_events(self, events, token_dict=None, cancel=None):
+        round_trips = -(-len(events) // CALENDAR_BATCH_LIMIT)
+        async with upstream_limit("google_calendar"):
+            if self.latency_s:
+                await asyncio.sleep(self.latency_s * round_trips)
+        results = []
+        for i, ev in enumerate(events):
+            if cancel is not None and cancel.is_set():
+                results.append({"index": i, "status": "cancelled", "message": "Not sent: the request was cancelled"})
+                continue
+            created = dict(build_event_body(ev["summary"], ev["start"], ev["end"], ev.get("recurrence"), ev.get("time_zone")),
+                           id=f"fake{next(self._ids)}", status="confirmed")
+            self.events.append(created)
+            results.append({"index": i, "status": "ok", "created": created})
+        return {"results": results, "round_trips": round_trips}
+
+
+_calendar_client: Optional[AsyncCalendarClient] = None
+
+
+def set_calendar_client(client: AsyncCalendarClient):
+    global _calendar_client
+    _calendar_client = client
+
+
+def get_calendar_client() -> AsyncCalendarClient:
+    global _calendar_client
+    if _calendar_client is None:
+        _calendar_client = FakeAsyncCalendarClient() if CALENDAR_BACKEND == "fake" else AsyncGoogleCalendarClient()
+    return _calendar_client
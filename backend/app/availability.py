@@ -0,0 +1,139 @@
+# backend/app/availability.py
+
+import itertools
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+# Busy time is kept as half-open [start, end) intervals in whole minutes since
+# the Unix epoch, so every source and every mask speaks the same integer unit.
+
+
+def to_epoch_min(dt: datetime) -> int:
+    return int(dt.timestamp() // 60)
+
+
+def from_epoch_min(minute: int, tz) -> datetime:
+    return datetime.fromtimestamp(int(minute) * 60, tz)
+
+
+class BusySource:
+    """Anything that can report busy intervals for a set of attendees."""
+
+    def busy_intervals(self, emails: List[str], start_min: int, end_min: int) -> Dict[str, np.ndarray]:
+        """Return {email: int64 array of shape (k, 2)} overlapping [start_min, end_min)."""
+        raise NotImplementedError
+
+
+class InMemoryBusySource(BusySource):
+    """Busy-time store held in process memory. Used as the default and in tests.
+
+    Safe to share between threads: slot searches read it from the parse
+    pool while imports add to it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Tuple[int, int]]] = {}
+        self._index: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}  # email -> (intervals, starts, reach)
+
+    def add(self, email: str, start: datetime, end: datetime):
+        self.add_minutes(email, [(to_epoch_min(start), to_epoch_min(end))])
+
+    def add_minutes(self, email: str, intervals: Iterable[Tuple[int, int]]):
+        intervals = list(intervals)
+        with self._lock:
+            self._pending.setdefault(email.lower(), []).extend(intervals)
+
+    def clear(self, email: str = None):
+        with self._lock:
+            if email is None:
+                self._pending.clear()
+                self._index.clear()
+            else:
+                self._pending.pop(email.lower(), None)
+                self._index.pop(email.lower(), None)
+
+    def _sorted(self, email: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        with self._lock:
+            return self._merge(email)
+
+    def _merge(self, email: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        pending = self._pending.pop(email, None)
+        entry = self._index.get(email)
+        if pending:
+            fresh = np.asarray(pending, dtype=np.int64).reshape(-1, 2)
+            index = fresh if entry is None else np.concatenate((entry[0], fresh))
+            index = index[np.argsort(index[:, 0], kind="stable")]
+            # contiguous starts bisect without a copy; the running max of
+            # ends is non-decreasing, so it can be bisected too
+            entry = (index, np.ascontiguousarray(index[:, 0]), np.maximum.accumulate(index[:, 1]))
+            self._index[email] = entry
+        return entry
+
+    def busy_intervals(self, emails, start_min, end_min):
+        out = {}
+        for email in emails:
+            entry = self._sorted(email.lower())
+            if entry is None:
+                out[email] = np.empty((0, 2), dtype=np.int64)
+                continue
+            # Starts are sorted, so everything starting at or after end_min is
+            # cut off by bisection; everything before the first interval that
+            # reaches past start_min is cut off the same way on the running
+            # max of ends. Only the slice between needs its ends checked.
+            index, starts, reach = entry
+            lo = reach.searchsorted(start_min, side="right")
+            hi = starts.searchsorted(end_min, side="left")
+            head = index[lo:hi]
+            out[email] = head[head[:, 1] > start_min]
+        return out
+
+
+def busy_mask(intervals: Dict[str, np.ndarray], start_min: int, end_min: int) -> np.ndarray:
+    """Minute bitmap over [start_min, end_min) that is True where anyone is busy."""
+    horizon = end_min - start_min
+    arrays = [a for a in intervals.values() if len(a)]
+    if horizon <= 0:
+        return np.zeros(0, dtype=bool)
+    if not arrays:
+        return np.zeros(horizon, dtype=bool)
+
+    iv = np.concatenate(arrays) - start_min
+    starts = np.clip(iv[:, 0], 0, horizon)
+    ends = np.clip(iv[:, 1], 0, horizon)
+    keep = ends > starts
+
+    # +1 at every start, -1 at every end; a positive running sum means at
+    # least one attendee is busy in that minute.
+    delta = np.bincount(starts[keep], minlength=horizon + 1) - np.bincount(ends[keep], minlength=horizon + 1)
+    return np.cumsum(delta[:horizon]) > 0
+
+
+def iter_free_windows(busy: np.ndarray, duration_min: int, step_min: int = 30, first: int = 0) -> Iterator[int]:
+    """Lazily yield offsets of non-overlapping free windows on a step grid starting at `first`."""
+    horizon = len(busy)
+    if duration_min <= 0 or horizon < duration_min:
+        return
+
+    busy_before = np.zeros(horizon + 1, dtype=np.int32)
+    np.cumsum(busy, dtype=np.int32, out=busy_before[1:])
+
+    grid = np.arange(first, horizon - duration_min + 1, max(1, step_min))
+    fits = grid[busy_before[grid + duration_min] == busy_before[grid]]
+
+    next_allowed = first
+    for offset in fits.tolist():
+        if offset < next_allowed:
+            continue
+        yield offset
+        next_allowed = offset + duration_min
+
+
+def find_free_windows(busy: np.ndarray, duration_min: int, n: int, step_min: int = 30) -> List[int]:
+    """Offsets (in minutes) of the first n non-overlapping free windows on a step grid."""
+    if n <= 0:
+        return []
+    return list(itertools.islice(iter_free_windows(busy, duration_min, step_min), n))
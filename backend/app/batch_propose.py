@@ -0,0 +1,143 @@
+# backend/app/batch_propose.py
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from backend.app import db
+from backend.app.config import PROPOSE_BATCH_CHUNK, PROPOSE_PROCESSES
+from backend.app.warmup import WARMUP_PROMPTS
+
+logger = logging.getLogger("meeting_agent")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _warm_worker():
+    # load dateparser's language data and compile the grammar before real traffic
+    from backend.app.scheduler_engine import find_date_window
+
+    for prompt in WARMUP_PROMPTS:
+        find_date_window(prompt)
+
+
+def _propose_chunk(prompts: List[str], n_slots: int = 3, time_zone: Optional[str] = None) -> List[dict]:
+    # busy time comes from get_busy_source(), which every process reads
+    # from the same place (SQLite or Google), as /propose does
+    from backend.app.scheduler_engine import propose_slots
+
+    results = []
+    for prompt in prompts:
+        try:
+            data = propose_slots(prompt, n_slots, time_zone=time_zone)
+            results.append({"status": "ok", **data})
+        except Exception as exc:
+            results.append({"status": "error", "message": str(exc)})
+    return results
+
+
+def process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the server process has threads (executors, httpx)
+        _pool = ProcessPoolExecutor(
+            max_workers=PROPOSE_PROCESSES or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def ndjson_prompts(body: bytes) -> List[str]:
+    """Prompts from an NDJSON body: each line is a JSON string or {"prompt": ...}."""
+    prompts = []
+    for n, line in enumerate(body.splitlines(), 1):
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        prompt = item.get("prompt") if isinstance(item, dict) else item
+        if not isinstance(prompt, str):
+            raise ValueError(f"line {n} is not a prompt")
+        prompts.append(prompt)
+    return prompts
+
+
+def _saved(index: int, prompt: str, result: dict) -> dict:
+    if result["status"] == "ok":
+        db.save_proposal(dict(result, prompt=prompt))
+    return {"index": index, **result}
+
+
+async def iterate(items) -> AsyncIterator[str]:
+    for item in items:
+        yield item
+
+
+async def propose_many(prompts: AsyncIterable[str], chunk_size: int = PROPOSE_BATCH_CHUNK,
+                       n_slots: int = 3, time_zone: Optional[str] = None) -> AsyncIterator[dict]:
+    """Propose slots for every prompt on the process pool, yielding results in input order.
+
+    Identical prompts are computed once. Work is shipped to workers in
+    chunks as prompts arrive, and each result is yielded as soon as it and
+    everything before it are done. Each proposal is saved like one from
+    /propose.
+    """
+    loop = asyncio.get_running_loop()
+    pool = process_pool()
+    futures: Dict[str, asyncio.Future] = {}
+    order: List[str] = []
+    chunk: List[str] = []
+    head = 0
+
+    def submit(batch: List[str]):
+        waiting = [futures[p] for p in batch]
+        work = loop.run_in_executor(pool, _propose_chunk, batch, n_slots, time_zone)
+
+        def done(task: asyncio.Future):
+            if task.cancelled():
+                for fut in waiting:
+                    fut.cancel()
+                return
+            exc = task.exception()
+            results = [{"status": "error", "message": f"worker failed: {exc}"}] * len(batch) if exc else task.result()
+            for fut, result in zip(waiting, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+        work.add_done_callback(done)
+
+    try:
+        async for prompt in prompts:
+            if prompt not in futures:
+                futures[prompt] = loop.create_future()
+                chunk.append(prompt)
+                if len(chunk) >= chunk_size:
+                    submit(chunk)
+                    chunk = []
+            order.append(prompt)
+
+            while head < len(order) and futures[order[head]].done():
+                yield _saved(head, order[head], futures[order[head]].result())
+                head += 1
+
+        if chunk:
+            submit(chunk)
+
+        while head < len(order):
+            result = await futures[order[head]]
+            yield _saved(head, order[head], result)
+            head += 1
+    finally:
+        for fut in futures.values():
+            fut.cancel()
@@ -0,0 +1,742 @@
+# backend/app/batch_scheduler.py
+# Places a whole batch of meetings, and the rooms they need, together.
+# Time is cut into BATCH_SLOT_MIN quanta from the batch's earliest window
+# start. Each set of quanta - the starts a meeting may still take, the
+# quanta a room is taken - is a Python int used as a bitset, so ruling out
+# the starts a placement collides with is one AND per affected meeting.
+
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.app.availability import BusySource, busy_mask, from_epoch_min, to_epoch_min
+from backend.app.config import (
+    BATCH_PARALLEL_MIN,
+    BATCH_RESTART_PATIENCE,
+    BATCH_SLOT_MIN,
+    BATCH_TIME_BUDGET_S,
+    BATCH_WINDOW_DAYS,
+    BATCH_WORKERS,
+    DEFAULT_TIMEZONE,
+    SEARCH_HORIZON_DAYS,
+)
+from backend.app.metrics import stage
+from backend.app.ranking import Candidates, score
+from backend.app.recurrence import merge_busy
+from backend.app.scheduler_engine import extract_duration, extract_emails, find_date_window, get_busy_source
+from backend.app.timezones import WorkProfile, local_span, profile_directory, working_mask, zone
+
+
+class Room(NamedTuple):
+    id: str           # a calendar id; its busy time comes from the busy source like anyone's
+    capacity: int
+
+
+class MeetingRequest(NamedTuple):
+    summary: str
+    emails: Tuple[str, ...]
+    duration_min: int
+    window_start: int  # epoch minutes
+    window_end: int
+    room: bool         # needs one of the rooms
+    capacity: int      # seats it needs in that room
+
+
+def parse_meeting(item: Union[str, dict], time_zone: str, room: bool) -> MeetingRequest:
+    """A prompt, or {"prompt", "summary", "room", "capacity", "window_days"}, as a MeetingRequest.
+
+    Attendees, duration and the window start come from the same extractors
+    as /propose; the window runs BATCH_WINDOW_DAYS from there.
+    """
+    spec = {"prompt": item} if isinstance(item, str) else dict(item)
+    prompt = spec.get("prompt") or ""
+    emails = tuple(dict.fromkeys(e.lower() for e in extract_emails(prompt)))
+    start = find_date_window(prompt, time_zone)
+    if start is None:
+        raise ValueError("Could not parse date")
+    start_min = to_epoch_min(start)
+    duration_min = extract_duration(prompt)
+    if duration_min < 1:
+        raise ValueError("A meeting has to last at least a minute")
+    days = float(spec.get("window_days") or BATCH_WINDOW_DAYS)
+    return MeetingRequest(
+        summary=spec.get("summary") or "Meeting",
+        emails=emails,
+        duration_min=duration_min,
+        window_start=start_min,
+        window_end=start_min + int(days * 1440),
+        room=room if spec.get("room") is None else bool(spec["room"]),
+        capacity=int(spec.get("capacity") or len(emails) or 1),
+    )
+
+
+# -- bitsets ------------------------------------------------------------------
+
+def to_bits(mask: np.ndarray) -> int:
+    """Bool array -> int with bit i set where mask[i]."""
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def free_starts(busy: int, length: int, full: int) -> int:
+    """Starts t with quanta t .. t+length-1 all clear of busy."""
+    # OR busy with itself shifted by 0 .. length-1, doubling the span each step
+    blocked, span = busy, 1
+    while span < length:
+        step = min(span, length - span)
+        blocked |= blocked >> step
+        span += step
+    return ~blocked & full
+
+
+def overlap_mask(start: int, length: int, other_length: int) -> int:
+    """Starts of an other_length meeting that would overlap [start, start + length)."""
+    lo = start - other_length + 1
+    width = length + other_length - 1
+    if lo < 0:
+        width += lo
+        lo = 0
+    return ((1 << width) - 1) << lo
+
+
+class Problem(NamedTuple):
+    """One batch (or one independent part of it) in quanta; picklable for the process pool."""
+    durations: List[int]
+    domains: List[int]              # starts each meeting may take on its own
+    preferences: List[List[int]]    # those starts, best first
+    neighbors: List[List[int]]      # meetings sharing an attendee
+    rooms: List[Tuple[int, ...]]    # rooms that fit, smallest first; () = needs none
+    room_busy: List[int]            # quanta each room is already taken
+    n_quanta: int
+
+
+class Outcome(NamedTuple):
+    placed: Dict[int, Tuple[int, Optional[int]]]  # meeting -> (start quantum, room or None)
+    dropped: Dict[int, Tuple[str, List[int]]]     # meeting -> ("attendees", blockers) or ("rooms", [])
+    search: str     # "greedy", "exact", "restart", "infeasible" or "budget"
+    nodes: int
+
+
+# -- search -------------------------------------------------------------------
+
+class _Search:
+    """Assigns starts and rooms with forward checking.
+
+    Picking a meeting: fewest starts left (a room must be free too), then
+    most neighbours. Placing it removes the overlapping starts from every
+    unplaced neighbour, and from every meeting that could use the room.
+    Each meeting's open starts are only recounted after something it
+    depends on changed.
+    """
+
+    def __init__(self, p: Problem, seed: int = 0):
+        self.p = p
+        self.n = len(p.durations)
+        self.full = (1 << p.n_quanta) - 1
+        self.room_key = [(p.durations[i], p.rooms[i]) for i in range(self.n)]
+        self.room_users: List[List[int]] = [[] for _ in p.room_busy]
+        self.keys_with_room: List[set] = [set() for _ in p.room_busy]
+        for i, rooms in enumerate(p.rooms):
+            for r in rooms:
+                self.room_users[r].append(i)
+                self.keys_with_room[r].add(self.room_key[i])
+        self.nodes = 0
+        self.reseed(seed)
+        self.reset()
+
+    def reseed(self, seed: int):
+        # seed 0 is the deterministic order; others break ties at random and
+        # now and then take a slightly less preferred start
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.tiebreak = [self.rng.random() if seed else 0.0 for _ in range(self.n)]
+
+    def reset(self):
+        self.dom = list(self.p.domains)
+        self.start: List[Optional[int]] = [None] * self.n
+        self.room: List[Optional[int]] = [None] * self.n
+        self.occ = list(self.p.room_busy)
+        self.blockers: List[set] = [set() for _ in range(self.n)]
+        self._room_free: Dict[Tuple[int, Tuple[int, ...]], int] = {}  # per (duration, rooms)
+        self._room_starts: Dict[Tuple[int, int], int] = {}  # per (room, duration)
+        self.opts = [0] * self.n
+        self.rank: List[tuple] = [()] * self.n
+        self.dirty = set(range(self.n))
+
+    def room_free(self, i: int) -> int:
+        key = self.room_key[i]
+        if not key[1]:
+            return self.full
+        bits = self._room_free.get(key)
+        if bits is None:
+            bits = 0
+            d = key[0]
+            for r in key[1]:
+                one = self._room_starts.get((r, d))
+                if one is None:
+                    one = self._room_starts[r, d] = free_starts(self.occ[r], d, self.full)
+                bits |= one
+            self._room_free[key] = bits
+        return bits
+
+    def _room_changed(self, r: int):
+        for key in self.keys_with_room[r]:
+            self._room_free.pop(key, None)
+            self._room_starts.pop((r, key[0]), None)
+        self.dirty.update(self.room_users[r])
+
+    def select(self, unplaced) -> Tuple[int, int]:
+        for i in self.dirty:
+            if self.start[i] is None:
+                opts = self.dom[i] & self.room_free(i)
+                self.opts[i] = opts
+                self.rank[i] = (opts.bit_count(), -len(self.p.neighbors[i]), self.tiebreak[i], i)
+        self.dirty.clear()
+        best = min(unplaced, key=self.rank.__getitem__)
+        return best, self.opts[best]
+
+    def values(self, i: int, opts: int, every_room: bool = False) -> List[Tuple[int, Optional[int]]]:
+        """(start, room) pairs still open for i, preferred first, with the
+        smallest free room that fits (or each free room, smallest first)."""
+        d = self.p.durations[i]
+        rooms = self.p.rooms[i]
+        run = (1 << d) - 1
+        out = []
+        for t in self.p.preferences[i]:
+            if not (opts >> t) & 1:
+                continue
+            if not rooms:
+                out.append((t, None))
+                continue
+            for r in rooms:
+                if not (self.occ[r] >> t) & run:
+                    out.append((t, r))
+                    if not every_room:
+                        break
+        return out
+
+    def place(self, i: int, t: int, r: Optional[int], trail: Optional[list]):
+        d = self.p.durations[i]
+        self.start[i], self.room[i] = t, r
+        if trail is not None:
+            trail.append((0, i, None))
+        if r is not None:
+            if trail is not None:
+                trail.append((1, r, self.occ[r]))
+            self.occ[r] |= ((1 << d) - 1) << t
+            self._room_changed(r)
+        for j in self.p.neighbors[i]:
+            if self.start[j] is None:
+                mask = overlap_mask(t, d, self.p.durations[j])
+                if self.dom[j] & mask:
+                    if trail is not None:
+                        trail.append((2, j, self.dom[j]))
+                    else:
+                        self.blockers[j].add(i)
+                    self.dom[j] &= ~mask
+                    self.dirty.add(j)
+
+    def undo(self, trail: list, mark: int):
+        while len(trail) > mark:
+            kind, k, old = trail.pop()
+            if kind == 0:
+                self.start[k] = self.room[k] = None
+                self.dirty.add(k)
+            elif kind == 1:
+                self.occ[k] = old
+                self._room_changed(k)
+            else:
+                self.dom[k] = old
+                self.dirty.add(k)
+
+    def greedy(self) -> Dict[int, Tuple[str, List[int]]]:
+        """Place every meeting in turn at its best open start; drop the ones left with none."""
+        self.reset()
+        unplaced = set(range(self.n))
+        dropped = {}
+        while unplaced:
+            self.nodes += 1
+            i, opts = self.select(unplaced)
+            unplaced.discard(i)
+            values = self.values(i, opts) if opts else []
+            if values:
+                pick = 0
+                if self.seed and len(values) > 1 and self.rng.random() < 0.2:
+                    pick = self.rng.randrange(min(3, len(values)))
+                self.place(i, *values[pick], trail=None)
+            elif self.dom[i]:
+                dropped[i] = ("rooms", [])
+            else:
+                dropped[i] = ("attendees", sorted(self.blockers[i]))
+        return dropped
+
+    def _open_now(self, i: int) -> int:
+        """Starts unplaced i could take given what is placed right now, worked
+        out from scratch (repair moves meetings, which forward checking does not undo)."""
+        d = self.p.durations[i]
+        dom = self.p.domains[i]
+        for j in self.p.neighbors[i]:
+            t = self.start[j]
+            if t is not None:
+                dom &= ~overlap_mask(t, self.p.durations[j], d)
+        if self.p.rooms[i] and dom:
+            dom &= _or_all(free_starts(self.occ[r], d, self.full) for r in self.p.rooms[i])
+        return dom
+
+    def _set(self, i: int, t: Optional[int], r: Optional[int]):
+        run = ((1 << self.p.durations[i]) - 1) << (t if t is not None else self.start[i])
+        if r is not None:
+            self.occ[r] |= run
+        elif self.room[i] is not None:
+            self.occ[self.room[i]] &= ~run
+        self.start[i], self.room[i] = t, r
+
+    def repair(self, dropped: Dict[int, Tuple[str, List[int]]], deadline: float):
+        """Fit dropped meetings back in by moving one placed meeting that is in
+        the way (sharing an attendee, or a room it could use) somewhere else."""
+        for i in sorted(dropped):
+            if time.monotonic() > deadline:
+                return
+            rooms = set(self.p.rooms[i])
+            suspects = [j for j in self.p.neighbors[i] if self.start[j] is not None]
+            if rooms:
+                suspects += [j for j in range(self.n) if self.room[j] in rooms and j not in suspects]
+            for b in suspects:
+                tb, rb = self.start[b], self.room[b]
+                self._set(b, None, None)
+                for t, r in self.values(i, self._open_now(i))[:4]:
+                    self._set(i, t, r)
+                    elsewhere = self.values(b, self._open_now(b))
+                    if elsewhere:
+                        self._set(b, *elsewhere[0])
+                        break
+                    self._set(i, None, None)
+                if self.start[i] is not None:
+                    del dropped[i]
+                    break
+                self._set(b, tb, rb)
+
+    def exact(self, deadline: float) -> Optional[bool]:
+        """Depth-first search for a placement of every meeting.
+
+        True when found (left in self.start / self.room), False when there
+        is none, None when the deadline passed first.
+        """
+        self.reset()
+        unplaced = set(range(self.n))
+        trail: list = []
+        stack: list = []  # [meeting, values, next value, trail mark]
+        while True:
+            if not unplaced:
+                return True
+            self.nodes += 1
+            if self.nodes % 64 == 0 and time.monotonic() > deadline:
+                return None
+            i, opts = self.select(unplaced)
+            unplaced.discard(i)
+            stack.append([i, self.values(i, opts, every_room=True) if opts else [], 0, len(trail)])
+
+            # move the deepest meeting to its next value, backing up past exhausted ones
+            while stack:
+                frame = stack[-1]
+                self.undo(trail, frame[3])
+                if frame[2] < len(frame[1]):
+                    t, r = frame[1][frame[2]]
+                    frame[2] += 1
+                    self.place(frame[0], t, r, trail)
+                    break
+                stack.pop()
+                unplaced.add(frame[0])
+            else:
+                return False
+
+
+def solve(problem: Problem, budget_s: float, seed: int = 0) -> Outcome:
+    """Place every meeting of one part, or as many as the budget allows.
+
+    A greedy pass, then a repair of what it left out. If meetings are still
+    out, half the remaining budget goes to exhaustive search for a full
+    placement. When there is none (or no time to find it), greedy + repair
+    restarts with other tie-breaks use the rest, until BATCH_RESTART_PATIENCE
+    of them in a row leave out no fewer; the one that leaves out fewest wins.
+    """
+    deadline = time.monotonic() + budget_s
+    search = _Search(problem, seed)
+    dropped = search.greedy()
+    search.repair(dropped, deadline)
+    if not dropped:
+        return Outcome(_placed(search), {}, "greedy", search.nodes)
+    best = Outcome(_placed(search), dropped, "budget", search.nodes)
+
+    found = search.exact(time.monotonic() + max(0.0, deadline - time.monotonic()) / 2)
+    if found:
+        return Outcome(_placed(search), {}, "exact", search.nodes)
+    if found is False:
+        best = best._replace(search="infeasible")
+
+    restart = stale = 0
+    while time.monotonic() < deadline and stale < BATCH_RESTART_PATIENCE:
+        restart += 1
+        stale += 1
+        search.reseed(seed * 1_000_003 + restart)
+        dropped = search.greedy()
+        search.repair(dropped, deadline)
+        if len(dropped) < len(best.dropped):
+            best = best._replace(placed=_placed(search), dropped=dropped, search=best.search if dropped else "restart")
+            stale = 0
+            if not dropped:
+                break
+    return best._replace(nodes=search.nodes)
+
+
+def _placed(search: _Search) -> Dict[int, Tuple[int, Optional[int]]]:
+    return {i: (t, search.room[i]) for i, t in enumerate(search.start) if t is not None}
+
+
+def _better(a: Outcome, b: Outcome) -> bool:
+    return len(a.placed) > len(b.placed)
+
+
+# -- building the problem -----------------------------------------------------
+
+def _components(requests: Sequence[MeetingRequest], members: List[int],
+                eligible: Dict[int, Tuple[int, ...]]) -> List[List[int]]:
+    """Groups of meetings that cannot affect each other's placement.
+
+    Meetings are linked by a shared attendee, or by a room both could use
+    with overlapping windows.
+    """
+    parent = {i: i for i in members}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(a, b):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[ra] = rb
+
+    by_email: Dict[str, int] = {}
+    by_room: Dict[int, List[int]] = {}
+    for i in members:
+        for email in requests[i].emails:
+            if email in by_email:
+                union(i, by_email[email])
+            else:
+                by_email[email] = i
+        for r in eligible[i]:
+            by_room.setdefault(r, []).append(i)
+    for users in by_room.values():
+        users.sort(key=lambda i: requests[i].window_start)
+        reach, last = None, None
+        for i in users:
+            if reach is not None and requests[i].window_start < reach:
+                union(i, last)
+            if reach is None or requests[i].window_end > reach:
+                reach, last = requests[i].window_end, i
+
+    groups: Dict[int, List[int]] = {}
+    for i in members:
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def _subproblem(full: Problem, members: List[int]) -> Problem:
+    local = {g: k for k, g in enumerate(members)}
+    return Problem(
+        durations=[full.durations[g] for g in members],
+        domains=[full.domains[g] for g in members],
+        preferences=[full.preferences[g] for g in members],
+        neighbors=[[local[j] for j in full.neighbors[g] if j in local] for g in members],
+        rooms=[full.rooms[g] for g in members],
+        room_busy=full.room_busy,
+        n_quanta=full.n_quanta,
+    )
+
+
+def _solve_many(parts: List[Problem], budget_s: float, seed: int = 0) -> List[Outcome]:
+    deadline = time.monotonic() + budget_s
+    return [solve(part, max(0.0, deadline - time.monotonic()), seed) for part in parts]
+
+
+def _solve_parts(parts: List[Problem], budget_s: float, workers: int) -> List[Outcome]:
+    """Outcome per independent part.
+
+    On one worker the parts run in turn. On several, a single part is raced
+    with a different tie-break seed per worker and the best result kept;
+    several parts are dealt out to the workers, largest first onto the
+    least loaded.
+    """
+    if workers <= 1 or sum(len(part.durations) for part in parts) < BATCH_PARALLEL_MIN:
+        return _solve_many(parts, budget_s)
+
+    from backend.app.batch_propose import process_pool
+
+    pool = process_pool()
+    if len(parts) == 1:
+        futures = [pool.submit(solve, parts[0], budget_s, seed) for seed in range(workers)]
+        best = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                outcome = fut.result()
+                if best is None or _better(outcome, best):
+                    best = outcome
+            if not best.dropped:
+                break  # the rest stop on their own when the budget runs out
+        return [best]
+
+    bundles: List[List[int]] = [[] for _ in range(min(workers, len(parts)))]
+    load = [0] * len(bundles)
+    for k in range(len(parts)):  # parts come largest first
+        w = load.index(min(load))
+        bundles[w].append(k)
+        load[w] += len(parts[k].durations)
+    outcomes: List[Optional[Outcome]] = [None] * len(parts)
+    jobs = {pool.submit(_solve_many, [parts[k] for k in bundle], budget_s): bundle for bundle in bundles}
+    for fut, bundle in jobs.items():
+        for k, outcome in zip(bundle, fut.result()):
+            outcomes[k] = outcome
+    return outcomes
+
+
+def _window_fits(busy: np.ndarray, length: int, lo: int, hi: int) -> np.ndarray:
+    """Bool per quantum: a start in [lo, hi] whose length quanta are all free."""
+    fits = np.zeros(len(busy), dtype=bool)
+    if hi >= lo:
+        taken = np.concatenate(([0], np.cumsum(busy, dtype=np.int64)))
+        t = np.arange(lo, hi + 1)
+        fits[t] = taken[t + length] == taken[t]
+    return fits
+
+
+def _or_all(values) -> int:
+    out = 0
+    for v in values:
+        out |= v
+    return out
+
+
+class Batch(NamedTuple):
+    problem: Problem
+    origin: int                          # epoch minute of quantum 0
+    feasible: List[int]                  # meetings with at least one start on their own
+    reasons: Dict[int, List[str]]        # why the others have none
+    starts: List[np.ndarray]             # quanta each meeting may start at, ascending
+    scores: List[np.ndarray]             # ranking score at each of those starts
+
+
+def build(requests: Sequence[MeetingRequest], rooms: Sequence[Room], source: BusySource,
+          time_zone: str) -> Batch:
+    """Everyone's busy time and working hours, and each room's bookings, as quanta;
+    then each meeting's possible starts and the order it prefers them in."""
+    q = max(1, BATCH_SLOT_MIN)
+    origin = min(r.window_start for r in requests) // q * q
+    # one stray far-off date must not stretch every bitset to cover it
+    last = min(max(r.window_end for r in requests), origin + SEARCH_HORIZON_DAYS * 1440)
+    n = -(-(last - origin) // q)
+    end = origin + n * q
+    full = (1 << n) - 1
+
+    emails = sorted({e for r in requests for e in r.emails})
+    intervals = source.busy_intervals(emails, origin, end)
+    profiles = profile_directory().lookup(emails)
+    empty = np.empty((0, 2), dtype=np.int64)
+
+    def quanta_busy(iv: np.ndarray) -> np.ndarray:
+        return busy_mask({"x": iv}, origin, end).reshape(n, q).any(axis=1)
+
+    off_hours: Dict[WorkProfile, np.ndarray] = {}
+    person: Dict[str, np.ndarray] = {}
+    for email in emails:
+        busy = quanta_busy(intervals.get(email, empty))
+        profile = profiles.get(email)
+        if profile is not None:
+            if profile not in off_hours:
+                off_hours[profile] = ~working_mask(profile, origin, end).reshape(n, q).all(axis=1)
+            busy |= off_hours[profile]
+        person[email] = busy
+
+    room_intervals = source.busy_intervals([room.id for room in rooms], origin, end) if rooms else {}
+    room_busy = [to_bits(quanta_busy(room_intervals.get(room.id, empty))) for room in rooms]
+    by_size = sorted(range(len(rooms)), key=lambda r: (rooms[r].capacity, r))
+
+    durations, domains, preferences, eligible = [], [], [], []
+    feasible, reasons, starts, scores = [], {}, [], []
+    for i, req in enumerate(requests):
+        d = -(-req.duration_min // q)
+        lo = min(n, -(-(req.window_start - origin) // q))
+        hi = (min(req.window_end, end) - origin) // q - d
+        busy = np.zeros(n, dtype=bool)
+        for email in req.emails:
+            busy |= person[email]
+        fits = _window_fits(busy, d, lo, hi)
+        fit_rooms = tuple(r for r in by_size if rooms[r].capacity >= req.capacity) if req.room else ()
+
+        domain = to_bits(fits)
+        why = []
+        if req.window_start >= end:
+            why.append(f"its window starts more than {SEARCH_HORIZON_DAYS} days after the batch's first one")
+        elif hi < lo:
+            why.append(f"the window is shorter than {req.duration_min} min")
+        elif not domain:
+            alone = [e for e in req.emails if not _window_fits(person[e], d, lo, hi).any()]
+            why.extend(f"{e} has no free {req.duration_min} min in the window" for e in alone)
+            if not alone:
+                why.append("the attendees have no free time in common in the window")
+        elif req.room and not fit_rooms:
+            why.append(f"no room seats {req.capacity}")
+        elif req.room and not domain & _or_all(free_starts(room_busy[r], d, full) for r in fit_rooms):
+            why.append(f"no room that seats {req.capacity} is free when the attendees are")
+
+        t = np.flatnonzero(fits)
+        s = np.zeros(len(t))
+        if len(t) and not why:
+            with stage("schedule_batch", "ranking"):
+                busy_starts, busy_reach = merge_busy({e: intervals.get(e, empty) for e in req.emails})
+                attendee_profiles = [profiles[e] for e in req.emails if e in profiles]
+                zones = (time_zone,) + tuple(sorted({p.tz for p in attendee_profiles} - {time_zone}))
+                candidates = Candidates.build(origin + t * q, req.duration_min, req.window_start,
+                                              req.window_end - req.window_start, busy_starts, busy_reach,
+                                              zones, attendee_profiles)
+                s, _ = score(candidates)
+        durations.append(d)
+        domains.append(domain if not why else 0)
+        preferences.append(t[np.lexsort((t, -s))].tolist() if not why else [])
+        eligible.append(fit_rooms)
+        starts.append(t)
+        scores.append(s)
+        if why:
+            reasons[i] = why
+        else:
+            feasible.append(i)
+
+    by_email: Dict[str, List[int]] = {}
+    for i in feasible:
+        for email in requests[i].emails:
+            by_email.setdefault(email, []).append(i)
+    neighbors = [[] for _ in requests]
+    for group in by_email.values():
+        for i in group:
+            neighbors[i].extend(j for j in group if j != i)
+    neighbors = [sorted(set(js)) for js in neighbors]
+
+    problem = Problem(durations, domains, preferences, neighbors, eligible, room_busy, n)
+    return Batch(problem, origin, feasible, reasons, starts, scores)
+
+
+def _drop_reasons(req: MeetingRequest, why: Tuple[str, List[int]], search: str) -> List[str]:
+    kind, blockers = why
+    if kind == "attendees":
+        reasons = [f"every free time clashes with meeting(s) {', '.join(map(str, blockers))} "
+                   f"that share attendees" if blockers else "its attendees are taken by other meetings"]
+    else:
+        reasons = [f"no room that seats {req.capacity} is left when the attendees are free"]
+    if search == "budget":
+        reasons.append("the time budget ran out before every meeting could be placed")
+    else:
+        reasons.append("no placement fits every meeting it shares attendees or rooms with")
+    return reasons
+
+
+def schedule(requests: Sequence[MeetingRequest], rooms: Sequence[Room] = (),
+             busy_source: Optional[BusySource] = None, time_zone: Optional[str] = None,
+             time_budget_s: Optional[float] = None, workers: Optional[int] = None) -> dict:
+    """Place every request without double-booking an attendee or a room.
+
+    Returns one entry per request, in order, either scheduled (start, end,
+    room, its ranking score) or unscheduled with the reasons why.
+    """
+    started = time.perf_counter()
+    time_zone = time_zone or DEFAULT_TIMEZONE
+    budget = BATCH_TIME_BUDGET_S if time_budget_s is None else time_budget_s
+    workers = workers or BATCH_WORKERS or os.cpu_count() or 1
+    source = busy_source if busy_source is not None else get_busy_source()
+    if not requests:
+        return {"status": "ok", "scheduled": 0, "unscheduled": 0, "meetings": []}
+
+    with stage("schedule_batch", "build"):
+        batch = build(requests, rooms, source, time_zone)
+    members = _components(requests, batch.feasible, dict(enumerate(batch.problem.rooms)))
+    parts = [_subproblem(batch.problem, group) for group in members]
+    remaining = max(0.0, budget - (time.perf_counter() - started))
+    with stage("schedule_batch", "search"):
+        outcomes = _solve_parts(parts, remaining, workers)
+
+    placed: Dict[int, Tuple[int, Optional[int]]] = {}
+    reasons = dict(batch.reasons)
+    searches: Dict[str, int] = {}
+    for group, outcome in zip(members, outcomes):
+        searches[outcome.search] = searches.get(outcome.search, 0) + 1
+        for k, (t, r) in outcome.placed.items():
+            placed[group[k]] = (t, r)
+        for k, why in outcome.dropped.items():
+            why = (why[0], [group[j] for j in why[1]])
+            reasons[group[k]] = _drop_reasons(requests[group[k]], why, outcome.search)
+
+    tz = zone(time_zone)
+    q = max(1, BATCH_SLOT_MIN)
+    meetings = []
+    for i, req in enumerate(requests):
+        entry = {"index": i, "summary": req.summary, "emails": list(req.emails)}
+        if i in placed:
+            t, r = placed[i]
+            start_min = batch.origin + t * q
+            start = from_epoch_min(start_min, tz)
+            end = from_epoch_min(start_min + req.duration_min, tz)
+            at = np.searchsorted(batch.starts[i], t)
+            entry.update(
+                status="scheduled",
+                start=start.isoformat(),
+                end=end.isoformat(),
+                human=local_span(start, end, time_zone),
+                room=rooms[r].id if r is not None else None,
+                score=round(float(batch.scores[i][at]), 3),
+            )
+        else:
+            entry.update(status="unscheduled", reasons=reasons.get(i, ["not placed"]))
+        meetings.append(entry)
+
+    return {
+        "status": "ok",
+        "scheduled": len(placed),
+        "unscheduled": len(requests) - len(placed),
+        "components": len(parts),
+        "workers": workers if parts else 0,
+        "search": searches,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "meetings": meetings,
+    }
+
+
+def schedule_batch(items: Sequence[Union[str, dict]], rooms: Sequence[Room] = (),
+                   time_zone: Optional[str] = None, time_budget_s: Optional[float] = None,
+                   busy_source: Optional[BusySource] = None) -> dict:
+    """Parse each item (see parse_meeting) and schedule the lot; items that do
+    not parse come back unscheduled with the parse error as their reason."""
+    time_zone = time_zone or DEFAULT_TIMEZONE
+    needs_room = bool(rooms)
+    parsed, failed = [], {}
+    with stage("schedule_batch", "parse"):
+        for i, item in enumerate(items):
+            try:
+                parsed.append((i, parse_meeting(item, time_zone, needs_room)))
+            except ValueError as exc:
+                failed[i] = str(exc)
+    result = schedule([req for _, req in parsed], rooms, busy_source, time_zone, time_budget_s)
+    meetings = result["meetings"]
+    for entry, (i, _) in zip(meetings, parsed):
+        entry["index"] = i
+    for i, message in failed.items():
+        item = items[i]
+        meetings.append({"index": i, "summary": (item.get("summary") if isinstance(item, dict) else None) or "Meeting",
+                         "emails": [], "status": "unscheduled", "reasons": [message]})
+    meetings.sort(key=lambda m: m["index"])
+    return dict(result, unscheduled=result["unscheduled"] + len(failed), meetings=meetings)
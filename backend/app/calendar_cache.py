@@ -0,0 +1,340 @@
+# backend/app/calendar_cache.py
+
+import itertools
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.app.availability import BusySource, busy_mask, to_epoch_min
+from backend.app.config import BUSY_CACHE_LOOKBACK_DAYS, BUSY_CACHE_MAX_CALENDARS, BUSY_CACHE_TTL_S, SHARED_BUSY_DAYS
+from backend.app.shared_cache import get_shared_cache
+
+logger = logging.getLogger("calendar")
+
+
+class SyncTokenExpired(Exception):
+    """The events API rejected a sync token (HTTP 410); a full sync is needed."""
+
+
+class EventsAPI:
+    """Source of calendar events for the cache: one full sync, then deltas."""
+
+    def list_events(self, calendar_id: str, sync_token: Optional[str] = None,
+                    time_min: Optional[str] = None) -> Tuple[List[dict], str]:
+        """Return (changed events, next sync token)."""
+        raise NotImplementedError
+
+
+class GoogleEventsAPI(EventsAPI):
+    def __init__(self, tool):
+        self.tool = tool
+
+    def list_events(self, calendar_id, sync_token=None, time_min=None):
+        from googleapiclient.errors import HttpError
+
+        events = self.tool.service.events()
+        params = {"calendarId": calendar_id, "singleEvents": True, "maxResults": 2500}
+        if sync_token:
+            params["syncToken"] = sync_token
+        elif time_min:
+            params["timeMin"] = time_min
+
+        items, page_token = [], None
+        while True:
+            try:
+                resp = self.tool.client.execute(events.list(pageToken=page_token, **params))
+            except HttpError as exc:
+                if getattr(exc.resp, "status", None) == 410:
+                    raise SyncTokenExpired(calendar_id) from exc
+                raise
+            items.extend(resp.get("items", []))
+            page_token = resp.get("nextPageToken")
+            if not page_token:
+                return items, resp.get("nextSyncToken")
+
+
+class FakeEventsAPI(EventsAPI):
+    """In-memory events API with sync tokens, for tests and local runs."""
+
+    def __init__(self):
+        self._log: List[Tuple[int, str, dict]] = []  # (version, calendar_id, event)
+        self._version = itertools.count(1)
+        self._current = 0
+        self._oldest_valid = 0
+        self.calls = {"full": 0, "delta": 0}
+
+    def upsert(self, calendar_id: str, event: dict):
+        self._current = next(self._version)
+        self._log.append((self._current, calendar_id, event))
+
+    def delete(self, calendar_id: str, event_id: str):
+        self.upsert(calendar_id, {"id": event_id, "status": "cancelled"})
+
+    def expire_tokens(self):
+        self._oldest_valid = self._current
+
+    def list_events(self, calendar_id, sync_token=None, time_min=None):
+        if sync_token is None:
+            self.calls["full"] += 1
+            since = 0
+        else:
+            self.calls["delta"] += 1
+            since = int(sync_token)
+            if since < self._oldest_valid:
+                raise SyncTokenExpired(calendar_id)
+
+        latest = {}
+        for version, cal, event in self._log:
+            if version > since and cal == calendar_id:
+                latest[event["id"]] = event
+        items = list(latest.values())
+        if sync_token is None:
+            items = [e for e in items if e.get("status") != "cancelled"]
+        return items, str(self._current)
+
+
+def event_interval(event: dict) -> Optional[Tuple[int, int]]:
+    """Busy interval of an event in epoch minutes, or None if it does not block time."""
+    if event.get("status") == "cancelled" or event.get("transparency") == "transparent":
+        return None
+    start, end = event.get("start", {}), event.get("end", {})
+    if "dateTime" in start:
+        s = datetime.fromisoformat(start["dateTime"].replace("Z", "+00:00"))
+        e = datetime.fromisoformat(end["dateTime"].replace("Z", "+00:00"))
+    elif "date" in start:
+        s = datetime.fromisoformat(start["date"]).replace(tzinfo=timezone.utc)
+        e = datetime.fromisoformat(end["date"]).replace(tzinfo=timezone.utc)
+    else:
+        return None
+    return to_epoch_min(s), to_epoch_min(e)
+
+
+# Shared busy record: the window start in epoch minutes, then one bit per
+# minute (least significant bit first) for SHARED_BUSY_DAYS from there.
+WINDOW_START = struct.Struct("<q")
+
+
+def pack_busy(intervals: np.ndarray, now_min: int) -> bytes:
+    """A calendar's busy time as a minute bitmap, from BUSY_CACHE_LOOKBACK_DAYS before now."""
+    base = (now_min // 1440 - BUSY_CACHE_LOOKBACK_DAYS) * 1440
+    mask = busy_mask({"": intervals}, base, base + SHARED_BUSY_DAYS * 1440)
+    return WINDOW_START.pack(base) + np.packbits(mask, bitorder="little").tobytes()
+
+
+def covers(data: bytes, start_min: int, end_min: int) -> bool:
+    base = WINDOW_START.unpack_from(data)[0]
+    return base <= start_min and end_min <= base + (len(data) - WINDOW_START.size) * 8
+
+
+def unpack_busy(data: bytes, start_min: int, end_min: int) -> np.ndarray:
+    """Busy intervals in [start_min, end_min), which the bitmap must cover.
+
+    Back-to-back events come out merged, and intervals are clipped to the range."""
+    base = WINDOW_START.unpack_from(data)[0]
+    lo, hi = start_min - base, end_min - base
+    first = lo // 8
+    raw = np.frombuffer(data, dtype=np.uint8, offset=WINDOW_START.size + first, count=-(-hi // 8) - first)
+    bits = np.unpackbits(raw, bitorder="little")[lo - first * 8: hi - first * 8].astype(np.int8)
+    edges = np.diff(bits, prepend=0, append=0)
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return np.stack((starts, ends), axis=1).astype(np.int64) + start_min
+
+
+def mark_busy(data: bytes, start_min: int, end_min: int) -> bytes:
+    """The bitmap with [start_min, end_min) set, as far as it falls in the window."""
+    base = WINDOW_START.unpack_from(data)[0]
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=WINDOW_START.size), bitorder="little")
+    bits[max(0, start_min - base): max(0, end_min - base)] = 1
+    return data[:WINDOW_START.size] + np.packbits(bits, bitorder="little").tobytes()
+
+
+class CalendarEntry:
+    def __init__(self):
+        self.events: Dict[str, Tuple[int, int]] = {}
+        self.sync_token: Optional[str] = None
+        self.synced_at = 0.0
+        self.lock = threading.Lock()
+        self._array: Optional[np.ndarray] = None
+
+    def apply(self, event: dict):
+        interval = event_interval(event)
+        if interval is None:
+            self.events.pop(event.get("id"), None)
+        else:
+            self.events[event["id"]] = interval
+        self._array = None
+
+    def array(self) -> np.ndarray:
+        if self._array is None:
+            arr = np.array(list(self.events.values()), dtype=np.int64).reshape(-1, 2)
+            self._array = arr[np.argsort(arr[:, 0], kind="stable")]
+        return self._array
+
+
+class BusyIntervalCache(BusySource):
+    """Per-calendar busy intervals kept fresh with sync-token deltas.
+
+    A calendar is seeded by one full sync on first use. After BUSY_CACHE_TTL_S
+    the next read pulls only the changes since the last sync token; an
+    expired token falls back to a full sync. Our own inserts are written
+    through with apply_event. At most BUSY_CACHE_MAX_CALENDARS calendars are
+    held, least recently used first out.
+
+    Every sync is also published to the host's shared cache as a minute
+    bitmap. A worker whose own copy is missing or stale reads that first,
+    so within a TTL a calendar is fetched from Google once per host rather
+    than once per worker.
+    """
+
+    def __init__(self, api: EventsAPI, ttl_s: float = BUSY_CACHE_TTL_S,
+                 max_calendars: int = BUSY_CACHE_MAX_CALENDARS, clock=time.monotonic):
+        self.api = api
+        self.ttl_s = ttl_s
+        self.max_calendars = max_calendars
+        self.clock = clock
+        self._entries: "OrderedDict[str, CalendarEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "stale": 0, "shared_hits": 0, "published": 0, "resyncs": 0,
+                        "evictions": 0, "write_through": 0, "staleness_s_total": 0.0}
+
+    def _entry(self, calendar_id: str) -> CalendarEntry:
+        with self._lock:
+            entry = self._entries.get(calendar_id)
+            if entry is None:
+                entry = self._entries[calendar_id] = CalendarEntry()
+                while len(self._entries) > self.max_calendars:
+                    self._entries.popitem(last=False)
+                    self.metrics["evictions"] += 1
+            else:
+                self._entries.move_to_end(calendar_id)
+            return entry
+
+    def _record(self, name: str, value=1):
+        with self._lock:
+            self.metrics[name] += value
+
+    def _full_sync(self, calendar_id: str, entry: CalendarEntry):
+        time_min = (datetime.now(timezone.utc) - timedelta(days=BUSY_CACHE_LOOKBACK_DAYS)).isoformat()
+        items, token = self.api.list_events(calendar_id, time_min=time_min)
+        entry.events.clear()
+        for event in items:
+            entry.apply(event)
+        entry._array = None
+        entry.sync_token = token
+        entry.synced_at = self.clock()
+
+    def _fresh(self, entry: CalendarEntry) -> bool:
+        return entry.sync_token is not None and self.clock() - entry.synced_at <= self.ttl_s
+
+    def _refresh(self, calendar_id: str, entry: CalendarEntry) -> bool:
+        """Bring the entry up to date; True if that took a call to the API."""
+        with entry.lock:
+            age = self.clock() - entry.synced_at
+            if entry.sync_token is None:
+                self._record("misses")
+                self._full_sync(calendar_id, entry)
+                return True
+            if age <= self.ttl_s:
+                self._record("hits")
+                return False
+
+            self._record("stale")
+            self._record("staleness_s_total", age)
+            try:
+                items, token = self.api.list_events(calendar_id, sync_token=entry.sync_token)
+            except SyncTokenExpired:
+                self._record("resyncs")
+                self._full_sync(calendar_id, entry)
+                return True
+            for event in items:
+                entry.apply(event)
+            entry.sync_token = token
+            entry.synced_at = self.clock()
+            return True
+
+    def busy_intervals(self, emails, start_min, end_min):
+        shared = get_shared_cache()
+        out = {}
+        for email in emails:
+            entry = self._entry(email)
+            if shared is not None and not self._fresh(entry):
+                data = shared.get("busy", email, max_age_s=self.ttl_s,
+                                  accept=lambda record: covers(record, start_min, end_min))
+                if data is not None:
+                    self._record("shared_hits")
+                    out[email] = unpack_busy(data, start_min, end_min)
+                    continue
+            fetched = self._refresh(email, entry)
+            with entry.lock:
+                arr = entry.array()
+            if fetched and shared is not None:
+                shared.put("busy", email, pack_busy(arr, int(time.time() // 60)))
+                self._record("published")
+            head = arr[: np.searchsorted(arr[:, 0], end_min, side="left")]
+            out[email] = head[head[:, 1] > start_min]
+        return out
+
+    def apply_event(self, calendar_id: str, event: dict):
+        """Write-through for events we created ourselves; ignored if not cached."""
+        shared = get_shared_cache()
+        if shared is not None:
+            interval = event_interval(event)
+            if interval is None:
+                shared.delete("busy", calendar_id)  # bits cannot be unset safely; the next read refetches
+            else:
+                shared.update("busy", calendar_id, lambda data: mark_busy(data, *interval))
+        with self._lock:
+            entry = self._entries.get(calendar_id)
+        if entry is None:
+            return
+        with entry.lock:
+            entry.apply(event)
+        self._record("write_through")
+
+    def invalidate(self, calendar_id: Optional[str] = None):
+        shared = get_shared_cache()
+        with self._lock:
+            if calendar_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(calendar_id, None)
+        if shared is not None:
+            if calendar_id is None:
+                shared.clear("busy")
+            else:
+                shared.delete("busy", calendar_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.metrics, size=len(self._entries))
+        reads = stats["hits"] + stats["misses"] + stats["stale"] + stats["shared_hits"]
+        stats["hit_rate"] = stats["hits"] / reads if reads else 0.0
+        stats["shared_hit_rate"] = stats["shared_hits"] / reads if reads else 0.0
+        stats["avg_staleness_s"] = stats["staleness_s_total"] / stats["stale"] if stats["stale"] else 0.0
+        return stats
+
+
+_busy_cache: Optional[BusyIntervalCache] = None
+
+
+def set_busy_cache(cache: Optional[BusyIntervalCache]):
+    global _busy_cache
+    _busy_cache = cache
+
+
+def get_busy_cache() -> Optional[BusyIntervalCache]:
+    return _busy_cache
+
+
+def record_created(event: dict, calendar_id: str = "primary"):
+    """Write a freshly created event through to the busy cache, if one is active."""
+    if _busy_cache is None or not event:
+        return
+    owner = (event.get("organizer") or {}).get("email") or calendar_id
+    _busy_cache.apply_event(owner, event)
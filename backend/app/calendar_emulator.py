@@ -0,0 +1,344 @@
+# backend/app/calendar_emulator.py
+# Local stand-in for the parts of Google Calendar v3 the backend uses:
+# events insert/list/delete (with sync tokens), freeBusy, the batch
+# endpoint and the OAuth token endpoint. Latency, server errors and
+# per-user / per-project rate limits can be injected, so the confirm and
+# busy-lookup paths can be load tested offline.
+#
+#     python -m backend.app.calendar_emulator --port 8081 --latency-ms 40 --user-qps 10
+#
+# then start the backend with
+#
+#     GOOGLE_API_ROOT=http://127.0.0.1:8081 GOOGLE_TOKEN_URI=http://127.0.0.1:8081/token
+#
+# and any non-empty DEMO_REFRESH_TOKEN / GOOGLE_CLIENT_ID / GOOGLE_CLIENT_SECRET.
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import itertools
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from backend.app.outbound import TokenBucket
+
+MAX_PAGE = 2500
+
+
+def _ts(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _google_error(status: int, reason: str, message: str, retry_after: Optional[float] = None) -> Tuple[int, dict, dict]:
+    headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else {}
+    domain = "usageLimits" if "Limit" in reason else "global"
+    body = {"error": {"code": status, "message": message,
+                      "errors": [{"domain": domain, "reason": reason, "message": message}]}}
+    return status, body, headers
+
+
+class Faults:
+    """What the emulator injects. Rates of 0 mean unlimited."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 user_qps: float = 0.0, project_qps: float = 0.0, retry_after: Optional[float] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.user_qps = user_qps
+        self.project_qps = project_qps
+        self.retry_after = retry_after
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class CalendarState:
+    """Events per calendar plus a change log for incremental sync."""
+
+    def __init__(self, faults: Faults, seed: Optional[int] = None):
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.calendars: Dict[str, Dict[str, dict]] = {}
+        self.log: Dict[str, List[Tuple[int, str]]] = {}  # calendar -> [(version, event id)]
+        self.version = itertools.count(1)
+        self.current = 0
+        self.oldest_valid = 0
+        self.project: Optional[TokenBucket] = None
+        self.users: Dict[str, TokenBucket] = {}
+        self.stats = {"requests": 0, "inserted": 0, "listed": 0, "deleted": 0, "freebusy": 0, "batches": 0,
+                      "tokens": 0, "user_throttled": 0, "project_throttled": 0, "errors_injected": 0}
+        self.reset_buckets()
+
+    def reset_buckets(self):
+        now = time.monotonic()
+        self.project = TokenBucket(self.faults.project_qps, 1.0, now) if self.faults.project_qps else None
+        self.users = {}
+
+    # -- fault injection --------------------------------------------------
+
+    async def delay(self):
+        ms = self.faults.latency_ms + self.rng.random() * self.faults.jitter_ms
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+
+    def admit(self, user: str) -> Optional[Tuple[int, dict, dict]]:
+        """None if the call may proceed, else the error response Google would send."""
+        now = time.monotonic()
+        if self.faults.user_qps:
+            bucket = self.users.get(user)
+            if bucket is None:
+                bucket = self.users[user] = TokenBucket(self.faults.user_qps, 1.0, now)
+            if bucket.wait_time(1, now) > 0:
+                self.stats["user_throttled"] += 1
+                return _google_error(403, "userRateLimitExceeded", "User Rate Limit Exceeded", self.faults.retry_after)
+        if self.project is not None and self.project.wait_time(1, now) > 0:
+            self.stats["project_throttled"] += 1
+            return _google_error(429, "rateLimitExceeded", "Rate Limit Exceeded", self.faults.retry_after)
+        if self.faults.error_rate and self.rng.random() < self.faults.error_rate:
+            self.stats["errors_injected"] += 1
+            return _google_error(503, "backendError", "Backend Error")
+        if self.faults.user_qps:
+            bucket.take(1, now)
+        if self.project is not None:
+            self.project.take(1, now)
+        return None
+
+    # -- calendar data ----------------------------------------------------
+
+    @staticmethod
+    def calendar_key(calendar_id: str, user: str) -> str:
+        return f"primary:{user}" if calendar_id == "primary" else calendar_id
+
+    def _changed(self, calendar: str, event_id: str):
+        self.current = next(self.version)
+        self.log.setdefault(calendar, []).append((self.current, event_id))
+
+    def insert(self, calendar: str, body: dict) -> dict:
+        now = _iso(time.time())
+        event = dict(body, id=body.get("id") or uuid.uuid4().hex, status="confirmed", kind="calendar#event",
+                     created=now, updated=now, organizer={"email": calendar, "self": True})
+        self.calendars.setdefault(calendar, {})[event["id"]] = event
+        self._changed(calendar, event["id"])
+        self.stats["inserted"] += 1
+        return event
+
+    def delete(self, calendar: str, event_id: str) -> bool:
+        event = self.calendars.get(calendar, {}).get(event_id)
+        if event is None or event["status"] == "cancelled":
+            return False
+        event["status"] = "cancelled"
+        self._changed(calendar, event_id)
+        self.stats["deleted"] += 1
+        return True
+
+    def list(self, calendar: str, params: Dict[str, str]) -> Tuple[int, dict, dict]:
+        self.stats["listed"] += 1
+        events = self.calendars.get(calendar, {})
+        sync_token = params.get("syncToken")
+        if sync_token:
+            if int(sync_token) < self.oldest_valid:
+                return _google_error(410, "fullSyncRequired", "Sync token is no longer valid, a full sync is required.")
+            changed = {eid for v, eid in self.log.get(calendar, []) if v > int(sync_token)}
+            items = [events[eid] for eid in sorted(changed)]
+        else:
+            lo = _ts(params["timeMin"]) if params.get("timeMin") else None
+            hi = _ts(params["timeMax"]) if params.get("timeMax") else None
+            items = [
+                ev for ev in events.values()
+                if ev["status"] != "cancelled"
+                and (lo is None or ev.get("recurrence") or _ts(ev["end"]["dateTime"]) > lo)
+                and (hi is None or _ts(ev["start"]["dateTime"]) < hi)
+            ]
+            items.sort(key=lambda ev: ev["start"]["dateTime"])
+
+        size = min(int(params.get("maxResults") or 250), MAX_PAGE)
+        offset = int(params.get("pageToken") or 0)
+        page = items[offset:offset + size]
+        body = {"kind": "calendar#events", "items": page}
+        if offset + size < len(items):
+            body["nextPageToken"] = str(offset + size)
+        else:
+            body["nextSyncToken"] = str(self.current)
+        return 200, body, {}
+
+    def busy(self, calendar: str, lo: float, hi: float) -> List[dict]:
+        from dateutil.rrule import rrulestr
+
+        spans = []
+        for ev in self.calendars.get(calendar, {}).values():
+            if ev["status"] == "cancelled" or ev.get("transparency") == "transparent":
+                continue
+            start, end = _ts(ev["start"]["dateTime"]), _ts(ev["end"]["dateTime"])
+            if ev.get("recurrence"):
+                first = datetime.fromtimestamp(start, timezone.utc)
+                rule = rrulestr("\n".join(ev["recurrence"]), dtstart=first, forceset=True)
+                for occ in rule.between(datetime.fromtimestamp(lo - (end - start), timezone.utc),
+                                        datetime.fromtimestamp(hi, timezone.utc), inc=True):
+                    spans.append((occ.timestamp(), occ.timestamp() + end - start))
+            elif start < hi and end > lo:
+                spans.append((start, end))
+
+        merged: List[List[float]] = []
+        for s, e in sorted(spans):
+            s, e = max(s, lo), min(e, hi)
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            elif e > s:
+                merged.append([s, e])
+        return [{"start": _iso(s), "end": _iso(e)} for s, e in merged]
+
+
+def _user(headers) -> str:
+    auth = headers.get("authorization", "")
+    return auth[7:] if auth.lower().startswith("bearer ") else auth
+
+
+def emulator_app(faults: Optional[Faults] = None, seed: Optional[int] = None) -> FastAPI:
+    app = FastAPI(title="Google Calendar emulator")
+    state = CalendarState(faults or Faults(), seed)
+    app.state.calendar = state
+
+    def reply(status: int, body: dict, headers: dict):
+        return JSONResponse(status_code=status, content=body, headers=headers)
+
+    def call(method: str, path: str, query: Dict[str, str], body: Optional[dict], user: str) -> Tuple[int, dict, dict]:
+        """One Calendar API call, shared by the REST routes and batch parts."""
+        state.stats["requests"] += 1
+        refused = state.admit(user)
+        if refused is not None:
+            return refused
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        # calendar/v3/calendars/{id}/events[/{eventId}] or calendar/v3/freeBusy
+        if parts[:3] == ["calendar", "v3", "freeBusy"] and method == "POST":
+            state.stats["freebusy"] += 1
+            lo, hi = _ts(body["timeMin"]), _ts(body["timeMax"])
+            calendars = {item["id"]: {"busy": state.busy(item["id"], lo, hi)} for item in body.get("items", [])}
+            return 200, {"kind": "calendar#freeBusy", "timeMin": body["timeMin"], "timeMax": body["timeMax"],
+                         "calendars": calendars}, {}
+        if len(parts) >= 5 and parts[:3] == ["calendar", "v3", "calendars"] and parts[4] == "events":
+            calendar = state.calendar_key(parts[3], user)
+            if len(parts) == 5 and method == "POST":
+                if (body or {}).get("id") in state.calendars.get(calendar, {}):
+                    return _google_error(409, "duplicate", "The requested identifier already exists.")
+                return 200, state.insert(calendar, body or {}), {}
+            if len(parts) == 5 and method == "GET":
+                return state.list(calendar, query)
+            if len(parts) == 6 and method == "DELETE":
+                if state.delete(calendar, parts[5]):
+                    return 204, {}, {}
+                return _google_error(410, "deleted", "Resource has been deleted")
+        return _google_error(404, "notFound", "Not Found")
+
+    @app.post("/token")
+    async def token(request: Request):
+        form = {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+        if not form.get("refresh_token"):
+            return JSONResponse(status_code=400, content={"error": "invalid_request"})
+        state.stats["tokens"] += 1
+        return {"access_token": f"emu-{form['refresh_token']}", "expires_in": 3600, "token_type": "Bearer",
+                "scope": "https://www.googleapis.com/auth/calendar"}
+
+    @app.post("/batch/calendar/v3")
+    async def batch(request: Request):
+        await state.delay()
+        state.stats["batches"] += 1
+        user = _user(request.headers)
+        raw = b"Content-Type: " + request.headers["content-type"].encode() + b"\r\n\r\n" + await request.body()
+        message = email.parser.BytesParser(policy=email.policy.compat32).parsebytes(raw)
+
+        boundary = uuid.uuid4().hex
+        out = []
+        for part in message.get_payload():
+            content_id = part["Content-ID"] or ""
+            status, body, headers = call(*_parse_http_part(part.get_payload()), user)
+            text = json.dumps(body) if status != 204 else ""
+            lines = [f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}", "Content-Type: application/json; charset=UTF-8"]
+            lines += [f"{k}: {v}" for k, v in headers.items()]
+            out.append("\r\n".join([
+                f"--{boundary}",
+                "Content-Type: application/http",
+                f"Content-ID: <response-{content_id.strip('<>')}>",
+                "",
+                "\r\n".join(lines),
+                "",
+                text,
+            ]))
+        out.append(f"--{boundary}--")
+        return Response("\r\n".join(out) + "\r\n", media_type=f"multipart/mixed; boundary={boundary}")
+
+    @app.api_route("/calendar/v3/{path:path}", methods=["GET", "POST", "DELETE"])
+    async def rest(path: str, request: Request):
+        await state.delay()
+        body = await request.json() if request.method == "POST" else None
+        status, data, headers = call(request.method, f"calendar/v3/{path}", dict(request.query_params), body,
+                                     _user(request.headers))
+        if status == 204:
+            return Response(status_code=204)
+        return reply(status, data, headers)
+
+    # -- emulator controls -------------------------------------------------
+
+    @app.get("/emulator/stats")
+    async def stats():
+        return dict(state.stats, calendars=len(state.calendars),
+                    events=sum(len(evs) for evs in state.calendars.values()), faults=state.faults.as_dict())
+
+    @app.post("/emulator/faults")
+    async def set_faults(request: Request):
+        for key, value in (await request.json()).items():
+            if hasattr(state.faults, key):
+                setattr(state.faults, key, value)
+        state.reset_buckets()
+        return state.faults.as_dict()
+
+    @app.post("/emulator/expire_sync_tokens")
+    async def expire_sync_tokens():
+        state.oldest_valid = state.current + 1
+        return {"oldest_valid": state.oldest_valid}
+
+    return app
+
+
+def _parse_http_part(payload: str) -> Tuple[str, str, Dict[str, str], Optional[dict]]:
+    """(method, path, query, json body) from one application/http batch part."""
+    head, _, body = payload.replace("\r\n", "\n").partition("\n\n")
+    request_line = head.split("\n", 1)[0]
+    method, target = request_line.split(" ")[:2]
+    url = urlsplit(target)
+    query = {k: v[0] for k, v in parse_qs(url.query).items()}
+    return method, url.path, query, json.loads(body) if body.strip() else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Google Calendar v3 emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered 503 backendError")
+    parser.add_argument("--user-qps", type=float, default=0.0, help="per-user limit (0 = none)")
+    parser.add_argument("--project-qps", type=float, default=0.0, help="overall limit (0 = none)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate, args.user_qps, args.project_qps)
+    uvicorn.run(emulator_app(faults, args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
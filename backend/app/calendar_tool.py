@@ -1,58 +1,394 @@
 # backend/app/calendar_tool.py
 
 import os
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import numpy as np
+from backend.app.availability import BusySource, from_epoch_min, to_epoch_min
+from backend.app.calendar_cache import record_created
+from backend.app.metrics import stage
+from backend.app.outbound import outbound_scheduler
 from backend.app.config import (
+    BATCH_FANOUT,
+    CALENDAR_POOL_SIZE,
+    DEFAULT_TIMEZONE,
     DEMO_MODE,
     DEMO_REFRESH_TOKEN,
     GOOGLE_CLIENT_ID,
-    GOOGLE_CLIENT_SECRET
+    GOOGLE_CLIENT_SECRET,
+    GOOGLE_API_ROOT,
+    GOOGLE_TOKEN_URI,
+    TOKEN_REFRESH_SKEW_S,
 )
 import logging
 
 logger = logging.getLogger("calendar")
 
 
-class GoogleCalendarTool:
-    def __init__(self, token_dict: dict):
-        logger.info("========================================")
-        logger.info("📌 DEBUG: GoogleCalendarTool Initialized")
-        logger.info("DEMO MODE = %s", DEMO_MODE)
-
-        if DEMO_MODE:
-            logger.info("⚡ DEMO MODE ACTIVE — Using server refresh token.")
-            token_dict = {
-                "refresh_token": DEMO_REFRESH_TOKEN,
-                "client_id": GOOGLE_CLIENT_ID,
-                "client_secret": GOOGLE_CLIENT_SECRET,
-                "token_uri": "https://oauth2.googleapis.com/token",
-            }
-
-        # Validate required fields
-        for k in ("refresh_token", "client_id", "client_secret"):
-            if not token_dict.get(k):
-                raise ValueError(f"Missing required OAuth field: {k}")
-
-        logger.info("✅ TOKEN DICT VALIDATED SUCCESSFULLY")
-
-        self.creds = Credentials.from_authorized_user_info(token_dict)
-        logger.info("🛠 Building Google Calendar service...")
-        self.service = build("calendar", "v3", credentials=self.creds)
-        logger.info("✅ Google Calendar service ready")
-
-    def create_event(self, summary, start, end):
-        event = {
-            "summary": summary,
-            "start": {"dateTime": start, "timeZone": "Asia/Kolkata"},
-            "end": {"dateTime": end, "timeZone": "Asia/Kolkata"},
+# freebusy.query accepts at most this many calendars per call
+FREEBUSY_MAX_ITEMS = 50
+# Calendar API limit on sub-requests in one batch HTTP request
+CALENDAR_BATCH_LIMIT = 50
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _parse_rfc3339(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+# The google client libraries take a noticeable share of cold start, so they
+# are imported on first use rather than with this module.
+
+_discovery_doc = None
+
+
+def discovery_doc_path() -> str:
+    """Discovery document shipped inside googleapiclient."""
+    import googleapiclient
+
+    return os.path.join(os.path.dirname(googleapiclient.__file__), "discovery_cache", "documents", "calendar.v3.json")
+
+
+def _discovery_document() -> dict:
+    # read and parsed once per process instead of on every build()
+    global _discovery_doc
+    if _discovery_doc is None:
+        with open(discovery_doc_path(), encoding="utf-8") as f:
+            doc = json.load(f)
+        # rootUrl drives both the REST base and the batch endpoint, so
+        # GOOGLE_API_ROOT can point everything at a local stand-in.
+        doc["rootUrl"] = GOOGLE_API_ROOT + "/"
+        _discovery_doc = doc
+    return _discovery_doc
+
+
+def http_status(exc: Exception) -> int:
+    return int(getattr(getattr(exc, "resp", None), "status", 0) or 0)
+
+
+def is_retryable(exc: Exception) -> bool:
+    status = http_status(exc)
+    if status in RETRYABLE_STATUSES:
+        return True
+    content = getattr(exc, "content", b"") or b""
+    return status == 403 and b"ratelimitexceeded" in content.lower()
+
+
+def token_key(token_dict: dict) -> str:
+    identity = "|".join(str(token_dict.get(k, "")) for k in ("refresh_token", "client_id", "client_secret", "token_uri"))
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+class CalendarClient:
+    """One authorized Calendar service, shared by every request for the same token."""
+
+    def __init__(self, token_dict: dict, pool: "CalendarClientPool"):
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build_from_document
+
+        self.pool = pool
+        with stage("confirm", "credential_load"):
+            # built directly: from_authorized_user_info ignores token_uri, and
+            # GOOGLE_TOKEN_URI may point at the local emulator
+            self.creds = Credentials(
+                token=token_dict.get("token"),
+                refresh_token=token_dict["refresh_token"],
+                token_uri=token_dict.get("token_uri") or GOOGLE_TOKEN_URI,
+                client_id=token_dict["client_id"],
+                client_secret=token_dict["client_secret"],
+            )
+        with stage("confirm", "service_build"):
+            self.service = build_from_document(_discovery_document(), credentials=self.creds)
+        self._refresh_lock = threading.Lock()
+        # httplib2 connections are not thread-safe, so each thread gets its own
+        self._local = threading.local()
+
+    def token_fresh(self) -> bool:
+        if not self.creds.token or self.creds.expiry is None:
+            return False
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return self.creds.expiry - now > timedelta(seconds=TOKEN_REFRESH_SKEW_S)
+
+    def ensure_token(self):
+        if self.token_fresh():
+            return
+        # Single flight: the first caller refreshes, the rest wait on the lock
+        # and then find a fresh token.
+        with self._refresh_lock:
+            if self.token_fresh():
+                return
+            from google.auth.transport.requests import Request
+
+            with stage("confirm", "token_refresh"):
+                self.creds.refresh(Request())
+            self.pool.record("refreshes")
+
+    def http(self):
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import google_auth_httplib2
+            from googleapiclient.http import build_http
+
+            http = google_auth_httplib2.AuthorizedHttp(self.creds, http=build_http())
+            self._local.http = http
+        return http
+
+    def execute(self, request):
+        self.ensure_token()
+        return request.execute(http=self.http())
+
+
+class CalendarClientPool:
+    """LRU of CalendarClient keyed by a hash of the token identity."""
+
+    def __init__(self, max_clients: int = CALENDAR_POOL_SIZE):
+        self.max_clients = max_clients
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "refreshes": 0, "evictions": 0}
+
+    def record(self, name: str, n: int = 1):
+        with self._lock:
+            self.metrics[name] += n
+
+    def cached(self, token_dict: dict) -> Optional[CalendarClient]:
+        """The pooled client for this token, or None; never builds one."""
+        key = token_key(token_dict)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.metrics["hits"] += 1
+            return client
+
+    def get(self, token_dict: dict) -> CalendarClient:
+        client = self.cached(token_dict)
+        if client is not None:
+            return client
+        key = token_key(token_dict)
+        with self._lock:
+            self.metrics["misses"] += 1
+
+        logger.debug("calendar_pool miss key=%s", key[:12])
+        client = CalendarClient(token_dict, self)
+
+        with self._lock:
+            # Another thread may have built the same client meanwhile; keep theirs.
+            client = self._clients.setdefault(key, client)
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self.metrics["evictions"] += 1
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.metrics, size=len(self._clients))
+
+
+_pool = CalendarClientPool()
+
+
+def client_pool() -> CalendarClientPool:
+    return _pool
+
+
+class OAuthConfigError(ValueError):
+    """The OAuth fields a calendar client needs are missing."""
+
+
+def resolve_token_dict(token_dict: dict) -> dict:
+    """Apply DEMO_MODE and check the OAuth fields every client needs."""
+    if DEMO_MODE:
+        token_dict = {
+            "refresh_token": DEMO_REFRESH_TOKEN,
+            "client_id": GOOGLE_CLIENT_ID,
+            "client_secret": GOOGLE_CLIENT_SECRET,
+            "token_uri": GOOGLE_TOKEN_URI,
         }
 
-        logger.info("📝 Creating Google Calendar Event: %s", event)
+    # Validate required fields
+    for k in ("refresh_token", "client_id", "client_secret"):
+        if not token_dict.get(k):
+            raise OAuthConfigError(f"Missing required OAuth field: {k}")
 
-        created = self.service.events().insert(
-            calendarId="primary",
-            body=event
-        ).execute()
+    return token_dict
+
+
+def build_event_body(summary, start, end, recurrence: Optional[str] = None, time_zone: Optional[str] = None) -> dict:
+    # The zone decides how a recurring event follows DST; it defaults to the organizer's
+    time_zone = time_zone or DEFAULT_TIMEZONE
+    body = {
+        "summary": summary,
+        "start": {"dateTime": start, "timeZone": time_zone},
+        "end": {"dateTime": end, "timeZone": time_zone},
+    }
+    if recurrence:
+        body["recurrence"] = [recurrence]
+    return body
+
+
+class GoogleCalendarTool(BusySource):
+    def __init__(self, token_dict: dict):
+        token_dict = resolve_token_dict(token_dict)
+        self.user_key = token_key(token_dict)
+        self.client = _pool.get(token_dict)
+        self.creds = self.client.creds
+        self.service = self.client.service
+        logger.debug("calendar_tool ready demo_mode=%s", DEMO_MODE)
+
+    def create_event(self, summary, start, end, recurrence: Optional[str] = None, time_zone: Optional[str] = None):
+        event = build_event_body(summary, start, end, recurrence, time_zone)
+
+        logger.debug("create_event summary=%r start=%s end=%s", summary, start, end)
+
+        # paced and retried on rateLimitExceeded/429 with the async writes' buckets
+        with stage("confirm", "insert"):
+            created = outbound_scheduler().call_blocking(self.user_key, lambda: self.client.execute(
+                self.service.events().insert(calendarId="primary", body=event)
+            ))
+        record_created(created)
 
         return created
+
+    def create_events(self, events, max_attempts: int = 3, backoff_s: float = 0.5,
+                      cancel: Optional[threading.Event] = None) -> dict:
+        """Insert many events with batch HTTP requests.
+
+        Events are grouped per calendar ("calendar_id", default "primary")
+        into batches of CALENDAR_BATCH_LIMIT, and batches run in parallel.
+        Only sub-requests that failed with a retryable status, or whose
+        batch never got an answer, are resent.
+        Returns one result per input event, in input order, plus the number
+        of HTTP round-trips made.
+
+        Setting `cancel` stops the work between sub-batches: events not sent
+        yet come back with status "cancelled". A sub-batch already on the
+        wire still completes.
+
+        Every insert carries an event id: the event's "event_id" if it has
+        one (Google wants 5-1024 characters of a-v and 0-9), else one made
+        up for this call. A sub-batch resent after a timeout may already
+        have gone through; its events then come back 409, which counts as
+        created, instead of being created twice.
+        """
+        cancel = cancel or threading.Event()
+        results = [None] * len(events)
+        call = uuid.uuid4().hex
+        ids = [ev.get("event_id") or hashlib.sha1(f"{call}:{i}".encode()).hexdigest() for i, ev in enumerate(events)]
+        by_calendar = {}
+        for i, ev in enumerate(events):
+            by_calendar.setdefault(ev.get("calendar_id") or "primary", []).append(i)
+
+        jobs = [
+            (calendar_id, idxs[j:j + CALENDAR_BATCH_LIMIT])
+            for calendar_id, idxs in by_calendar.items()
+            for j in range(0, len(idxs), CALENDAR_BATCH_LIMIT)
+        ]
+        if not jobs:
+            return {"results": [], "round_trips": 0}
+
+        logger.debug("create_events events=%d batches=%d", len(events), len(jobs))
+
+        with ThreadPoolExecutor(max_workers=min(BATCH_FANOUT, len(jobs))) as pool:
+            round_trips = sum(pool.map(
+                lambda job: self._run_batch(job[0], job[1], events, ids, results, max_attempts, backoff_s, cancel),
+                jobs,
+            ))
+        return {"results": results, "round_trips": round_trips}
+
+    def _run_batch(self, calendar_id, idxs, events, ids, results, max_attempts, backoff_s, cancel) -> int:
+        from googleapiclient.errors import HttpError
+
+        pending = list(idxs)
+        round_trips = 0
+
+        for attempt in range(max_attempts):
+            if not pending:
+                break
+            if attempt:
+                cancel.wait(backoff_s * 2 ** (attempt - 1))
+            if cancel.is_set():
+                for i in pending:
+                    results[i] = {"index": i, "status": "cancelled", "message": "Not sent: the request was cancelled"}
+                break
+
+            retry = []
+
+            def callback(request_id, response, exception):
+                i = int(request_id)
+                if exception is None:
+                    results[i] = {"index": i, "status": "ok", "created": response}
+                    record_created(response, calendar_id)
+                    return
+                if http_status(exception) == 409:
+                    # the id is taken: an earlier send of this event went through
+                    results[i] = {"index": i, "status": "ok", "existing": True,
+                                  "created": dict(bodies[i], id=ids[i], status="confirmed")}
+                    return
+                results[i] = {"index": i, "status": "error", "http_status": http_status(exception),
+                              "message": str(exception)}
+                if is_retryable(exception):
+                    retry.append(i)
+
+            batch = self.service.new_batch_http_request(callback=callback)
+            bodies = {}
+            for i in pending:
+                ev = events[i]
+                bodies[i] = dict(build_event_body(ev["summary"], ev["start"], ev["end"], ev.get("recurrence"),
+                                                  ev.get("time_zone")), id=ids[i])
+                batch.add(self.service.events().insert(calendarId=calendar_id, body=bodies[i]), request_id=str(i))
+
+            round_trips += 1
+            try:
+                self.client.ensure_token()
+                batch.execute(http=self.client.http())
+            except HttpError as exc:
+                # the whole batch was rejected (e.g. throttled)
+                for i in pending:
+                    results[i] = {"index": i, "status": "error", "http_status": http_status(exc), "message": str(exc)}
+                retry = pending if is_retryable(exc) else []
+            except Exception as exc:
+                # transport error or timeout: no part has an answer, so fail
+                # them one by one and send them again like a throttled batch
+                logger.warning("create_events batch failed calendar=%s: %r", calendar_id, exc)
+                for i in pending:
+                    results[i] = {"index": i, "status": "error", "http_status": 0,
+                                  "message": f"{type(exc).__name__}: {exc}"}
+                retry = pending
+            pending = retry
+
+        return round_trips
+
+    def busy_intervals(self, emails, start_min, end_min):
+        time_min = from_epoch_min(start_min, timezone.utc).isoformat()
+        time_max = from_epoch_min(end_min, timezone.utc).isoformat()
+
+        out = {}
+        for i in range(0, len(emails), FREEBUSY_MAX_ITEMS):
+            chunk = emails[i:i + FREEBUSY_MAX_ITEMS]
+            resp = self.client.execute(self.service.freebusy().query(body={
+                "timeMin": time_min,
+                "timeMax": time_max,
+                "items": [{"id": e} for e in chunk],
+            }))
+
+            calendars = resp.get("calendars", {})
+            for email in chunk:
+                busy = calendars.get(email, {}).get("busy", [])
+                out[email] = np.array(
+                    [(to_epoch_min(_parse_rfc3339(b["start"])), to_epoch_min(_parse_rfc3339(b["end"]))) for b in busy],
+                    dtype=np.int64,
+                ).reshape(-1, 2)
+        return out
@@ -1,36 +1,150 @@
 # backend/app/chroma_memory.py
-import chromadb
-from typing import Optional
-try:
-    from langchain_openai import OpenAIEmbeddings
-except Exception:
-    OpenAIEmbeddings = None
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.app.config import CHROMA_PATH, EMBED_BATCH_SIZE, EMBED_CACHE_SIZE
+
+logger = logging.getLogger("memory")
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def memory_id(user_id: str, text: str) -> str:
+    # Same user + same text -> same record, so re-adding is an upsert
+    return hashlib.sha256(f"{user_id}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+class LocalHashEmbedder:
+    """Signed feature hashing of word unigrams and bigrams; no network, no model files."""
+
+    name = "local"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        words = TOKEN_RE.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vec = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vec
+        digests = np.array(
+            [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "little") for f in features],
+            dtype=np.uint64,
+        )
+        idx = (digests % np.uint64(self.dim)).astype(np.intp)
+        signs = np.where((digests >> np.uint64(63)) == 1, -1.0, 1.0).astype(np.float32)
+        np.add.at(vec, idx, signs)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t).tolist() for t in texts]
+
 
 class MemoryStore:
-    def __init__(self):
-        self.client = chromadb.Client()
-        self.collection = self.client.get_or_create_collection("memory")
-        self.embedder = None
+    def __init__(self, path: str = CHROMA_PATH, embedder=None):
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=path)
+        self.embedder = embedder
+        self._collection = None
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.metrics = {"embedded": 0, "cache_hits": 0, "batches": 0}
 
     def _ensure_embedder(self):
         if self.embedder is None:
-            if OpenAIEmbeddings is None:
-                raise RuntimeError("OpenAIEmbeddings not available (ok for demo).")
-            self.embedder = OpenAIEmbeddings()
+            try:
+                from langchain_openai import OpenAIEmbeddings
 
-    def add_memory(self, user_id: str, text: str):
-        try:
-            self._ensure_embedder()
-            emb = self.embedder.embed_documents([text])[0]
-            self.collection.add(ids=[f"{user_id}_{len(text)}"], documents=[text], embeddings=[emb], metadatas=[{"user_id": user_id}])
-        except Exception:
-            self.collection.add(ids=[f"{user_id}_{len(text)}_noembed"], documents=[text], metadatas=[{"user_id": user_id, "note": "no-embed"}])
+                self.embedder = OpenAIEmbeddings()
+            except Exception:
+                self.embedder = None
+            if self.embedder is None:
+                self.embedder = LocalHashEmbedder()
+        return self.embedder
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            # Vectors from different embedders have different sizes, so each
+            # embedder gets its own collection.
+            name = getattr(self._ensure_embedder(), "name", None) or type(self.embedder).__name__.lower()
+            self._collection = self.client.get_or_create_collection(
+                "memory" if name == "openaiembeddings" else f"memory_{name}",
+                metadata={"hnsw:space": "cosine"},
+            )
+        return self._collection
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches, computing each distinct text at most once."""
+        self._ensure_embedder()
+        keys = [content_hash(t) for t in texts]
 
-    def query_memory(self, user_id: str, query: str):
+        found: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        with self._cache_lock:
+            for key, text in zip(keys, texts):
+                vec = self._cache.get(key)
+                if vec is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = vec
+                    self.metrics["cache_hits"] += 1
+                else:
+                    missing.setdefault(key, text)
+
+        pending = list(missing.items())
+        for i in range(0, len(pending), EMBED_BATCH_SIZE):
+            chunk = pending[i:i + EMBED_BATCH_SIZE]
+            vectors = self.embedder.embed_documents([text for _, text in chunk])
+            with self._cache_lock:
+                self.metrics["batches"] += 1
+                self.metrics["embedded"] += len(chunk)
+                for (key, _), vec in zip(chunk, vectors):
+                    found[key] = vec
+                    self._cache[key] = vec
+                while len(self._cache) > EMBED_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+
+        return [found[key] for key in keys]
+
+    def add_memories(self, user_id: str, texts: List[str]) -> List[str]:
+        texts = list(dict.fromkeys(texts))
+        if not texts:
+            return []
+        ids = [memory_id(user_id, t) for t in texts]
+        embeddings = self.embed(texts)
+        for i in range(0, len(texts), EMBED_BATCH_SIZE):
+            self.collection.upsert(
+                ids=ids[i:i + EMBED_BATCH_SIZE],
+                documents=texts[i:i + EMBED_BATCH_SIZE],
+                embeddings=embeddings[i:i + EMBED_BATCH_SIZE],
+                metadatas=[{"user_id": user_id}] * len(ids[i:i + EMBED_BATCH_SIZE]),
+            )
+        return ids
+
+    def add_memory(self, user_id: str, text: str) -> Optional[str]:
+        """Store one memory and return its id, or None if it could not be embedded or stored.
+
+        Memories are best effort: a failing embedder is logged, never raised.
+        """
         try:
-            self._ensure_embedder()
-            emb = self.embedder.embed_documents([query])[0]
-            res = self.collection.query(query_embeddings=[emb], n_results=3)
-            return res
+            return self.add_memories(user_id, [text])[0]
         except Exception:
-            return self.collection.query(query_texts=[query], n_results=3)
+            logger.warning("add_memory failed user=%s", user_id, exc_info=True)
+            return None
+
+    def query_memory(self, user_id: str, query: str, n_results: int = 3):
+        emb = self.embed([query])[0]
+        return self.collection.query(query_embeddings=[emb], n_results=n_results, where={"user_id": user_id})
@@ -0,0 +1,61 @@
+# backend/app/concurrency.py
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Dict, Optional
+
+from backend.app.config import PARSE_WORKERS, REQUEST_DEADLINE_S, UPSTREAM_LIMITS
+
+# CPU-bound work (date parsing, slot search) runs here rather than on
+# Starlette's shared threadpool, so a burst of one endpoint cannot starve
+# the other.
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+
+# One semaphore per upstream API caps how many calls are in flight at once.
+_upstream_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def cpu_executor() -> ThreadPoolExecutor:
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+    return _cpu_executor
+
+
+async def run_cpu(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # run_in_executor does not carry contextvars over (the request trace lives there)
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(cpu_executor(), partial(ctx.run, fn, *args, **kwargs))
+
+
+@asynccontextmanager
+async def upstream_limit(name: str):
+    sem = _upstream_semaphores.get(name)
+    if sem is None:
+        sem = _upstream_semaphores.setdefault(name, asyncio.Semaphore(UPSTREAM_LIMITS.get(name, 16)))
+    async with sem:
+        yield
+
+
+def request_deadline(header_value: Optional[str]) -> float:
+    """Deadline in seconds for one request; a client may only shorten it."""
+    try:
+        asked = float(header_value) if header_value else REQUEST_DEADLINE_S
+    except ValueError:
+        asked = REQUEST_DEADLINE_S
+    return max(0.001, min(asked, REQUEST_DEADLINE_S))
+
+
+async def with_deadline(coro, seconds: float):
+    return await asyncio.wait_for(coro, timeout=seconds)
+
+
+def shutdown():
+    global _cpu_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False)
+        _cpu_executor = None
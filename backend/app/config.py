@@ -10,3 +10,109 @@ DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
 DEMO_REFRESH_TOKEN = os.getenv("DEMO_REFRESH_TOKEN")
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+GOOGLE_TOKEN_URI = os.getenv("GOOGLE_TOKEN_URI", "https://oauth2.googleapis.com/token")
+
+# Slot search
+BUSY_SOURCE = os.getenv("BUSY_SOURCE", "memory").lower()  # "memory" (imported, kept in SQLite), "google" (cached) or "freebusy"
+SEARCH_HORIZON_DAYS = int(os.getenv("SEARCH_HORIZON_DAYS", "30"))
+SLOT_STEP_MIN = int(os.getenv("SLOT_STEP_MIN", "30"))
+SEARCH_FIRST_CHUNK_DAYS = int(os.getenv("SEARCH_FIRST_CHUNK_DAYS", "1"))  # the horizon is searched in growing chunks
+
+# Slot ranking
+RANK_WINDOW_DAYS = int(os.getenv("RANK_WINDOW_DAYS", "7"))  # 0 = first free slots in order, no ranking
+RANK_STEP_MIN = int(os.getenv("RANK_STEP_MIN", "15"))
+RANK_WEIGHTS = os.getenv("RANK_WEIGHTS", "earliness=1,time_of_day=1,buffer=0.5,attendee_hours=0.5")
+RANK_PREFERRED_HOURS = os.getenv("RANK_PREFERRED_HOURS", "10:00-16:00")
+RANK_TIME_OF_DAY_WIDTH_MIN = float(os.getenv("RANK_TIME_OF_DAY_WIDTH_MIN", "120"))
+RANK_BUFFER_MIN = int(os.getenv("RANK_BUFFER_MIN", "30"))
+RANK_SAME_DAY_PENALTY = float(os.getenv("RANK_SAME_DAY_PENALTY", "0.1"))
+RANK_POOL_FACTOR = int(os.getenv("RANK_POOL_FACTOR", "8"))
+
+# Time zones and working hours
+DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "Asia/Kolkata")
+DEFAULT_WORKING_HOURS = os.getenv("DEFAULT_WORKING_HOURS", "")  # e.g. "09:00-18:00"; empty = attendees without a profile are unconstrained
+WORKING_DAYS = os.getenv("WORKING_DAYS", "0-4")  # Monday == 0
+PROFILE_CACHE_TTL_S = float(os.getenv("PROFILE_CACHE_TTL_S", "300"))
+
+# Recurring meetings
+RECURRENCE_HORIZON_DAYS = int(os.getenv("RECURRENCE_HORIZON_DAYS", "365"))
+RECURRENCE_MAX_CONFLICTS = int(os.getenv("RECURRENCE_MAX_CONFLICTS", "2"))
+RECURRENCE_MAX_CONFLICT_RATE = float(os.getenv("RECURRENCE_MAX_CONFLICT_RATE", "0.2"))
+RECURRENCE_CANDIDATE_HOURS = int(os.getenv("RECURRENCE_CANDIDATE_HOURS", "8"))
+
+# Date parsing
+DATE_LANGUAGES = [l.strip() for l in os.getenv("DATE_LANGUAGES", "en").split(",") if l.strip()]
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "4096"))
+
+# Google Calendar client pool
+CALENDAR_POOL_SIZE = int(os.getenv("CALENDAR_POOL_SIZE", "32"))
+TOKEN_REFRESH_SKEW_S = int(os.getenv("TOKEN_REFRESH_SKEW_S", "300"))
+BATCH_FANOUT = int(os.getenv("BATCH_FANOUT", "4"))
+
+# Async request pipeline
+CALENDAR_BACKEND = os.getenv("CALENDAR_BACKEND", "google").lower()  # "google" or "fake"
+GOOGLE_API_ROOT = os.getenv("GOOGLE_API_ROOT", "https://www.googleapis.com").rstrip("/")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "4"))
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "20"))
+UPSTREAM_LIMITS = {
+    "google_calendar": int(os.getenv("GOOGLE_MAX_INFLIGHT", "64")),
+}
+
+# Outbound calendar writes (token buckets, priority queue, adaptive backoff)
+OUTBOUND_PROJECT_QPS = float(os.getenv("OUTBOUND_PROJECT_QPS", "50"))
+OUTBOUND_USER_QPS = float(os.getenv("OUTBOUND_USER_QPS", "10"))
+OUTBOUND_BURST_S = float(os.getenv("OUTBOUND_BURST_S", "1"))  # a bucket holds this many seconds of its rate
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", "16"))
+OUTBOUND_MAX_ATTEMPTS = int(os.getenv("OUTBOUND_MAX_ATTEMPTS", "5"))
+OUTBOUND_MAX_QUEUE = int(os.getenv("OUTBOUND_MAX_QUEUE", "10000"))
+OUTBOUND_BACKOFF_S = float(os.getenv("OUTBOUND_BACKOFF_S", "0.5"))
+OUTBOUND_MAX_BACKOFF_S = float(os.getenv("OUTBOUND_MAX_BACKOFF_S", "32"))
+
+# Busy-interval cache
+BUSY_CACHE_TTL_S = float(os.getenv("BUSY_CACHE_TTL_S", "60"))
+BUSY_CACHE_MAX_CALENDARS = int(os.getenv("BUSY_CACHE_MAX_CALENDARS", "1000"))
+BUSY_CACHE_LOOKBACK_DAYS = int(os.getenv("BUSY_CACHE_LOOKBACK_DAYS", "1"))
+
+# Vector memory
+CHROMA_PATH = os.getenv("CHROMA_PATH", ".chroma")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "10000"))
+
+# Observability
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+
+# Bulk propose
+PROPOSE_PROCESSES = int(os.getenv("PROPOSE_PROCESSES", "0"))  # 0 = one per CPU
+PROPOSE_BATCH_CHUNK = int(os.getenv("PROPOSE_BATCH_CHUNK", "16"))
+
+# Joint batch scheduling
+BATCH_SLOT_MIN = int(os.getenv("BATCH_SLOT_MIN", "15"))
+BATCH_WINDOW_DAYS = float(os.getenv("BATCH_WINDOW_DAYS", "5"))
+BATCH_TIME_BUDGET_S = float(os.getenv("BATCH_TIME_BUDGET_S", "5"))
+BATCH_RESTART_PATIENCE = int(os.getenv("BATCH_RESTART_PATIENCE", "20"))  # restarts without improvement before giving up
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0"))  # 0 = one per CPU
+BATCH_PARALLEL_MIN = int(os.getenv("BATCH_PARALLEL_MIN", "100"))  # fewer meetings than this solve in-process
+
+# Calendar files (ICS)
+ICS_READ_CHUNK_KB = int(os.getenv("ICS_READ_CHUNK_KB", "256"))
+ICS_EXPORT_CHUNK_EVENTS = int(os.getenv("ICS_EXPORT_CHUNK_EVENTS", "200"))
+
+# Cache shared by the workers on a host (mmap'd file)
+SHARED_CACHE = os.getenv("SHARED_CACHE", "true").lower() == "true"
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR", "")  # empty = /dev/shm, else the temp dir; one file per layout and code version
+SHARED_PARSE_ENTRIES = int(os.getenv("SHARED_PARSE_ENTRIES", "16384"))
+SHARED_PARSE_TTL_S = float(os.getenv("SHARED_PARSE_TTL_S", "3600"))
+SHARED_BUSY_CALENDARS = int(os.getenv("SHARED_BUSY_CALENDARS", "1024"))
+SHARED_BUSY_DAYS = int(os.getenv("SHARED_BUSY_DAYS", "45"))  # minute bitmap per calendar, from BUSY_CACHE_LOOKBACK_DAYS back
+
+# Start-up
+WARMUP = os.getenv("WARMUP", "true").lower() == "true"
+
+# Idempotent confirms
+IDEMPOTENCY_TTL_S = float(os.getenv("IDEMPOTENCY_TTL_S", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+# Persistence
+DB_PATH = os.getenv("DB_PATH", "meetings.db")
+DB_WRITE_BATCH = int(os.getenv("DB_WRITE_BATCH", "500"))
+DB_FLUSH_INTERVAL_MS = float(os.getenv("DB_FLUSH_INTERVAL_MS", "5"))
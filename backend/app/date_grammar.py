@@ -0,0 +1,307 @@
+# backend/app/date_grammar.py
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from backend.app.config import DATE_LANGUAGES, PARSE_CACHE_SIZE, SHARED_PARSE_TTL_S
+from backend.app.shared_cache import get_shared_cache
+
+# Fast path for the phrasings people actually type ("tomorrow 3pm", "next
+# Monday at 10", "in 2 days"). Anything it does not fully understand goes to
+# dateparser, pinned to DATE_LANGUAGES so it skips language detection.
+
+DEFAULT_HOUR = 10
+
+DATEPARSER_SETTINGS = {"PREFER_DATES_FROM": "future", "RETURN_AS_TIMEZONE_AWARE": True}
+# dateparser is asked twice, from now and from now + this, to tell absolute
+# dates from ones relative to the clock before its answer is cached
+RELATIVE_PROBE = timedelta(minutes=7)
+
+EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+SPACE_RE = re.compile(r"\s+")
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tues": 1, "tue": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thurs": 3, "thur": 3, "thu": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}
+DAY_WORDS = {"today": 0, "tonight": 0, "tomorrow": 1, "tmrw": 1, "tmr": 1, "day after tomorrow": 2}
+PART_OF_DAY = {"morning": (9, 0), "noon": (12, 0), "midday": (12, 0), "afternoon": (14, 0),
+               "evening": (17, 0), "tonight": (19, 0), "midnight": (0, 0)}
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5}
+UNIT_MINUTES = {"minute": 1, "min": 1, "hour": 60, "hr": 60, "day": 1440, "week": 10080}
+
+DAY_RE = re.compile(r"\b(day after tomorrow|tomorrow|tmrw|tmr|today|tonight)\b")
+WEEKDAY_RE = re.compile(r"\b(?:(next|this|coming|on)\s+)?(" + "|".join(sorted(WEEKDAYS, key=len, reverse=True)) + r")\b")
+DELTA_RE = re.compile(r"\bin\s+(\d+|a|an|one|two|three|four|five)\s+(minute|min|hour|hr|day|week)s?\b")
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+TIME_RE = re.compile(
+    r"\b(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)"
+    r"|\b(?:at\s+)?([01]?\d|2[0-3]):([0-5]\d)\b"
+    r"|\bat\s+(\d{1,2})\b(?!\s*(?:-|min|hour|hr|day|week|%))"
+    r"|\b(?:in the\s+|at\s+)?(morning|noon|midday|afternoon|evening|midnight)\b"
+)
+# Temporal words the grammar does not handle; if any survive after the
+# recognised spans are removed, dateparser gets the prompt instead.
+UNSUPPORTED_RE = re.compile(
+    r"\b(jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|sep(t(ember)?)?|oct(ober)?"
+    r"|nov(ember)?|dec(ember)?|week|weekend|month|year|yesterday|ago|tonight|tomorrow|today)\b"
+    r"|\b\d{1,2}/\d{1,2}\b|\b\d{1,2}(st|nd|rd|th)\b"
+)
+
+# spec: (kind, value, time) where time is (hour, minute) or None
+Spec = Tuple[Optional[str], object, Optional[Tuple[int, int]]]
+
+
+def normalize(text: str) -> str:
+    return SPACE_RE.sub(" ", EMAIL_RE.sub(" ", text.lower())).strip()
+
+
+def _match_time(text: str):
+    m = TIME_RE.search(text)
+    if not m:
+        return None, None
+    hour_ampm, min_ampm, ampm, hour_24, min_24, bare, part = m.groups()
+    if part:
+        return PART_OF_DAY[part], m.span()
+    if hour_ampm:
+        hour, minute = int(hour_ampm), int(min_ampm or 0)
+        if hour > 12 or minute > 59:
+            return None, None
+        hour = hour % 12 + (12 if ampm.startswith("p") else 0)
+        return (hour, minute), m.span()
+    if hour_24:
+        return (int(hour_24), int(min_24)), m.span()
+    hour = int(bare)
+    if hour > 23:
+        return None, None
+    # "at 3" in a meeting request means the afternoon, not 3 AM
+    if 1 <= hour <= 7:
+        hour += 12
+    return (hour, 0), m.span()
+
+
+def compile_phrase(text: str) -> Optional[Spec]:
+    """Turn a normalized prompt into a date spec, or None if the grammar cannot."""
+    spans = []
+    kind, value = None, None
+
+    m = DELTA_RE.search(text)
+    if m:
+        count = NUMBER_WORDS.get(m.group(1)) or int(m.group(1))
+        minutes = count * UNIT_MINUTES[m.group(2)]
+        kind, value = ("days", minutes // 1440) if minutes >= 1440 else ("delta", minutes)
+        spans.append(m.span())
+
+    if kind is None:
+        for regex, build in (
+            (DAY_RE, lambda m: ("days", DAY_WORDS[m.group(1)])),
+            (WEEKDAY_RE, lambda m: ("weekday", WEEKDAYS[m.group(2)])),
+            (ISO_DATE_RE, lambda m: ("date", (int(m.group(1)), int(m.group(2)), int(m.group(3))))),
+        ):
+            m = regex.search(text)
+            if m:
+                kind, value = build(m)
+                spans.append(m.span())
+                break
+
+    if kind == "date":
+        try:
+            date(*value)
+        except ValueError:
+            return None  # "2026-02-30": not a day, dateparser decides what it means
+
+    time, span = _match_time(text)
+    if time is None and kind == "days" and "tonight" in text:
+        time = PART_OF_DAY["tonight"]
+    if span:
+        spans.append(span)
+
+    if kind is None and time is None:
+        return None
+
+    rest = text
+    for start, end in sorted(spans, reverse=True):
+        rest = rest[:start] + " " + rest[end:]
+    if UNSUPPORTED_RE.search(rest):
+        return None
+
+    return kind, value, time
+
+
+def resolve(spec: Spec, now: datetime) -> datetime:
+    kind, value, time = spec
+    if kind == "delta":
+        return now + timedelta(minutes=value)
+
+    hour, minute = time if time else (DEFAULT_HOUR, 0)
+    today = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    if kind == "days":
+        if value == 0 and time is None:
+            return now
+        return today + timedelta(days=value)
+    if kind == "weekday":
+        ahead = (value - now.weekday()) % 7 or 7
+        return today + timedelta(days=ahead)
+    if kind == "date":
+        year, month, day = value
+        return today.replace(year=year, month=month, day=day)
+
+    # time only: the next time the clock reads it
+    return today if today > now else today + timedelta(days=1)
+
+
+class DateParseCache:
+    """Bounded LRU keyed on (normalized phrase, reference date).
+
+    This process's copy; the shared cache behind it holds what every
+    worker on the host has parsed."""
+
+    def __init__(self, maxsize: int = PARSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cache_hits = 0
+        self.shared_hits = 0
+        self.fast_path = 0
+        self.fallback = 0
+
+    def get(self, key):
+        with self._lock:
+            self.calls += 1
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.cache_hits += 1
+            return entry
+
+    def count(self, outcome: str):
+        """outcome: "shared_hits", "fast_path" or "fallback"."""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def put(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.calls = self.cache_hits = self.shared_hits = self.fast_path = self.fallback = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.calls or 1
+            return {
+                "calls": self.calls,
+                "size": len(self._data),
+                "cache_hits": self.cache_hits,
+                "shared_hits": self.shared_hits,
+                "fast_path": self.fast_path,
+                "fallback": self.fallback,
+                "cache_hit_rate": self.cache_hits / calls,
+                "shared_hit_rate": self.shared_hits / calls,
+                "fast_path_rate": self.fast_path / calls,
+                "fallback_rate": self.fallback / calls,
+            }
+
+
+_cache = DateParseCache()
+
+
+def parse_stats() -> dict:
+    return _cache.stats()
+
+
+def _encode(entry) -> bytes:
+    kind, value = entry
+    if kind == "spec":
+        return json.dumps(["spec", *value], separators=(",", ":")).encode()
+    return json.dumps(["abs", value.isoformat() if value else None]).encode()
+
+
+def _decode(data: bytes):
+    item = json.loads(data)
+    if item[0] == "spec":
+        _, kind, value, time = item
+        return "spec", (kind, tuple(value) if isinstance(value, list) else value, tuple(time) if time else None)
+    return "abs", datetime.fromisoformat(item[1]) if item[1] else None
+
+
+def _search(text: str, base: datetime, tz_name: Optional[str]) -> Optional[datetime]:
+    # dateparser costs ~0.5s to import; only load it when the grammar gives up
+    from dateparser.search import search_dates
+
+    settings = dict(DATEPARSER_SETTINGS, RELATIVE_BASE=base.replace(tzinfo=None))
+    if tz_name:
+        settings["TIMEZONE"] = tz_name
+    result = search_dates(text, languages=DATE_LANGUAGES, settings=settings)
+    return result[0][1] if result else None
+
+
+def _fallback(text: str, now: datetime, tz_name: Optional[str]):
+    """dateparser's reading of text as a cache entry, or ("now", value) if it cannot be cached.
+
+    "Dec 5 at 1pm" reads the same from a later base and is cached as is;
+    "in 90 minutes" moves with the base and is cached as an offset from
+    now. Anything else that depends on the clock is not cached at all.
+    """
+    found = _search(text, now, tz_name)
+    if found is None:
+        return "abs", None
+    later = _search(text, now + RELATIVE_PROBE, tz_name)
+    if later == found:
+        return "abs", found
+    if later is not None and later - found == RELATIVE_PROBE:
+        return "spec", ("delta", (found - now).total_seconds() / 60, None)
+    return "now", found
+
+
+def parse_when(text: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    now = now or datetime.now().astimezone()
+    phrase = normalize(text)
+    tz_name = getattr(now.tzinfo, "key", None)
+    key = (phrase, now.date(), tz_name)
+
+    entry = _cache.get(key)
+    if entry is None:
+        # another worker on the host may have parsed it already
+        shared = get_shared_cache()
+        # workers may run with other DATE_LANGUAGES; a TTL bounds how long
+        # a record outlives whatever wrote it
+        shared_key = f"{phrase}\x1f{now.date()}\x1f{tz_name}\x1f{','.join(DATE_LANGUAGES)}"
+        data = shared.get("parse", shared_key, max_age_s=SHARED_PARSE_TTL_S) if shared is not None else None
+        if data is not None:
+            entry = _decode(data)
+            _cache.count("shared_hits")
+        else:
+            spec = compile_phrase(phrase)
+            if spec is not None:
+                entry = ("spec", spec)
+                _cache.count("fast_path")
+            else:
+                entry = _fallback(text, now, tz_name)
+                _cache.count("fallback")
+                if entry[0] == "now":
+                    return entry[1]
+            if shared is not None:
+                shared.put("parse", shared_key, _encode(entry))
+        _cache.put(key, entry)
+
+    kind, value = entry
+    if kind == "spec":
+        return resolve(value, now)
+    return value
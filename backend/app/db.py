@@ -1,13 +1,440 @@
 # backend/app/db.py
-# Demo mode: simple stubs so backend never crashes even without Supabase
+# Embedded SQLite store (WAL) for users, proposals and confirmed meetings.
+# Writes are queued and committed by one background thread in batches, so
+# request handlers never wait on fsync; reads use per-thread connections.
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import IO, Dict, Iterable, List, Optional
+
+from backend.app.availability import InMemoryBusySource
+from backend.app.config import DB_FLUSH_INTERVAL_MS, DB_PATH, DB_WRITE_BATCH
+
+logger = logging.getLogger("meeting_agent")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email       TEXT PRIMARY KEY,
+    name        TEXT,
+    data        TEXT,
+    created_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS proposals (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    prompt       TEXT NOT NULL,
+    summary      TEXT,
+    emails       TEXT,
+    slots        TEXT,
+    created_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meetings (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id     TEXT,
+    summary      TEXT,
+    start_ts     INTEGER NOT NULL,
+    end_ts       INTEGER NOT NULL,
+    start_iso    TEXT,
+    end_iso      TEXT,
+    calendar_id  TEXT,
+    data         TEXT,
+    created_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meeting_attendees (
+    meeting_id  INTEGER NOT NULL REFERENCES meetings(id),
+    email       TEXT NOT NULL,
+    start_ts    INTEGER NOT NULL,
+    end_ts      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS busy (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    email       TEXT NOT NULL,
+    start_min   INTEGER NOT NULL,
+    end_min     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_meetings_start ON meetings(start_ts);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_meetings_event ON meetings(event_id) WHERE event_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_attendees_email_start ON meeting_attendees(email, start_ts);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_busy_email_span ON busy(email, start_min, end_min);
+"""
+
+TABLES = ("users", "proposals", "meetings", "meeting_attendees", "busy")
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _epoch(iso: str) -> int:
+    return int(datetime.fromisoformat(iso.replace("Z", "+00:00")).timestamp())
+
+
+def _write_user(conn, user: dict):
+    conn.execute(
+        "INSERT INTO users(email, name, data, created_at) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(email) DO UPDATE SET name=excluded.name, data=excluded.data",
+        (user["email"].lower(), user.get("name"), json.dumps(user), time.time()),
+    )
+
+
+def _write_proposal(conn, proposal: dict):
+    conn.execute(
+        "INSERT INTO proposals(prompt, summary, emails, slots, created_at) VALUES (?, ?, ?, ?, ?)",
+        (proposal.get("prompt", ""), proposal.get("summary"), json.dumps(proposal.get("emails", [])),
+         json.dumps(proposal.get("slots", [])), time.time()),
+    )
+
+
+def _write_meeting(conn, meeting: dict):
+    start_ts, end_ts = _epoch(meeting["start"]), _epoch(meeting["end"])
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO meetings(event_id, summary, start_ts, end_ts, start_iso, end_iso, calendar_id, data, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (meeting.get("event_id"), meeting.get("summary"), start_ts, end_ts, meeting["start"], meeting["end"],
+         meeting.get("calendar_id", "primary"), json.dumps(meeting), time.time()),
+    )
+    if cur.rowcount:
+        conn.executemany(
+            "INSERT INTO meeting_attendees(meeting_id, email, start_ts, end_ts) VALUES (?, ?, ?, ?)",
+            [(cur.lastrowid, e.lower(), start_ts, end_ts) for e in meeting.get("attendees", [])],
+        )
+
+
+def _write_busy(conn, busy: dict):
+    # re-importing the same file adds nothing
+    conn.executemany(
+        "INSERT OR IGNORE INTO busy(email, start_min, end_min) VALUES (?, ?, ?)",
+        [(busy["email"], start, end) for start, end in busy["intervals"]],
+    )
+
+
+# A clear is a marker row (email, -1, -1), email "*" for everyone: readers
+# that have not seen it drop what they hold, and rows before it are gone.
+CLEARED = -1
+EVERYONE = "*"
+
+
+def _write_busy_clear(conn, clear: dict):
+    email = clear["email"]
+    if email == EVERYONE:
+        conn.execute("DELETE FROM busy")
+    else:
+        conn.execute("DELETE FROM busy WHERE email = ?", (email,))
+    conn.execute("INSERT INTO busy(email, start_min, end_min) VALUES (?, ?, ?)", (email, CLEARED, CLEARED))
+
+
+WRITERS = {"user": _write_user, "proposal": _write_proposal, "meeting": _write_meeting, "busy": _write_busy,
+           "busy_clear": _write_busy_clear}
+
+
+class SQLiteStore:
+    def __init__(self, path: str = DB_PATH, batch_size: int = DB_WRITE_BATCH,
+                 flush_interval_s: float = DB_FLUSH_INTERVAL_MS / 1000.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._writer_conn = _connect(path)
+        self._writer_conn.executescript(SCHEMA)
+        self._local = threading.local()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stopped = False
+        self.metrics = {"writes": 0, "transactions": 0, "errors": 0, "retried": 0, "dropped": 0}
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    # -- writes ------------------------------------------------------------
+
+    def enqueue(self, kind: str, payload: dict):
+        if self._stopped:
+            raise RuntimeError("store is closed")
+        self._queue.put((kind, payload))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval_s
+            # Group whatever arrives within the flush interval into one
+            # transaction, up to batch_size writes.
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not self._commit(batch):
+                return
+
+    def _write(self, conn, kind: str, payload: dict) -> bool:
+        """One write inside the open transaction; False if the row is bad and was skipped."""
+        try:
+            WRITERS[kind](conn, payload)
+            return True
+        except (KeyError, ValueError, sqlite3.IntegrityError) as exc:
+            self.metrics["errors"] += 1
+            self.metrics["dropped"] += 1
+            logger.warning("db write kind=%s dropped: %s", kind, exc)
+            return False
+
+    def _transaction(self, writes) -> int:
+        """Commit writes in one transaction; returns how many went in. Rolls back and raises on sqlite3.Error."""
+        conn = self._writer_conn
+        try:
+            conn.execute("BEGIN")
+            done = sum(self._write(conn, kind, payload) for kind, payload in writes)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        self.metrics["transactions"] += 1
+        return done
+
+    def _commit(self, batch) -> bool:
+        waiters = [payload for kind, payload in batch if kind == "flush"]
+        keep_running = not any(kind == "stop" for kind, _ in batch)
+        writes = [(kind, payload) for kind, payload in batch if kind not in ("flush", "stop")]
+        try:
+            if writes:
+                self.metrics["writes"] += self._transaction(writes)
+        except sqlite3.Error:
+            # one bad row (or a locked moment) must not cost the whole
+            # batch: write the rows one at a time and drop only the failures
+            self.metrics["errors"] += 1
+            self.metrics["retried"] += 1
+            logger.exception("db batch of %d failed; retrying row by row", len(writes))
+            for kind, payload in writes:
+                try:
+                    self.metrics["writes"] += self._transaction([(kind, payload)])
+                except sqlite3.Error as exc:
+                    self.metrics["errors"] += 1
+                    self.metrics["dropped"] += 1
+                    logger.error("db write kind=%s dropped: %s", kind, exc)
+        for event in waiters:
+            event.set()
+        return keep_running
+
+    def stats(self) -> dict:
+        return dict(self.metrics, queue_depth=self._queue.qsize())
+
+    def close(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(("stop", None))
+        self._thread.join(timeout=10)
+        self._writer_conn.close()
+
+    # -- reads -------------------------------------------------------------
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    def get_user(self, email: str) -> List[dict]:
+        rows = self._reader().execute("SELECT data FROM users WHERE email = ?", (email.lower(),)).fetchall()
+        return [json.loads(r["data"]) for r in rows]
+
+    def meetings_for_attendee(self, email: str, start_ts: int, end_ts: int) -> List[dict]:
+        """Meetings of one attendee overlapping [start_ts, end_ts) (epoch seconds)."""
+        rows = self._reader().execute(
+            "SELECT m.data FROM meeting_attendees a JOIN meetings m ON m.id = a.meeting_id "
+            "WHERE a.email = ? AND a.start_ts < ? AND a.end_ts > ? ORDER BY a.start_ts",
+            (email.lower(), end_ts, start_ts),
+        ).fetchall()
+        return [json.loads(r["data"]) for r in rows]
+
+    def busy_since(self, last_id: int) -> List[tuple]:
+        """(id, email, start_min, end_min) of every busy interval stored after last_id, in id order."""
+        return self._reader().execute(
+            "SELECT id, email, start_min, end_min FROM busy WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall()
+
+    def iter_meetings(self, start_ts: int = 0, end_ts: int = 2 ** 62) -> Iterable[dict]:
+        cur = self._reader().execute(
+            "SELECT data FROM meetings WHERE start_ts < ? AND end_ts > ? ORDER BY start_ts", (end_ts, start_ts)
+        )
+        for row in cur:
+            yield json.loads(row["data"])
+
+    # -- bulk export / import ----------------------------------------------
+
+    def export_jsonl(self, out: IO[str]) -> int:
+        """Write every row as {"table": ..., "row": {...}} lines. Returns the row count."""
+        self.flush()
+        count = 0
+        conn = self._reader()
+        for table in TABLES:
+            for row in conn.execute(f"SELECT * FROM {table}"):
+                out.write(json.dumps({"table": table, "row": dict(row)}) + "\n")
+                count += 1
+        return count
+
+    def import_jsonl(self, lines: Iterable[str], chunk_size: int = 5000) -> int:
+        """Load rows written by export_jsonl, in large transactions. Returns the row count."""
+        self.flush()
+        conn = _connect(self.path)
+        count = 0
+        pending: Dict[str, List[dict]] = {}
+
+        def write_pending():
+            for table, rows in pending.items():
+                cols = list(rows[0])
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table}({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                    [tuple(r[c] for c in cols) for r in rows],
+                )
+            pending.clear()
+
+        try:
+            conn.execute("BEGIN")
+            for line in lines:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if item["table"] not in TABLES:
+                    raise ValueError(f"unknown table {item['table']!r}")
+                pending.setdefault(item["table"], []).append(item["row"])
+                count += 1
+                if count % chunk_size == 0:
+                    write_pending()
+            write_pending()
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return count
+
+
+_store: Optional[SQLiteStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SQLiteStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SQLiteStore()
+    return _store
+
+
+def store_stats() -> Optional[dict]:
+    return _store.stats() if _store is not None else None
+
+
+def close_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+class StoredBusySource(InMemoryBusySource):
+    """Busy time kept in SQLite, so every worker process reads the same imports.
+
+    Writes go through the store's writer thread. Each process keeps its own
+    sorted index and, before every lookup, pulls in the rows it has not
+    seen yet, clears included.
+    """
+
+    def __init__(self, store: Optional[SQLiteStore] = None):
+        super().__init__()
+        self._store = store
+        self._seen = 0
+        self._sync_lock = threading.Lock()
+
+    def store(self) -> SQLiteStore:
+        return self._store or get_store()
+
+    def add_minutes(self, email, intervals):
+        intervals = [(int(start), int(end)) for start, end in intervals]
+        if intervals:
+            self.store().enqueue("busy", {"email": email.lower(), "intervals": intervals})
+
+    def flush(self):
+        """Wait until everything added so far is visible to every process."""
+        self.store().flush()
+
+    def clear(self, email: str = None):
+        """Delete the stored busy time of one calendar, or of all of them."""
+        self.store().enqueue("busy_clear", {"email": email.lower() if email else EVERYONE})
+
+    def _sync(self):
+        with self._sync_lock:
+            rows = self.store().busy_since(self._seen)
+            if not rows:
+                return
+            self._seen = rows[-1][0]
+            fresh: Dict[str, List[tuple]] = {}
+            for _, email, start, end in rows:
+                if start == CLEARED:
+                    self._add_fresh(fresh)
+                    super().clear(None if email == EVERYONE else email)
+                    continue
+                fresh.setdefault(email, []).append((start, end))
+            self._add_fresh(fresh)
+
+    def _add_fresh(self, fresh: Dict[str, List[tuple]]):
+        for email, intervals in fresh.items():
+            super().add_minutes(email, intervals)
+        fresh.clear()
+
+    def busy_intervals(self, emails, start_min, end_min):
+        self._sync()
+        return super().busy_intervals(emails, start_min, end_min)
+
+
+def meeting_record(event: dict, created: dict) -> dict:
+    """Row for a confirmed meeting from the requested event and the calendar's reply."""
+    attendees = event.get("attendees") or event.get("emails") or []
+    return {
+        "event_id": created.get("id"),
+        "summary": event.get("summary"),
+        "start": event["start"],
+        "end": event["end"],
+        "attendees": [a["email"] if isinstance(a, dict) else a for a in attendees],
+        "calendar_id": event.get("calendar_id", "primary"),
+        "recurrence": event.get("recurrence"),
+        # the zone a recurring event expands in (build_event_body's default if none was asked for)
+        "time_zone": event.get("time_zone") or (created.get("start") or {}).get("timeZone"),
+        "link": created.get("htmlLink"),
+    }
+
+
 def save_meeting(meeting_data):
-    print("DB stub - save_meeting:", meeting_data)
-    return {"status": "ok", "demo": True}
+    get_store().enqueue("meeting", meeting_data)
+    return {"status": "ok", "queued": True}
+
+
+def save_proposal(proposal_data):
+    get_store().enqueue("proposal", proposal_data)
+    return {"status": "ok", "queued": True}
+
 
 def save_user(user_data):
-    print("DB stub - save_user:", user_data)
-    return {"status": "ok", "demo": True}
+    get_store().enqueue("user", user_data)
+    return {"status": "ok", "queued": True}
+
 
 def get_user(email):
-    print("DB stub - get_user:", email)
-    return {"data": []}
+    return {"data": get_store().get_user(email)}
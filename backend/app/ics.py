@@ -0,0 +1,491 @@
+# backend/app/ics.py
+# iCalendar (RFC 5545) in and out, one event at a time. The reader is fed
+# text in chunks of any size and hands back each VEVENT as soon as its END
+# line arrives, so a file of any size is read in bounded memory; only
+# recurring series are held, to be expanded once every override is known.
+
+import codecs
+import hashlib
+import itertools
+import re
+import time
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from backend.app.availability import to_epoch_min
+from backend.app.config import DEFAULT_TIMEZONE, ICS_EXPORT_CHUNK_EVENTS, ICS_READ_CHUNK_KB, RECURRENCE_HORIZON_DAYS
+from backend.app.timezones import zone
+
+_BEGIN = "\nBEGIN:VEVENT"
+_END = "\nEND:VEVENT"
+# A wanted property as (name, raw ";KEY=value" parameters, value); quoted
+# parameter values may hold ':' and ';'. Both patterns start with a literal
+# newline rather than ^, which lets re jump between line starts.
+_WANTED = re.compile(r"\n(UID|SUMMARY|DTSTART|DTEND|DURATION|RRULE|RDATE|EXDATE|RECURRENCE-ID|TRANSP|STATUS"
+                     r'|ORGANIZER|ATTENDEE)((?:;[^;:"\r\n]*(?:"[^"\r\n]*"[^;:"\r\n]*)*)*):([^\r\n]*)')
+_NESTED = re.compile(r"\nBEGIN:([A-Z-]+)\r?\n.*?\nEND:\1(?=\r?\n|$)", re.S)
+_PARAM = re.compile(r'(?:[^;"]|"[^"]*")+')
+_PARTSTAT = re.compile(r";PARTSTAT=([A-Za-z-]+)")
+_UNTIL = re.compile(r"UNTIL=(\d{8})(T\d{6})?(Z?)", re.I)
+
+
+class IcsEvent(NamedTuple):
+    uid: str
+    summary: str
+    start: datetime                 # aware; all-day events start at local midnight
+    end: datetime
+    all_day: bool
+    rrule: Optional[str]            # the RRULE value, expanded by occurrences()
+    rdates: Tuple[datetime, ...]
+    exdates: Tuple[datetime, ...]
+    recurrence_id: Optional[datetime]  # set on an override of one occurrence of a series
+    transparent: bool               # TRANSP:TRANSPARENT, shown as free
+    cancelled: bool
+    organizer: Optional[str]
+    attendees: Tuple[Tuple[str, str], ...]  # (email, PARTSTAT)
+
+    @property
+    def busy(self) -> bool:
+        return not (self.transparent or self.cancelled)
+
+
+# -- values -------------------------------------------------------------------
+
+def _params(raw: str) -> Dict[str, str]:
+    """";TZID=Europe/Berlin;VALUE=DATE-TIME" -> {"TZID": "Europe/Berlin", "VALUE": "DATE-TIME"}."""
+    if not raw:
+        return {}
+    out = {}
+    for param in (_PARAM.findall(raw[1:]) if '"' in raw else raw[1:].split(";")):
+        key, _, val = param.partition("=")
+        out[key.upper()] = val.strip('"')
+    return out
+
+
+def _unescape(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return (text.replace("\\n", "\n").replace("\\N", "\n").replace("\\,", ",")
+            .replace("\\;", ";").replace("\\\\", "\\"))
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+@lru_cache(maxsize=256)
+def _tz(params: str, default):
+    tzid = _params(params).get("TZID") if "TZID=" in params else None
+    if not tzid:
+        return default
+    try:
+        return zone(tzid.lstrip("/"))
+    except ValueError:
+        return default  # a Windows or custom zone name: VTIMEZONE blocks are not interpreted
+
+
+def parse_when(value: str, params: str, default_tz) -> Tuple[datetime, bool]:
+    """A DATE or DATE-TIME value as an aware datetime, and whether it was a DATE.
+
+    params are the property's parameters as written (";TZID=..."). UTC
+    ("...Z") and TZID times are exact; floating times and dates are read in
+    default_tz.
+    """
+    value = value.strip()
+    if len(value) == 8:
+        return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]), tzinfo=default_tz), True
+    tz = timezone.utc if value.endswith("Z") else _tz(params, default_tz)
+    return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                    int(value[9:11]), int(value[11:13]), int(value[13:15] or 0), tzinfo=tz), False
+
+
+def parse_duration(value: str) -> timedelta:
+    """RFC 5545 DURATION ("PT1H30M", "P1D", "-PT15M", "P2W") as a timedelta."""
+    sign = -1 if value.startswith("-") else 1
+    value = value.lstrip("+-")
+    if not value.startswith("P"):
+        raise ValueError(f"Bad duration {value!r}")
+    total, number, in_time = 0, "", False
+    units = {"W": 604800, "D": 86400}
+    time_units = {"H": 3600, "M": 60, "S": 1}
+    for ch in value[1:]:
+        if ch == "T":
+            in_time = True
+        elif ch.isdigit():
+            number += ch
+        else:
+            scale = (time_units if in_time else units).get(ch)
+            if scale is None or not number:
+                raise ValueError(f"Bad duration {value!r}")
+            total += int(number) * scale
+            number = ""
+    return timedelta(seconds=sign * total)
+
+
+def _email(value: str) -> str:
+    return value[7:].lower() if value[:7].lower() == "mailto:" else value.lower()
+
+
+# -- reading ------------------------------------------------------------------
+
+class IcsReader:
+    """Push parser: feed() text chunks as they arrive, get back finished events.
+
+    Text is cut at BEGIN:VEVENT / END:VEVENT lines, so only the event being
+    read is buffered. Within an event, folded lines are joined and nested
+    components (VALARM) dropped with str.replace and one regex, and a regex
+    picks out just the properties the scheduler uses; everything else in
+    the file (VTIMEZONE, DESCRIPTION, alarms) is never parsed line by line.
+    Component and property names are expected in upper case, as every
+    major calendar writes them.
+    """
+
+    def __init__(self, time_zone: Optional[str] = None):
+        self.default_tz = zone(time_zone or DEFAULT_TIMEZONE)
+        self._buf = "\n"         # a newline in front, so a marker at the very start still follows one
+        self.errors = 0          # events dropped for unreadable values
+
+    def feed(self, text: str) -> List[IcsEvent]:
+        buf = self._buf + text
+        events: List[IcsEvent] = []
+        pos = 0
+        while True:
+            begin = buf.find(_BEGIN, pos)
+            if begin == -1:
+                # keep enough to catch a marker split across chunks
+                self._buf = buf[max(pos, len(buf) - len(_BEGIN)):]
+                return events
+            end = buf.find(_END, begin)
+            if end == -1:
+                self._buf = buf[begin:]
+                return events
+            events.extend(self._block(buf[begin + len(_BEGIN):end]))
+            pos = end + len(_END)
+
+    def close(self) -> List[IcsEvent]:
+        events = self.feed("\n")
+        self._buf = "\n"
+        return events
+
+    def _block(self, block: str) -> List[IcsEvent]:
+        if "\n " in block or "\n\t" in block:
+            block = block.replace("\r\n ", "").replace("\r\n\t", "").replace("\n ", "").replace("\n\t", "")
+        if "\nBEGIN:" in block:
+            block = _NESTED.sub("", block)
+        try:
+            return [self._event(_WANTED.findall(block))]
+        except (ValueError, IndexError):
+            self.errors += 1
+            return []
+
+    def _event(self, props: List[Tuple[str, str, str]]) -> IcsEvent:
+        tz = self.default_tz
+        uid = summary = rrule = organizer = None
+        start = end = recurrence_id = None
+        duration: Optional[timedelta] = None
+        all_day = transparent = cancelled = False
+        rdates: List[datetime] = []
+        exdates: List[datetime] = []
+        attendees: List[Tuple[str, str]] = []
+        for name, params, value in props:
+            if name == "DTSTART":
+                start, all_day = parse_when(value, params, tz)
+            elif name == "DTEND":
+                end, _ = parse_when(value, params, tz)
+            elif name == "DURATION":
+                duration = parse_duration(value.strip())
+            elif name == "UID":
+                uid = value.strip()
+            elif name == "SUMMARY":
+                summary = _unescape(value)
+            elif name == "RRULE":
+                rrule = value.strip()
+            elif name == "RDATE" and "VALUE=PERIOD" not in params:
+                rdates.extend(parse_when(v, params, tz)[0] for v in value.split(","))
+            elif name == "EXDATE":
+                exdates.extend(parse_when(v, params, tz)[0] for v in value.split(","))
+            elif name == "RECURRENCE-ID":
+                recurrence_id, _ = parse_when(value, params, tz)
+            elif name == "TRANSP":
+                transparent = value.strip().upper() == "TRANSPARENT"
+            elif name == "STATUS":
+                cancelled = value.strip().upper() == "CANCELLED"
+            elif name == "ORGANIZER":
+                organizer = _email(value.strip())
+            elif name == "ATTENDEE":
+                status = _PARTSTAT.search(params)
+                attendees.append((_email(value.strip()), status.group(1).upper() if status else "NEEDS-ACTION"))
+        if start is None:
+            raise ValueError("VEVENT without DTSTART")
+        if end is None:
+            # RFC 5545: no DTEND and no DURATION is a day for a date, an instant otherwise
+            end = start + (duration if duration is not None else timedelta(days=1) if all_day else timedelta())
+        return IcsEvent(uid or "", summary or "", start, end, all_day, rrule, tuple(rdates), tuple(exdates),
+                        recurrence_id, transparent, cancelled, organizer, tuple(attendees))
+
+
+def read_chunks(stream: IO, chunk_kb: int = ICS_READ_CHUNK_KB) -> Iterator[str]:
+    """Text chunks from a text or binary stream; bytes are decoded as UTF-8."""
+    decoder = None
+    while True:
+        chunk = stream.read(chunk_kb * 1024)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            decoder = decoder or codecs.getincrementaldecoder("utf-8")(errors="replace")
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+def read_events(chunks: Iterable[str], time_zone: Optional[str] = None) -> Iterator[IcsEvent]:
+    """Every VEVENT in the text, in file order."""
+    reader = IcsReader(time_zone)
+    for chunk in chunks:
+        yield from reader.feed(chunk)
+    yield from reader.close()
+
+
+def _until_utc(rule: str, tz) -> str:
+    """The RRULE with UNTIL in UTC, as dateutil wants it next to an aware DTSTART.
+
+    A DATE UNTIL ends with its day in tz, so an occurrence on that day still
+    counts; a floating UNTIL is a wall time in tz, like the DTSTART it bounds.
+    """
+    def utc(match):
+        day, clock, z = match.groups()
+        if z:
+            return match.group(0)
+        hms = (int(clock[1:3]), int(clock[3:5]), int(clock[5:7])) if clock else (23, 59, 59)
+        until = datetime(int(day[0:4]), int(day[4:6]), int(day[6:8]), *hms, tzinfo=tz)
+        return "UNTIL=" + until.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    return _UNTIL.sub(utc, rule)
+
+
+def occurrences(event: IcsEvent, start_min: int, end_min: int,
+                skip: Set[int] = frozenset()) -> Iterator[Tuple[int, int]]:
+    """(start, end) in epoch minutes of each occurrence overlapping [start_min, end_min).
+
+    The series is walked lazily and stops at end_min; starts in `skip`
+    (overridden occurrences) are left out.
+    """
+    length = to_epoch_min(event.end) - to_epoch_min(event.start)
+    if not event.rrule and not event.rdates:
+        first = to_epoch_min(event.start)
+        if first < end_min and first + length > start_min and first not in skip:
+            yield first, first + length
+        return
+
+    from dateutil import rrule
+
+    rule = _until_utc(event.rrule, event.start.tzinfo) if event.rrule else None
+    series = rrule.rrulestr(rule, dtstart=event.start, forceset=True) if rule else rrule.rruleset()
+    series.rdate(event.start)
+    for when in event.rdates:
+        series.rdate(when)
+    for when in event.exdates:
+        series.exdate(when)
+    after = datetime.fromtimestamp((start_min - length) * 60, timezone.utc)
+    for when in series.xafter(after, inc=False):
+        first = to_epoch_min(when)
+        if first >= end_min:
+            return
+        if first + length > start_min and first not in skip:
+            yield first, first + length
+
+
+# -- loading busy time ----------------------------------------------------------
+
+class BusyLoader:
+    """Feeds .ics text into a busy-time store (anything with add_minutes).
+
+    Each busy occurrence is busy time for `calendar` (the owner of the
+    exported calendar) if given, and, with attendees=True, for the
+    organizer and every attendee who has not declined. Transparent and
+    cancelled events are free time. Recurring series are kept until
+    close(), when every override (RECURRENCE-ID) in the file is known, and
+    only then expanded over [start_min, end_min).
+    """
+
+    def __init__(self, source, calendar: Optional[str] = None, attendees: bool = True,
+                 start_min: Optional[int] = None, end_min: Optional[int] = None,
+                 time_zone: Optional[str] = None, flush_every: int = 50_000):
+        if not hasattr(source, "add_minutes"):
+            raise ValueError("Busy import needs the stored busy time (BUSY_SOURCE=memory)")
+        now = int(time.time() // 60)
+        self.source = source
+        self.calendar = calendar.lower() if calendar else None
+        self.attendees = attendees
+        self.start_min = now - 1440 if start_min is None else start_min
+        self.end_min = now + RECURRENCE_HORIZON_DAYS * 1440 if end_min is None else end_min
+        self.reader = IcsReader(time_zone)
+        self.flush_every = flush_every
+        self._series: List[IcsEvent] = []
+        self._overridden: Dict[str, Set[int]] = {}
+        self._pending: Dict[str, List[Tuple[int, int]]] = {}
+        self._buffered = 0
+        self.started = time.perf_counter()
+        self.stats = {"events": 0, "series": 0, "intervals": 0, "skipped": 0}
+        self._calendars: Set[str] = set()
+
+    def feed(self, text: str):
+        for event in self.reader.feed(text):
+            self._take(event)
+
+    def close(self) -> dict:
+        for event in self.reader.close():
+            self._take(event)
+        for event in self._series:
+            skip = self._overridden.get(event.uid, set())
+            try:
+                for interval in occurrences(event, self.start_min, self.end_min, skip):
+                    self._add(event, interval)
+            except ValueError:  # an RRULE dateutil cannot read
+                self.stats["skipped"] += 1
+        self._series.clear()
+        self._flush()
+        flush = getattr(self.source, "flush", None)
+        if flush is not None:
+            flush()  # a shared store: the import is visible to every worker on return
+        elapsed = time.perf_counter() - self.started
+        return dict(
+            self.stats,
+            skipped=self.stats["skipped"] + self.reader.errors,
+            calendars=len(self._calendars),
+            elapsed_ms=round(elapsed * 1000, 1),
+            events_per_s=round(self.stats["events"] / elapsed, 1) if elapsed > 0 else 0.0,
+        )
+
+    def _take(self, event: IcsEvent):
+        self.stats["events"] += 1
+        if event.recurrence_id is not None:
+            self._overridden.setdefault(event.uid, set()).add(to_epoch_min(event.recurrence_id))
+        if event.rrule or event.rdates:
+            self.stats["series"] += 1
+            self._series.append(event)
+        elif event.busy:
+            for interval in occurrences(event, self.start_min, self.end_min):
+                self._add(event, interval)
+
+    def _add(self, event: IcsEvent, interval: Tuple[int, int]):
+        if not event.busy or interval[1] <= interval[0]:
+            return
+        who = {self.calendar} if self.calendar else set()
+        if self.attendees:
+            if event.organizer:
+                who.add(event.organizer)
+            who.update(email for email, status in event.attendees if status != "DECLINED")
+        for email in who:
+            self._pending.setdefault(email, []).append(interval)
+        self._buffered += len(who)
+        if self._buffered >= self.flush_every:
+            self._flush()
+
+    def _flush(self):
+        for email, intervals in self._pending.items():
+            self.source.add_minutes(email, intervals)
+            self._calendars.add(email)
+            self.stats["intervals"] += len(intervals)
+        self._pending.clear()
+        self._buffered = 0
+
+
+def load_busy(source, chunks: Iterable[str], **kwargs) -> dict:
+    """Read every chunk into `source` with a BusyLoader; returns its counts."""
+    loader = BusyLoader(source, **kwargs)
+    for chunk in chunks:
+        loader.feed(chunk)
+    return loader.close()
+
+
+# -- writing ------------------------------------------------------------------
+
+def fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 3.1), never inside a UTF-8 sequence."""
+    if len(line) <= 75 and line.isascii():
+        return line
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts, pos, limit = [], 0, 75
+    while pos < len(data):
+        cut = min(len(data), pos + limit)
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[pos:cut].decode())
+        pos, limit = cut, 74  # continuation lines start with a space
+    return "\r\n ".join(parts)
+
+
+def _utc(iso: str) -> str:
+    return datetime.fromisoformat(iso).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _local(iso: str, tz_name: str) -> str:
+    return datetime.fromisoformat(iso).astimezone(zone(tz_name)).strftime("%Y%m%dT%H%M%S")
+
+
+def event_lines(meeting: dict, stamp: str) -> List[str]:
+    """A confirmed meeting (see db.meeting_record) as VEVENT content lines."""
+    uid = meeting.get("event_id") or hashlib.sha1(
+        f"{meeting['start']}|{meeting['end']}|{meeting.get('summary')}".encode()).hexdigest()
+    recurrence = meeting.get("recurrence") or []
+    rules = [recurrence] if isinstance(recurrence, str) else list(recurrence)
+    tz_name = meeting.get("time_zone")
+    if rules and tz_name:
+        # the rule's BYDAY and its wall-clock time belong to the zone it was
+        # made in; expanded in UTC it would drift across DST or change day
+        times = [f"DTSTART;TZID={tz_name}:{_local(meeting['start'], tz_name)}",
+                 f"DTEND;TZID={tz_name}:{_local(meeting['end'], tz_name)}"]
+    else:
+        times = [f"DTSTART:{_utc(meeting['start'])}", f"DTEND:{_utc(meeting['end'])}"]
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{stamp}",
+        *times,
+        f"SUMMARY:{_escape(meeting.get('summary') or 'Meeting')}",
+        *rules,
+    ]
+    lines.extend(f"ATTENDEE:mailto:{email}" for email in meeting.get("attendees") or [])
+    if meeting.get("link"):
+        lines.append(f"URL:{meeting['link']}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def write_events(meetings: Iterable[dict], chunk_events: int = ICS_EXPORT_CHUNK_EVENTS) -> Iterator[str]:
+    """A VCALENDAR with one VEVENT per meeting, as text chunks of chunk_events events each."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//meeting-scheduler-agent//EN\r\nCALSCALE:GREGORIAN\r\n"
+    meetings = iter(meetings)
+    while True:
+        block = list(itertools.islice(meetings, chunk_events))
+        if not block:
+            break
+        yield "".join(fold(line) + "\r\n" for meeting in block for line in event_lines(meeting, stamp))
+    yield "END:VCALENDAR\r\n"
+
+
+def export_meetings(out: IO[str], start_ts: int = 0, end_ts: int = 2 ** 62) -> int:
+    """Write confirmed meetings overlapping [start_ts, end_ts) (epoch seconds) to out. Returns the count."""
+    from backend.app import db
+
+    count = 0
+
+    def counted(meetings):
+        nonlocal count
+        for meeting in meetings:
+            count += 1
+            yield meeting
+
+    store = db.get_store()
+    store.flush()
+    for chunk in write_events(counted(store.iter_meetings(start_ts, end_ts))):
+        out.write(chunk)
+    return count
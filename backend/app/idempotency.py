@@ -0,0 +1,224 @@
+# backend/app/idempotency.py
+# Makes calendar inserts safe to retry. Requests with the same key share
+# one insert; its result is kept for a TTL and replayed without calling
+# Google again.
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.app.calendar_tool import token_key
+from backend.app.config import IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL_S
+
+# How a request was served, returned next to the result.
+EXECUTED, COALESCED, REPLAYED = "executed", "coalesced", "replayed"
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different event."""
+
+
+class BatchItemFailed(Exception):
+    """The batch insert another request was waiting on did not create the event."""
+
+    def __init__(self, result: dict):
+        super().__init__(result.get("message") or result.get("status", "failed"))
+        self.result = result
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def fingerprint(event: dict) -> str:
+    return _digest(
+        " ".join(str(event.get("summary", "")).split()).lower(),
+        str(event.get("start", "")),
+        str(event.get("end", "")),
+        str(event.get("calendar_id", "primary")),
+        str(event.get("recurrence") or ""),
+        str(event.get("time_zone") or ""),
+    )
+
+
+def scope(token_dict: Optional[dict]) -> str:
+    # Keys are per calendar owner, so two users can't collide on a key.
+    return token_key(token_dict) if token_dict else "server"
+
+
+def request_key(event: dict, token_dict: Optional[dict], header_key: Optional[str] = None) -> Tuple[str, str]:
+    """(store key, event fingerprint). Without a header the fingerprint is the key."""
+    fp = fingerprint(event)
+    return _digest(scope(token_dict), header_key.strip() if header_key else fp), fp
+
+
+def batch_keys(events: List[dict], token_dict: Optional[dict], header_key: Optional[str] = None) -> List[Tuple[str, str]]:
+    """request_key per event of a batch; a header key is shared out as "<key>:<index>"."""
+    header_key = header_key.strip() if header_key else None
+    return [request_key(event, token_dict, f"{header_key}:{i}" if header_key else None)
+            for i, event in enumerate(events)]
+
+
+class IdempotencyStore:
+    def __init__(self, ttl_s: float = IDEMPOTENCY_TTL_S, max_keys: int = IDEMPOTENCY_MAX_KEYS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_s = ttl_s
+        self.max_keys = max_keys
+        self.clock = clock
+        self._done: "OrderedDict[str, Tuple[str, dict, float]]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"executed": 0, "coalesced": 0, "replayed": 0, "conflicts": 0, "evictions": 0}
+
+    def _lookup(self, key: str) -> Optional[Tuple[str, dict]]:
+        entry = self._done.get(key)
+        if entry is None:
+            return None
+        fp, result, expires = entry
+        if expires <= self.clock():
+            del self._done[key]
+            return None
+        return fp, result
+
+    def _remember(self, key: str, fp: str, result: dict):
+        with self._lock:
+            self._done[key] = (fp, result, self.clock() + self.ttl_s)
+            self._done.move_to_end(key)
+            while len(self._done) > self.max_keys:
+                self._done.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def _check(self, key_fp: str, fp: str):
+        if key_fp != fp:
+            self.metrics["conflicts"] += 1
+            raise IdempotencyConflict("Idempotency key was already used for a different event")
+
+    async def run(self, key: str, fp: str, fn: Callable[[], Awaitable[dict]]) -> Tuple[dict, str]:
+        """Return fn()'s result for this key, running fn at most once per TTL.
+
+        Only successes are stored; if fn raises, every waiter sees the error
+        and the next request with the key tries again. The insert runs as its
+        own task, so a caller that times out or disconnects does not cancel
+        it for the others.
+        """
+        with self._lock:
+            done = self._lookup(key)
+            if done is not None:
+                self._check(done[0], fp)
+                self.metrics["replayed"] += 1
+                return done[1], REPLAYED
+            running = self._inflight.get(key)
+            if running is not None:
+                self._check(running[0], fp)
+                self.metrics["coalesced"] += 1
+                task, how = running[1], COALESCED
+            else:
+                task = asyncio.ensure_future(self._execute(key, fp, fn))
+                self._inflight[key] = (fp, task)
+                self.metrics["executed"] += 1
+                how = EXECUTED
+        return await asyncio.shield(task), how
+
+    async def _execute(self, key: str, fp: str, fn: Callable[[], Awaitable[dict]]) -> dict:
+        try:
+            result = await fn()
+            self._remember(key, fp, result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def run_many(self, items: List[Tuple[str, str]],
+                       fn: Callable[[List[int]], Awaitable[List[dict]]]) -> List[Tuple[dict, str]]:
+        """run() for a batch, one (key, fingerprint) per event.
+
+        fn(todo) inserts the events at the indexes in todo and returns one
+        result per index, {"status": "ok", "created": ...} or an error.
+        Stored events are replayed and events another request is inserting
+        are waited for; only the rest reach fn. Each created event is stored
+        under its own key, so a batch retried after a timeout or a partial
+        failure sends only what is still missing. Returns (result, how) per
+        event, in order.
+        """
+        loop = asyncio.get_running_loop()
+        out: List[Optional[Tuple[dict, str]]] = [None] * len(items)
+        waiting: Dict[int, asyncio.Future] = {}
+        todo: List[Tuple[int, asyncio.Future]] = []
+        with self._lock:
+            mine: Dict[str, asyncio.Future] = {}
+            for i, (key, fp) in enumerate(items):
+                done = self._lookup(key)
+                running = self._inflight.get(key)
+                if done is not None:
+                    self._check(done[0], fp)
+                    out[i] = ({"index": i, "status": "ok", "created": done[1]}, REPLAYED)
+                elif running is not None:
+                    self._check(running[0], fp)
+                    waiting[i] = running[1]
+                elif key in mine:  # the same event twice in one batch
+                    waiting[i] = mine[key]
+                else:
+                    mine[key] = loop.create_future()
+                    todo.append((i, mine[key]))
+            # nothing is registered until every key has passed its check
+            for i, future in todo:
+                self._inflight[items[i][0]] = (items[i][1], future)
+            self.metrics["replayed"] += sum(1 for r in out if r is not None)
+            self.metrics["coalesced"] += len(waiting)
+            self.metrics["executed"] += len(todo)
+
+        if todo:
+            task = asyncio.ensure_future(self._execute_many(items, todo, fn))
+            for (i, _), result in zip(todo, await asyncio.shield(task)):
+                out[i] = (dict(result, index=i), EXECUTED)
+        for i, future in waiting.items():
+            try:
+                out[i] = ({"index": i, "status": "ok", "created": await asyncio.shield(future)}, COALESCED)
+            except BatchItemFailed as exc:
+                out[i] = (dict(exc.result, index=i), COALESCED)
+            except Exception as exc:
+                out[i] = ({"index": i, "status": "error", "message": str(exc)}, COALESCED)
+        return out
+
+    async def _execute_many(self, items, todo, fn) -> List[dict]:
+        try:
+            results = await fn([i for i, _ in todo])
+        except BaseException as exc:
+            for _, future in todo:
+                _fail(future, exc)
+            raise
+        finally:
+            with self._lock:
+                for i, _ in todo:
+                    self._inflight.pop(items[i][0], None)
+        for (i, future), result in zip(todo, results):
+            if result["status"] == "ok":
+                self._remember(items[i][0], items[i][1], result["created"])
+                future.set_result(result["created"])
+            else:
+                _fail(future, BatchItemFailed(result))
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.metrics, size=len(self._done), inflight=len(self._inflight))
+
+
+def _fail(future: asyncio.Future, exc: BaseException):
+    if not future.done():
+        future.set_exception(exc)
+        future.exception()  # nobody may be waiting; don't log it as unretrieved
+
+
+_store = IdempotencyStore()
+
+
+def idempotency_store() -> IdempotencyStore:
+    return _store
+
+
+def set_idempotency_store(store: IdempotencyStore):
+    global _store
+    _store = store
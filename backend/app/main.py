@@ -1,14 +1,46 @@
 # backend/app/main.py
 
+import asyncio
+import codecs
+import json
 import logging
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from googleapiclient.errors import HttpError
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Optional
 
-from backend.app.scheduler_engine import propose_slots
-from backend.app.calendar_tool import GoogleCalendarTool
-from backend.app.schemas import ProposeRequest, ConfirmRequest
-from backend.app.config import DEMO_MODE
+from fastapi import FastAPI, Header, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+
+from backend.app import batch_propose, batch_scheduler, concurrency, db, ics, outbound, shared_cache, warmup
+from backend.app.async_calendar import CalendarAPIError, get_calendar_client
+from backend.app.availability import to_epoch_min
+from backend.app.calendar_cache import get_busy_cache
+from backend.app.calendar_tool import OAuthConfigError, client_pool
+from backend.app.concurrency import request_deadline, run_cpu, with_deadline
+from backend.app.date_grammar import parse_stats
+from backend.app.idempotency import EXECUTED, IdempotencyConflict, batch_keys, idempotency_store, request_key
+from backend.app.outbound import TRANSIENT, OutboundQueueFull, outbound_stats, throttle_signal
+from backend.app.metrics import (
+    register_collector,
+    render_prometheus,
+    request_trace,
+    set_trace_sample_rate,
+    trace_sample_rate,
+)
+from backend.app.scheduler_engine import get_busy_source, iter_proposal, propose_slots
+from backend.app.timezones import WorkProfile, profile_directory
+from backend.app.schemas import (
+    ConfirmBatchRequest,
+    ConfirmRequest,
+    ProposeBatchRequest,
+    ProfileRequest,
+    ProposeRequest,
+    ScheduleBatchRequest,
+    TracingRequest,
+)
+from backend.app.config import BATCH_TIME_BUDGET_S, DEMO_MODE, WARMUP
 
 logger = logging.getLogger("meeting_agent")
 logger.setLevel(logging.INFO)
@@ -16,26 +48,127 @@ handler = logging.StreamHandler()
 handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
 logger.addHandler(handler)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: the process is live at once, and /ready
+    # only passes when the parser and calendar state are built.
+    task = asyncio.create_task(warmup.warm(app)) if WARMUP else None
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+    await get_calendar_client().aclose()
+    outbound.shutdown()
+    concurrency.shutdown()
+    batch_propose.shutdown()
+    shared_cache.shutdown()
+    db.close_store()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def collect_component_stats():
+    parse = parse_stats()
+    for outcome in ("cache_hits", "shared_hits", "fast_path", "fallback"):
+        yield "date_parse_total", {"outcome": outcome}, parse[outcome]
+
+    pool = client_pool().stats()
+    for event in ("hits", "misses", "refreshes", "evictions"):
+        yield "calendar_pool_total", {"event": event}, pool[event]
+    yield "calendar_pool_size", {}, pool["size"]
+
+    cache = get_busy_cache()
+    if cache is not None:
+        stats = cache.stats()
+        for event in ("hits", "misses", "stale", "shared_hits", "published", "resyncs", "evictions", "write_through"):
+            yield "busy_cache_total", {"event": event}, stats[event]
+        yield "busy_cache_calendars", {}, stats["size"]
+        yield "busy_cache_avg_staleness_seconds", {}, stats["avg_staleness_s"]
+
+    shared = shared_cache.get_shared_cache()
+    if shared is not None:
+        stats = shared.stats()
+        for table, entries in stats["entries"].items():
+            yield "shared_cache_entries", {"table": table}, entries
+        # every worker's counters, whichever worker is scraped
+        for worker in stats["workers"]:
+            for table in stats["entries"]:
+                labels = {"worker": str(worker["pid"]), "table": table}
+                for event in ("hits", "misses", "puts"):
+                    yield "shared_cache_total", dict(labels, event=event), worker[table][event]
+
+    keys = idempotency_store().stats()
+    for event in ("executed", "coalesced", "replayed", "conflicts", "evictions"):
+        yield "idempotency_total", {"event": event}, keys[event]
+
+    outbound = outbound_stats()
+    if outbound is not None:
+        for event in ("submitted", "dispatched", "succeeded", "failed", "retried", "rejected",
+                      "throttled_user", "throttled_project", "transient"):
+            yield "outbound_total", {"event": event}, outbound[event]
+        for priority, depth in outbound["queue_depth"].items():
+            yield "outbound_queue_depth", {"priority": priority}, depth
+        yield "outbound_in_flight", {}, outbound["in_flight"]
+        yield "outbound_project_rate", {}, outbound["project_rate"]
+
+    store = db.store_stats()
+    if store is not None:
+        for event in ("writes", "transactions", "errors", "retried", "dropped"):
+            yield "db_total", {"event": event}, store[event]
+        yield "db_queue_depth", {}, store["queue_depth"]
+
+
+register_collector(collect_component_stats)
+
+
+def deadline_exceeded(seconds: float):
+    return JSONResponse(
+        status_code=504,
+        content={"status": "error", "message": f"Request exceeded its {seconds:g}s deadline"}
+    )
+
+
+def calendar_busy(message: str, retry_after: Optional[float] = None):
+    # Google's quota, not the user's request: tell the client when to come back
+    return JSONResponse(
+        status_code=503,
+        content={"status": "error", "message": message},
+        headers={"Retry-After": str(max(1, round(retry_after or 1)))},
+    )
 
 
 # ===========================
 # 🔵 PROPOSE MEETING TIMES
 # ===========================
 @app.post("/propose")
-def propose(req: ProposeRequest):
+async def propose(req: ProposeRequest, x_request_deadline: Optional[str] = Header(None)):
+    deadline = request_deadline(x_request_deadline)
     try:
-        logger.info("📩 Incoming propose request: %s", req.prompt)
+        logger.debug("propose prompt_len=%d", len(req.prompt))
 
-        data = propose_slots(req.prompt)
+        with request_trace("propose"):
+            data = await with_deadline(run_cpu(propose_slots, req.prompt, req.n_slots, time_zone=req.time_zone), deadline)
+        db.save_proposal(dict(data, prompt=req.prompt))
 
         return {
             "status": "ok",
             "summary": data["summary"],
             "emails": data["emails"],
+            "time_zone": data["time_zone"],
+            "attendee_time_zones": data["attendee_time_zones"],
+            "recurrence": data.get("recurrence"),
             "slots": data["slots"]
         }
 
+    except asyncio.TimeoutError:
+        logger.error("PROPOSE TIMEOUT after %ss", deadline)
+        return deadline_exceeded(deadline)
+
+    except ValueError as exc:
+        # nothing to propose for this prompt (no date, no free time, a series that never repeats)
+        return JSONResponse(status_code=422, content={"status": "error", "message": str(exc)})
+
     except Exception as exc:
         logger.exception("PROPOSE ERROR: %s", exc)
         return {
@@ -44,43 +177,203 @@ def propose(req: ProposeRequest):
         }
 
 
+# ===========================
+# 🔵 PROPOSE, STREAMED
+# ===========================
+@app.post("/propose/stream")
+async def propose_stream(req: ProposeRequest, request: Request, x_request_deadline: Optional[str] = Header(None)):
+    """Same search as /propose, sent as it happens: an "intent" event, one
+    "slot" event per slot found, then "done" (or "error").
+
+    NDJSON by default; Server-Sent Events when the client accepts text/event-stream.
+    Closing the connection stops the search.
+    """
+    deadline = request_deadline(x_request_deadline)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    gen = iter_proposal(req.prompt, req.n_slots, time_zone=req.time_zone)
+
+    def frame(item: dict) -> str:
+        body = json.dumps(item)
+        return f"event: {item['type']}\ndata: {body}\n\n" if sse else body + "\n"
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        stop = loop.time() + deadline
+        intent, slots = None, []
+        try:
+            with request_trace("propose_stream"):
+                while True:
+                    # one step of the search per executor call, so each slot
+                    # goes out before the next one is looked for
+                    item = await with_deadline(run_cpu(next, gen, None), max(0.001, stop - loop.time()))
+                    if item is None:
+                        break
+                    if item["type"] == "intent":
+                        intent = item
+                    else:
+                        slots.append(item)
+                    yield frame(item)
+            db.save_proposal(dict(intent, slots=slots, prompt=req.prompt))
+            yield frame({"type": "done", "slots": len(slots)})
+
+        except asyncio.TimeoutError:
+            logger.error("PROPOSE STREAM TIMEOUT after %ss", deadline)
+            yield frame({"type": "error", "message": f"Request exceeded its {deadline:g}s deadline"})
+
+        except Exception as exc:
+            logger.exception("PROPOSE STREAM ERROR: %s", exc)
+            yield frame({"type": "error", "message": str(exc)})
+
+        finally:
+            try:
+                gen.close()
+            except ValueError:
+                pass  # still running in the executor after a timeout; it ends on its own
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+# ===========================
+# 🔵 PROPOSE IN BULK
+# ===========================
+@app.post("/propose/batch")
+async def propose_batch(request: Request, time_zone: Optional[str] = None, n_slots: int = 3):
+    """Body: {"prompts": [...], "time_zone", "n_slots"} or NDJSON (one prompt
+    per line, with ?time_zone= and ?n_slots=). Streams NDJSON results in input order."""
+    # The body is read in full before streaming starts: once the response is
+    # streaming, Starlette listens on the same channel for disconnects.
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            req = ProposeBatchRequest(prompts=batch_propose.ndjson_prompts(await request.body()),
+                                      time_zone=time_zone, n_slots=n_slots)
+        else:
+            req = ProposeBatchRequest(**(await request.json()))
+    except (ValueError, TypeError, ValidationError) as exc:
+        return JSONResponse(status_code=400, content={"status": "error", "message": f"Invalid batch: {exc}"})
+
+    async def lines():
+        async for result in batch_propose.propose_many(batch_propose.iterate(req.prompts),
+                                                       n_slots=req.n_slots, time_zone=req.time_zone):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# ===========================
+# 🔵 SCHEDULE MANY MEETINGS TOGETHER (WITH ROOMS)
+# ===========================
+@app.post("/schedule/batch")
+async def schedule_many(req: ScheduleBatchRequest, x_request_deadline: Optional[str] = Header(None)):
+    """Place every meeting of the batch at once, with rooms, double-booking
+    no attendee and no room. Nothing is booked; each meeting comes back
+    scheduled, or unscheduled with the reasons."""
+    deadline = request_deadline(x_request_deadline)
+    # the search stops at its budget; keep it well inside the request deadline
+    budget = min(req.time_budget_s or BATCH_TIME_BUDGET_S, deadline * 0.8)
+    items = [m if isinstance(m, str) else m.model_dump(exclude_none=True) for m in req.meetings]
+    rooms = [batch_scheduler.Room(r.id, r.capacity) for r in req.rooms]
+    try:
+        logger.debug("schedule_batch meetings=%d rooms=%d", len(items), len(rooms))
+
+        with request_trace("schedule_batch"):
+            return await with_deadline(
+                run_cpu(batch_scheduler.schedule_batch, items, rooms, req.time_zone, budget),
+                deadline,
+            )
+
+    except asyncio.TimeoutError:
+        logger.error("SCHEDULE BATCH TIMEOUT after %ss", deadline)
+        return deadline_exceeded(deadline)
+
+    except Exception as exc:
+        logger.exception("SCHEDULE BATCH ERROR: %s", exc)
+        return {
+            "status": "error",
+            "message": str(exc)
+        }
+
+
 # ===========================
 # 🔵 CONFIRM EVENT (CREATE CALENDAR EVENT)
 # ===========================
+def record_meeting(event: dict, created: dict):
+    """Save a meeting the calendar has already created.
+
+    Failing here must not fail the confirm: an error result is not kept
+    under the idempotency key, so the client's retry would create the
+    event a second time.
+    """
+    try:
+        db.save_meeting(db.meeting_record(event, created))
+    except Exception:
+        logger.exception("confirm created id=%s but could not record it", created.get("id"))
+
+
 @app.post("/confirm")
-def confirm(payload: ConfirmRequest):
+async def confirm(
+    payload: ConfirmRequest,
+    response: Response,
+    x_request_deadline: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+):
+    deadline = request_deadline(x_request_deadline)
     try:
         event = payload.event
         token_dict = payload.token_dict
 
-        logger.info("📌 Confirm event: %s", event)
+        logger.debug("confirm start=%s end=%s", event.get("start"), event.get("end"))
+
+        async def insert():
+            created = await get_calendar_client().create_event(
+                summary=event["summary"],
+                start=event["start"],
+                end=event["end"],
+                token_dict=token_dict,
+                recurrence=event.get("recurrence"),
+                time_zone=event.get("time_zone"),
+            )
+            logger.info("confirm created id=%s", created.get("id"))
+            record_meeting(event, created)
+            return created
 
-        # Instantiate tool (handles DEMO_MODE logic)
         try:
-            cal = GoogleCalendarTool(token_dict or {})
-        except Exception as exc:
-            logger.error("Failed to init GoogleCalendarTool: %s", exc)
+            # Retries and double clicks carry the same key: they join the
+            # insert in flight or get the stored result back.
+            key, fp = request_key(event, token_dict, idempotency_key)
+            with request_trace("confirm"):
+                created, served = await with_deadline(idempotency_store().run(key, fp, insert), deadline)
+
+            response.headers["Idempotent-Replayed"] = "false" if served == EXECUTED else "true"
+            return {"status": "ok", "created": created}
+
+        except IdempotencyConflict as exc:
+            return JSONResponse(status_code=422, content={"status": "error", "message": str(exc)})
+
+        except OAuthConfigError as exc:
+            # raised by token validation (handles DEMO_MODE logic), before anything is sent
+            logger.error("Failed to init calendar client: %s", exc)
             return JSONResponse(
                 status_code=400,
                 content={"status": "error", "message": f"Invalid OAuth config: {str(exc)}"}
             )
 
-        try:
-            created = cal.create_event(
-                summary=event["summary"],
-                start=event["start"],
-                end=event["end"]
-            )
+        except asyncio.TimeoutError:
+            logger.error("CONFIRM TIMEOUT after %ss", deadline)
+            return deadline_exceeded(deadline)
 
-            logger.info("🎉 Event Created Successfully: %s", created.get("id"))
-            return {"status": "ok", "created": created}
+        except OutboundQueueFull as exc:
+            logger.error("CONFIRM SHED: %s", exc)
+            return calendar_busy(f"Calendar is busy: {exc}")
 
-        except HttpError as gerr:
+        except CalendarAPIError as gerr:
             logger.error("Google API error: %s", gerr)
-            detail = gerr.content.decode() if hasattr(gerr, "content") else str(gerr)
+            signal = throttle_signal(gerr)
+            if signal is not None and signal.scope != TRANSIENT:
+                return calendar_busy(f"Google Calendar rate limit: {gerr.detail}", signal.retry_after)
             return JSONResponse(
                 status_code=500,
-                content={"status": "error", "message": f"Google API error: {detail}"}
+                content={"status": "error", "message": f"Google API error: {gerr.detail}"}
             )
 
         except Exception as exc:
@@ -93,3 +386,192 @@ def confirm(payload: ConfirmRequest):
     except Exception as exc:
         logger.exception("Unexpected confirm_event error")
         return JSONResponse(status_code=500, content={"status": "error", "message": str(exc)})
+
+
+# ===========================
+# 🔵 CONFIRM MANY EVENTS (BATCH)
+# ===========================
+@app.post("/confirm/batch")
+async def confirm_batch(
+    payload: ConfirmBatchRequest,
+    response: Response,
+    x_request_deadline: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+):
+    deadline = request_deadline(x_request_deadline)
+    events = payload.events
+
+    missing = [i for i, ev in enumerate(events) if not all(ev.get(k) for k in ("summary", "start", "end"))]
+    if missing:
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "message": f"Events missing summary/start/end at index {missing}"}
+        )
+
+    logger.debug("confirm_batch events=%d", len(events))
+
+    cancel = threading.Event()
+    round_trips = []
+
+    async def insert(todo):
+        # runs on after a timeout until `cancel` stops it, so it saves what it created itself
+        # the idempotency key doubles as the event id: an insert that
+        # reached Google before a timeout gets 409 when it is sent again
+        outcome = await get_calendar_client().create_events(
+            [dict(events[i], event_id=keys[i][0]) for i in todo], token_dict=payload.token_dict, cancel=cancel,
+        )
+        round_trips.append(outcome["round_trips"])
+        for i, r in zip(todo, outcome["results"]):
+            if r["status"] == "ok":
+                record_meeting(events[i], r["created"])
+        return outcome["results"]
+
+    try:
+        # Each event has its own key (the Idempotency-Key header plus its
+        # index, or its fingerprint): a retried batch replays the events
+        # already created and sends only the rest.
+        keys = batch_keys(events, payload.token_dict, idempotency_key)
+        with request_trace("confirm_batch"):
+            served = await with_deadline(idempotency_store().run_many(keys, insert), deadline)
+    except IdempotencyConflict as exc:
+        return JSONResponse(status_code=422, content={"status": "error", "message": str(exc)})
+    except OAuthConfigError as exc:
+        logger.error("Failed to init calendar client: %s", exc)
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "message": f"Invalid OAuth config: {str(exc)}"}
+        )
+    except asyncio.TimeoutError:
+        # stop between sub-batches; a retry with the same key sends only what is missing
+        cancel.set()
+        logger.error("CONFIRM BATCH TIMEOUT after %ss", deadline)
+        return deadline_exceeded(deadline)
+    except OutboundQueueFull as exc:
+        logger.error("CONFIRM BATCH SHED: %s", exc)
+        return calendar_busy(f"Calendar is busy: {exc}")
+    except Exception as exc:
+        logger.exception("Unexpected confirm_batch error")
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(exc)})
+
+    results = [result for result, _ in served]
+    replayed = sum(1 for _, how in served if how != EXECUTED)
+    response.headers["Idempotent-Replayed"] = "true" if served and replayed == len(served) else "false"
+    failed = sum(1 for r in results if r["status"] != "ok")
+    return {
+        "status": "ok" if not failed else ("partial" if failed < len(results) else "error"),
+        "created": len(results) - failed,
+        "failed": failed,
+        "replayed": replayed,
+        "round_trips": sum(round_trips),
+        "results": results,
+    }
+
+
+# ===========================
+# 🔵 ATTENDEE PROFILES (TIME ZONE, WORKING HOURS)
+# ===========================
+@app.post("/profile")
+def set_profile(req: ProfileRequest):
+    try:
+        profile = WorkProfile.from_strings(req.time_zone, req.working_hours, req.working_days)
+    except ValueError as exc:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(exc)})
+
+    # writes are queued: commit any earlier save of this user before reading it back
+    db.get_store().flush()
+    existing = db.get_user(req.email)["data"]
+    user = dict(existing[0] if existing else {}, email=req.email, timezone=req.time_zone,
+                working_hours=req.working_hours, working_days=list(profile.days))
+    db.save_user(user)
+    profile_directory().put(req.email, profile)
+    return {"status": "ok", "profile": user}
+
+
+# ===========================
+# 🔵 CALENDAR FILES (ICS IMPORT / EXPORT)
+# ===========================
+def _when(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+@app.post("/busy/import")
+async def import_busy(request: Request, calendar: Optional[str] = None, attendees: bool = True,
+                      time_zone: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None):
+    """Body: an .ics file (any size). Its events become busy time for
+    `calendar` and, unless attendees=false, for their organizer and
+    attendees. Recurring events are expanded over [start, end)."""
+    try:
+        lo, hi = _when(start), _when(end)
+        loader = ics.BusyLoader(
+            get_busy_source(), calendar=calendar, attendees=attendees, time_zone=time_zone,
+            start_min=to_epoch_min(lo) if lo else None, end_min=to_epoch_min(hi) if hi else None,
+        )
+    except ValueError as exc:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(exc)})
+
+    # parsed as it arrives, one body chunk at a time: the file is never held in memory
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    try:
+        with request_trace("busy_import"):
+            async for chunk in request.stream():
+                if chunk:
+                    await run_cpu(loader.feed, decoder.decode(chunk))
+            await run_cpu(loader.feed, decoder.decode(b"", final=True))
+            stats = await run_cpu(loader.close)
+        logger.info("busy import %s", stats)
+        return {"status": "ok", **stats}
+
+    except Exception as exc:
+        logger.exception("BUSY IMPORT ERROR: %s", exc)
+        return {
+            "status": "error",
+            "message": str(exc)
+        }
+
+
+@app.get("/meetings/export.ics")
+def export_meetings(start: Optional[str] = None, end: Optional[str] = None):
+    """Confirmed meetings overlapping [start, end) as one .ics file, streamed."""
+    try:
+        lo, hi = _when(start), _when(end)
+    except ValueError as exc:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(exc)})
+    store = db.get_store()
+    store.flush()
+    meetings = store.iter_meetings(int(lo.timestamp()) if lo else 0, int(hi.timestamp()) if hi else 2 ** 62)
+    return StreamingResponse(
+        ics.write_events(meetings),
+        media_type="text/calendar; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="meetings.ics"'},
+    )
+
+
+# ===========================
+# 🔵 OBSERVABILITY
+# ===========================
+@app.get("/ready")
+def ready():
+    status = warmup.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=dict(status, status="warming"))
+    return dict(status, status="ok")
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/debug/tracing")
+def get_tracing():
+    return {"status": "ok", "sample_rate": trace_sample_rate()}
+
+
+@app.post("/debug/tracing")
+def set_tracing(req: TracingRequest):
+    set_trace_sample_rate(req.sample_rate)
+    logger.info("trace sample_rate=%s", trace_sample_rate())
+    return {"status": "ok", "sample_rate": trace_sample_rate()}
@@ -0,0 +1,196 @@
+# backend/app/metrics.py
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.app.config import TRACE_SAMPLE_RATE
+
+logger = logging.getLogger("meeting_agent.trace")
+
+# Upper bounds in seconds; chosen to resolve both sub-millisecond parsing
+# stages and multi-second Google calls.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        i = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+_histograms: Dict[Tuple[str, str], Histogram] = {}
+_histograms_lock = threading.Lock()
+
+# Functions returning (metric name, labels, value) for counters kept elsewhere
+_collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]] = []
+
+
+def histogram(pipeline: str, stage_name: str) -> Histogram:
+    key = (pipeline, stage_name)
+    hist = _histograms.get(key)
+    if hist is None:
+        with _histograms_lock:
+            hist = _histograms.setdefault(key, Histogram())
+    return hist
+
+
+def register_collector(fn: Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]):
+    _collectors.append(fn)
+
+
+# ---------------------------------------------------------------------------
+# Sampled tracing. A trace is a list of (stage, seconds) for one request;
+# only sampled requests carry one, so unsampled requests pay nothing extra.
+
+_trace_sample_rate = TRACE_SAMPLE_RATE
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+# set while work that is not traffic (warm-up) runs; its timings are not recorded
+_muted: contextvars.ContextVar = contextvars.ContextVar("muted", default=False)
+
+
+def set_trace_sample_rate(rate: float):
+    global _trace_sample_rate
+    _trace_sample_rate = min(1.0, max(0.0, float(rate)))
+
+
+def trace_sample_rate() -> float:
+    return _trace_sample_rate
+
+
+class muted:
+    """Leave the histograms alone for the block (in this context only)."""
+
+    __slots__ = ("token",)
+
+    def __enter__(self):
+        self.token = _muted.set(True)
+        return self
+
+    def __exit__(self, *exc):
+        _muted.reset(self.token)
+        return False
+
+
+class stage:
+    """Time a block and feed the (pipeline, stage) histogram.
+
+        with stage("propose", "date_search"):
+            ...
+    """
+
+    __slots__ = ("hist", "name", "t0")
+
+    def __init__(self, pipeline: str, name: str):
+        self.hist = histogram(pipeline, name)
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        if not _muted.get():
+            self.hist.observe(elapsed)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.append((self.name, elapsed))
+        return False
+
+
+class request_trace:
+    """Wrap a whole request: records its total time and, if sampled, logs every stage."""
+
+    __slots__ = ("pipeline", "hist", "t0", "trace", "token")
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.hist = histogram(pipeline, "total")
+
+    def __enter__(self):
+        self.trace = [] if _trace_sample_rate and random.random() < _trace_sample_rate else None
+        self.token = _current_trace.set(self.trace)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.t0
+        if not _muted.get():
+            self.hist.observe(elapsed)
+        _current_trace.reset(self.token)
+        if self.trace is not None:
+            logger.info(
+                "trace pipeline=%s total_ms=%.3f error=%s %s",
+                self.pipeline, elapsed * 1000, exc_type.__name__ if exc_type else "-",
+                " ".join(f"{name}_ms={sec * 1000:.3f}" for name, sec in self.trace),
+            )
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Prometheus text exposition
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"' for k, v in sorted(labels.items()))
+    return "{" + body + "}"
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP meeting_agent_stage_seconds Time spent per pipeline stage.",
+        "# TYPE meeting_agent_stage_seconds histogram",
+    ]
+    with _histograms_lock:
+        items = sorted(_histograms.items())
+    for (pipeline, stage_name), hist in items:
+        counts, total, count = hist.snapshot()
+        labels = {"pipeline": pipeline, "stage": stage_name}
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"meeting_agent_stage_seconds_bucket{_labels(dict(labels, le=le))} {cumulative}")
+        lines.append(f"meeting_agent_stage_seconds_sum{_labels(labels)} {total}")
+        lines.append(f"meeting_agent_stage_seconds_count{_labels(labels)} {count}")
+
+    lines.append("# TYPE meeting_agent_trace_sample_rate gauge")
+    lines.append(f"meeting_agent_trace_sample_rate {_trace_sample_rate}")
+
+    for collect in _collectors:
+        try:
+            samples = list(collect())
+        except Exception:
+            logger.exception("metrics collector failed")
+            continue
+        for name, labels, value in samples:
+            lines.append(f"meeting_agent_{name}{_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _histograms_lock:
+        _histograms.clear()
@@ -0,0 +1,403 @@
+# backend/app/outbound.py
+# Paces writes to Google Calendar so bursts queue here instead of coming
+# back as 403 rateLimitExceeded / 429. Every call takes a token from its
+# user's bucket and from the project bucket; interactive confirms are
+# dispatched before bulk ones; a throttled response cuts the bucket's rate
+# (multiplicative decrease) and successes win it back (additive increase).
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from backend.app.metrics import histogram
+from backend.app.config import (
+    OUTBOUND_BACKOFF_S,
+    OUTBOUND_BURST_S,
+    OUTBOUND_MAX_ATTEMPTS,
+    OUTBOUND_MAX_BACKOFF_S,
+    OUTBOUND_MAX_QUEUE,
+    OUTBOUND_PROJECT_QPS,
+    OUTBOUND_USER_QPS,
+    OUTBOUND_WORKERS,
+)
+
+logger = logging.getLogger("calendar")
+
+INTERACTIVE, BULK = 0, 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# What a failed call says about quota
+USER, PROJECT, TRANSIENT = "user", "project", "transient"
+
+# Lowest rate a bucket is cut to, as a fraction of its configured rate
+MIN_RATE_FRACTION = 0.05
+# Rate regained per success, as a fraction of the configured rate
+RATE_STEP_FRACTION = 0.05
+# Jobs looked at per dispatch when the head of the queue is waiting on its user
+MAX_SCAN = 64
+
+
+class Throttle(NamedTuple):
+    scope: str
+    retry_after: Optional[float] = None
+
+
+class OutboundQueueFull(Exception):
+    """More calls are waiting than OUTBOUND_MAX_QUEUE."""
+
+
+def throttle_signal(exc: Exception) -> Optional[Throttle]:
+    """Read a Calendar API error: per-user limit, project limit, server error, or none of these."""
+    status = int(getattr(exc, "status", 0) or getattr(getattr(exc, "resp", None), "status", 0) or 0)
+    body = getattr(exc, "detail", None) or getattr(exc, "content", b"") or b""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    retry_after = getattr(exc, "retry_after", None)
+    if status in (403, 429) and "userratelimitexceeded" in body.lower():
+        return Throttle(USER, retry_after)
+    if status == 429 or (status == 403 and ("ratelimitexceeded" in body.lower() or "quotaexceeded" in body.lower())):
+        return Throttle(PROJECT, retry_after)
+    if status in (500, 502, 503, 504):
+        return Throttle(TRANSIENT, retry_after)
+    return None
+
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts to throttling (AIMD).
+
+    A call costing more than the bucket holds may still go once the bucket
+    is full; the balance goes negative and later calls wait it off.
+    """
+
+    __slots__ = ("max_rate", "rate", "capacity", "tokens", "stamp", "blocked_until", "streak")
+
+    def __init__(self, rate: float, burst_s: float, now: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = max(1.0, rate * burst_s)
+        self.tokens = self.capacity
+        self.stamp = now
+        self.blocked_until = 0.0
+        self.streak = 0
+
+    def _refill(self, now: float):
+        if now > self.stamp:
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """Seconds until `cost` can be taken; 0 means now."""
+        self._refill(now)
+        need = min(cost, self.capacity) - self.tokens
+        wait = need / self.rate if need > 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def take(self, cost: float, now: float):
+        self._refill(now)
+        self.tokens -= cost
+
+    def slow_down(self, now: float, delay: float):
+        self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+        self.blocked_until = max(self.blocked_until, now + delay)
+        self.streak += 1
+
+    def speed_up(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_STEP_FRACTION)
+        self.streak = 0
+
+
+class _Job:
+    __slots__ = ("user", "fn", "cost", "future", "enqueued", "not_before", "attempts")
+
+    def __init__(self, user, fn, cost, future, now):
+        self.user = user
+        self.fn = fn
+        self.cost = cost
+        self.future = future
+        self.enqueued = now
+        self.not_before = now
+        self.attempts = 0
+
+
+class OutboundScheduler:
+    """Priority queue of outbound calls drained by a worker pool at the rate the buckets allow.
+
+        created = await scheduler.submit(user_key, lambda: http_call(...), INTERACTIVE)
+
+    `fn` returns a fresh awaitable per attempt. Failures that
+    `classify` maps to a Throttle are retried up to max_attempts times;
+    anything else is raised to the caller at once.
+    """
+
+    def __init__(self, project_qps: float = OUTBOUND_PROJECT_QPS, user_qps: float = OUTBOUND_USER_QPS,
+                 burst_s: float = OUTBOUND_BURST_S, workers: int = OUTBOUND_WORKERS,
+                 max_attempts: int = OUTBOUND_MAX_ATTEMPTS, max_queue: int = OUTBOUND_MAX_QUEUE,
+                 backoff_s: float = OUTBOUND_BACKOFF_S, max_backoff_s: float = OUTBOUND_MAX_BACKOFF_S,
+                 classify: Callable[[Exception], Optional[Throttle]] = throttle_signal,
+                 max_users: int = 10000, clock: Callable[[], float] = time.monotonic,
+                 rand: Callable[[], float] = random.random):
+        self.user_qps = user_qps
+        self.burst_s = burst_s
+        self.workers = workers
+        self.max_attempts = max(1, max_attempts)
+        self.max_queue = max_queue
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.classify = classify
+        self.max_users = max_users
+        self.clock = clock
+        self.rand = rand
+
+        # buckets are shared with call_blocking, which runs on other threads
+        self._lock = threading.Lock()
+        self.project = TokenBucket(project_qps, burst_s, clock())
+        self._users: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+        self._heap: List[Tuple[int, int, _Job]] = []
+        self._seq = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running = set()
+
+        self.depth = {p: 0 for p in PRIORITY_NAMES}
+        self.metrics = {"submitted": 0, "dispatched": 0, "succeeded": 0, "failed": 0, "retried": 0,
+                        "rejected": 0, "throttled_user": 0, "throttled_project": 0, "transient": 0}
+        self.wait_hist = {p: histogram("outbound", f"wait_{name}") for p, name in PRIORITY_NAMES.items()}
+
+    # -- buckets ----------------------------------------------------------
+
+    def _user(self, user: str) -> TokenBucket:
+        bucket = self._users.get(user)
+        if bucket is None:
+            bucket = self._users[user] = TokenBucket(self.user_qps, self.burst_s, self.clock())
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user)
+        return bucket
+
+    def _reserve(self, user: str, cost: float, now: float) -> float:
+        """Take tokens from both buckets if both allow; otherwise how long to wait."""
+        bucket = self._user(user)
+        wait = max(self.project.wait_time(cost, now), bucket.wait_time(cost, now))
+        if wait <= 0:
+            self.project.take(cost, now)
+            bucket.take(cost, now)
+        return wait
+
+    def bulk_chunk(self) -> int:
+        """Most tokens one BULK job should cost: what a full bucket holds.
+
+        A costlier job would leave the buckets in debt, and interactive
+        calls behind it would wait the debt off however high their priority.
+        """
+        return max(1, int(min(self.project.capacity, self.user_qps * self.burst_s)))
+
+    def _backoff(self, streak: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff_s)
+        # exponential in consecutive throttles, full jitter
+        return self.rand() * min(self.max_backoff_s, self.backoff_s * 2 ** streak)
+
+    def _on_throttle(self, user: str, signal: Throttle) -> float:
+        """Feed a rate-limit signal back into the buckets; returns how long the call should wait."""
+        now = self.clock()
+        with self._lock:
+            if signal.scope == TRANSIENT:
+                self.metrics["transient"] += 1
+                return self._backoff(self.project.streak, signal.retry_after)
+            bucket = self.project if signal.scope == PROJECT else self._user(user)
+            self.metrics["throttled_project" if signal.scope == PROJECT else "throttled_user"] += 1
+            delay = self._backoff(bucket.streak, signal.retry_after)
+            bucket.slow_down(now, delay)
+        logger.info("outbound throttled scope=%s rate=%.2f/s delay=%.2fs", signal.scope, bucket.rate, delay)
+        return delay
+
+    def _on_success(self, user: str):
+        with self._lock:
+            self.metrics["succeeded"] += 1
+            self.project.speed_up()
+            self._user(user).speed_up()
+
+    # -- async queue ------------------------------------------------------
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # first use, or a new event loop (tests, benchmarks): the old
+            # loop's queue went with it
+            self._loop = loop
+            self._heap.clear()
+            self.depth = {p: 0 for p in PRIORITY_NAMES}
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.workers)
+            self._running = set()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def submit(self, user: str, fn: Callable[[], Awaitable], priority: int = INTERACTIVE, cost: float = 1):
+        self._ensure_started()
+        if len(self._heap) >= self.max_queue:
+            self.metrics["rejected"] += 1
+            raise OutboundQueueFull(f"{len(self._heap)} calendar calls already queued")
+        job = _Job(user, fn, cost, self._loop.create_future(), self.clock())
+        self._push(priority, next(self._seq), job)
+        self.metrics["submitted"] += 1
+        return await job.future
+
+    def _push(self, priority: int, seq: int, job: _Job):
+        heapq.heappush(self._heap, (priority, seq, job))
+        self.depth[priority] += 1
+        self._wakeup.set()
+
+    def _pick(self) -> Tuple[Optional[Tuple[int, int, _Job]], Optional[float]]:
+        """Highest-priority job whose buckets allow it now, else the shortest wait."""
+        now = self.clock()
+        skipped, wait = [], None
+        try:
+            with self._lock:
+                while self._heap and len(skipped) < MAX_SCAN:
+                    item = heapq.heappop(self._heap)
+                    job = item[2]
+                    if job.future.done():  # caller gave up (deadline, disconnect)
+                        self.depth[item[0]] -= 1
+                        continue
+                    w = job.not_before - now
+                    if w <= 0:
+                        w = self._reserve(job.user, job.cost, now)
+                    if w <= 0:
+                        self.depth[item[0]] -= 1
+                        return item, None
+                    skipped.append(item)
+                    wait = w if wait is None else min(wait, w)
+                    if self.project.wait_time(job.cost, now) > 0:
+                        break  # nobody gets past the project bucket either
+            return None, wait
+        finally:
+            for item in skipped:
+                heapq.heappush(self._heap, item)
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            while True:
+                item, wait = self._pick()
+                if item is not None:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+            priority, seq, job = item
+            self.wait_hist[priority].observe(self.clock() - job.enqueued)
+            self.metrics["dispatched"] += 1
+            task = self._loop.create_task(self._run(priority, seq, job))
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self._running.discard(task)
+        self._slots.release()
+
+    async def _run(self, priority: int, seq: int, job: _Job):
+        try:
+            result = await job.fn()
+        except Exception as exc:
+            signal = self.classify(exc)
+            job.attempts += 1
+            if signal is None or job.attempts >= self.max_attempts or job.future.done():
+                self.metrics["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(exc)
+                return
+            # back in at its old place in line, held until the backoff passes
+            delay = self._on_throttle(job.user, signal)
+            self.metrics["retried"] += 1
+            job.enqueued = job.not_before = self.clock() + delay
+            self._push(priority, seq, job)
+            return
+        self._on_success(job.user)
+        if not job.future.done():
+            job.future.set_result(result)
+
+    # -- blocking callers -------------------------------------------------
+
+    def call_blocking(self, user: str, fn: Callable[[], object], cost: float = 1):
+        """Same buckets and backoff for synchronous code (googleapiclient .execute()).
+
+        Runs on the calling thread and does not queue behind async jobs.
+        """
+        for attempt in range(self.max_attempts):
+            while True:
+                with self._lock:
+                    wait = self._reserve(user, cost, self.clock())
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+            try:
+                result = fn()
+            except Exception as exc:
+                signal = self.classify(exc)
+                if signal is None or attempt + 1 == self.max_attempts:
+                    with self._lock:
+                        self.metrics["failed"] += 1
+                    raise
+                with self._lock:
+                    self.metrics["retried"] += 1
+                time.sleep(self._on_throttle(user, signal))
+                continue
+            self._on_success(user)
+            return result
+
+    def record(self, user: str, signal: Throttle):
+        """A throttle seen outside submit/call_blocking (e.g. inside a batch response)."""
+        self._on_throttle(user, signal)
+
+    # -- introspection ----------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self.metrics,
+                queue_depth={PRIORITY_NAMES[p]: n for p, n in self.depth.items()},
+                in_flight=len(self._running),
+                project_rate=self.project.rate,
+                users=len(self._users),
+            )
+
+    def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        self._loop = None
+
+
+_scheduler: Optional[OutboundScheduler] = None
+
+
+def set_outbound_scheduler(scheduler: Optional[OutboundScheduler]):
+    global _scheduler
+    _scheduler = scheduler
+
+
+def outbound_scheduler() -> OutboundScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = OutboundScheduler()
+    return _scheduler
+
+
+def outbound_stats() -> Optional[Dict]:
+    return _scheduler.stats() if _scheduler is not None else None
+
+
+def shutdown():
+    if _scheduler is not None:
+        _scheduler.close()
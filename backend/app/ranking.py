@@ -0,0 +1,238 @@
+# backend/app/ranking.py
+# Scores every candidate start in the search window at once. A feature maps
+# the whole candidate array to scores in [0, 1], higher is better; a slot's
+# score is the weighted mean of its features, with weights from RANK_WEIGHTS.
+
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.app.config import (
+    RANK_BUFFER_MIN,
+    RANK_POOL_FACTOR,
+    RANK_PREFERRED_HOURS,
+    RANK_SAME_DAY_PENALTY,
+    RANK_TIME_OF_DAY_WIDTH_MIN,
+    RANK_WEIGHTS,
+)
+from backend.app.recurrence import conflicts
+from backend.app.timezones import WorkProfile, offset_table, parse_hours
+
+
+def _zone_offsets(tz: str, starts: np.ndarray, start_min: int, end_min: int) -> np.ndarray:
+    """UTC offset in force at each (ascending) start; a zone changes offset a
+    handful of times a year, so this is one run per offset, not a lookup per start."""
+    trans, offsets = offset_table(tz, start_min, end_min)
+    cuts = np.searchsorted(starts, trans[1:], side="left")
+    return np.repeat(offsets, np.diff(np.concatenate(([0], cuts, [len(starts)]))))
+
+
+def _count_below(keys: np.ndarray, values: np.ndarray, inclusive: bool) -> np.ndarray:
+    """For ascending keys, how many ascending values are < each key (<= if inclusive).
+
+    Same as np.searchsorted(values, keys), but bisects the (usually fewer)
+    values into the keys and counts, which is much cheaper for 10k keys.
+    """
+    pos = np.searchsorted(keys, values, side="left" if inclusive else "right")
+    return np.cumsum(np.bincount(pos, minlength=len(keys) + 1))[:len(keys)]
+
+
+class Candidates(NamedTuple):
+    starts: np.ndarray        # feasible starts, epoch minutes, ascending
+    duration_min: int
+    origin: int               # the requested start
+    window_min: int
+    busy_starts: np.ndarray   # attendees' meetings (not off-hours), see recurrence.merge_busy
+    busy_reach: np.ndarray
+    zones: Tuple[str, ...]    # organizer's zone first, then each attendee zone once
+    profiles: Tuple[WorkProfile, ...]
+    local_index: Dict[str, np.ndarray]  # zone -> local minute of day + 1440 at each start, see by_local_time
+    organizer_day: np.ndarray  # local date of each start in the organizer's zone, as days since the epoch
+
+    @classmethod
+    def build(cls, starts: np.ndarray, duration_min: int, origin: int, window_min: int,
+              busy_starts: np.ndarray, busy_reach: np.ndarray, zones: Iterable[str],
+              profiles: Iterable[WorkProfile]) -> "Candidates":
+        zones, profiles = tuple(zones), tuple(set(profiles))
+        day_minute = starts % 1440 + 1440
+        local_index, organizer_day = {}, None
+        for tz in set(zones) | {p.tz for p in profiles}:
+            offsets = _zone_offsets(tz, starts, origin, origin + window_min)
+            # offsets are within +-24h, so this indexes three copies of a
+            # 1440-entry table without a modulo per start
+            local_index[tz] = day_minute + offsets
+            if tz == zones[0]:
+                organizer_day = (starts + offsets) // 1440
+        return cls(starts, duration_min, origin, window_min, busy_starts, busy_reach,
+                   zones, profiles, local_index, organizer_day)
+
+    def by_local_time(self, tz: str, table: np.ndarray) -> np.ndarray:
+        """table[local minute of day] for each start; table is a day's 1440 entries tiled three times."""
+        return table[self.local_index[tz]]
+
+
+Feature = Callable[[Candidates], np.ndarray]
+FEATURES: Dict[str, Feature] = {}
+
+
+def feature(name: str):
+    """Register a scoring feature under `name`; give it a weight in RANK_WEIGHTS to use it."""
+    def register(fn: Feature) -> Feature:
+        FEATURES[name] = fn
+        return fn
+    return register
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """"earliness=1,buffer=0.5" -> {"earliness": 1.0, "buffer": 0.5}."""
+    weights = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        weights[name.strip()] = float(value) if value.strip() else 1.0
+    return weights
+
+
+DEFAULT_WEIGHTS = parse_weights(RANK_WEIGHTS)
+_MINUTES = np.arange(1440)
+_PREFERRED = parse_hours(RANK_PREFERRED_HOURS)
+
+
+# -- features ---------------------------------------------------------------
+# Features that only depend on the local time of day score the 1440 minutes
+# of a day once per duration (cached) and look each candidate up, instead of
+# doing the arithmetic per candidate.
+
+@feature("earliness")
+def earliness(c: Candidates) -> np.ndarray:
+    """Sooner is better, falling linearly to 0 at the end of the window."""
+    return 1.0 - (c.starts - c.origin) / max(1, c.window_min)
+
+
+@lru_cache(maxsize=256)
+def _time_of_day_table(duration_min: int) -> np.ndarray:
+    lo, hi = _PREFERRED
+    spill = np.maximum(0, np.maximum(lo - _MINUTES, _MINUTES + duration_min - hi)) / RANK_TIME_OF_DAY_WIDTH_MIN
+    return np.tile(np.exp(-spill * spill), 3)
+
+
+@feature("time_of_day")
+def time_of_day(c: Candidates) -> np.ndarray:
+    """1 while the meeting lies inside RANK_PREFERRED_HOURS, falling off as a
+    Gaussian in the minutes it spills over; averaged over every zone involved."""
+    table = _time_of_day_table(c.duration_min)
+    return sum(c.by_local_time(tz, table) for tz in c.zones) / len(c.zones)
+
+
+@feature("buffer")
+def buffer(c: Candidates) -> np.ndarray:
+    """Free time on either side of the slot, each side capped at RANK_BUFFER_MIN."""
+    n = len(c.busy_starts)
+    if not n:
+        return np.ones(len(c.starts))
+    cap = max(1, RANK_BUFFER_MIN)
+    # Candidates are free, so no meeting starts inside [start, end): the
+    # meetings starting at or before the slot end before it (their latest
+    # end is the reach), and the next one starts at or after its end.
+    before = _count_below(c.starts, c.busy_starts, inclusive=True)
+    gap_before = np.where(before > 0, c.starts - c.busy_reach[np.maximum(before - 1, 0)], cap)
+    gap_after = np.where(before < n, c.busy_starts[np.minimum(before, n - 1)] - c.starts - c.duration_min, cap)
+    return (np.clip(gap_before, 0, cap) + np.clip(gap_after, 0, cap)) / (2 * cap)
+
+
+@lru_cache(maxsize=1024)
+def _attendee_hours_table(profile: WorkProfile, duration_min: int) -> np.ndarray:
+    into = (_MINUTES - profile.start_min) % 1440
+    span = (profile.end_min - profile.start_min) % 1440 or 1440
+    margin = np.minimum(into, span - into - duration_min)
+    return np.tile(np.clip(margin, 0, 60) / 60, 3)
+
+
+@feature("attendee_hours")
+def attendee_hours(c: Candidates) -> np.ndarray:
+    """Distance from the edges of each attendee's working day, capped at an hour.
+
+    Attendees without a profile have no working day and score 1.
+    """
+    if not c.profiles:
+        return np.ones(len(c.starts))
+    return sum(c.by_local_time(p.tz, _attendee_hours_table(p, c.duration_min)) for p in c.profiles) / len(c.profiles)
+
+
+# -- candidates, scoring and selection ---------------------------------------
+
+def candidate_starts(origin: int, window_min: int, duration_min: int, step_min: int,
+                     blocked_starts: np.ndarray, blocked_reach: np.ndarray) -> np.ndarray:
+    """Every start on the step grid in the window whose slot clears everything blocked.
+
+    The grid is the epoch-minute multiples of step_min, so an origin of
+    10:02 gives 10:15, 10:30, ... rather than 10:17, 10:32, ...
+    """
+    step = max(1, step_min)
+    first = -(-origin // step) * step
+    grid = np.arange(first, origin + max(0, window_min - duration_min) + 1, step, dtype=np.int64)
+    return grid[~conflicts(grid, duration_min, blocked_starts, blocked_reach)]
+
+
+def score(c: Candidates, weights: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """(weighted score per candidate, {feature: its scores}) for the features with a non-zero weight."""
+    weights = {k: w for k, w in (DEFAULT_WEIGHTS if weights is None else weights).items() if w}
+    unknown = set(weights) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown ranking feature(s): {', '.join(sorted(unknown))}")
+    if not weights:
+        return np.zeros(len(c.starts)), {}
+    parts = {}
+    total = np.zeros(len(c.starts))
+    for name, weight in weights.items():
+        parts[name] = FEATURES[name](c)
+        total += weight * parts[name]
+    total /= sum(weights.values())
+    return total, parts
+
+
+def _best_per_day(days: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """Index of the first top-scoring candidate of each day; days is non-decreasing."""
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1))
+    best = np.maximum.reduceat(scores, bounds)
+    idx = np.flatnonzero(scores == np.repeat(best, np.diff(np.concatenate((bounds, [len(days)])))))
+    return idx[np.concatenate(([True], days[idx][1:] != days[idx][:-1]))]
+
+
+def top_k(c: Candidates, scores: np.ndarray, k: int) -> List[int]:
+    """Indices of the k best non-overlapping candidates, best first.
+
+    Only the best k * RANK_POOL_FACTOR plus each day's best are ordered
+    (np.argpartition finds them without sorting the rest). From that pool
+    each pick is the best remaining score minus RANK_SAME_DAY_PENALTY per
+    option already chosen on the same day in the organizer's zone, so
+    options spread across days. The pool grows if overlaps use it up before
+    k are found.
+    """
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return []
+    days = c.organizer_day
+    day_best = _best_per_day(days, scores)
+    pool_size = min(n, k * max(1, RANK_POOL_FACTOR))
+    while True:
+        if pool_size < n:
+            pool = np.union1d(np.argpartition(-scores, pool_size - 1)[:pool_size], day_best)
+        else:
+            pool = np.arange(n)
+        pool = pool[np.lexsort((c.starts[pool], -scores[pool]))]  # best first, earlier on ties
+
+        chosen: List[int] = []
+        open_ = np.ones(len(pool), dtype=bool)
+        adjusted = scores[pool].astype(float)
+        while len(chosen) < k and open_.any():
+            best = int(np.argmax(np.where(open_, adjusted, -np.inf)))
+            pick = int(pool[best])
+            chosen.append(pick)
+            open_ &= np.abs(c.starts[pool] - c.starts[pick]) >= c.duration_min
+            adjusted -= RANK_SAME_DAY_PENALTY * (days[pool] == days[pick])
+        if len(chosen) == k or pool_size == n:
+            return chosen
+        pool_size = min(n, pool_size * 4)
@@ -0,0 +1,229 @@
+# backend/app/recurrence.py
+
+import itertools
+import re
+from datetime import datetime, timezone
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.app.availability import to_epoch_min
+from backend.app.date_grammar import NUMBER_WORDS, WEEKDAYS
+
+# Recurring requests ("every Tuesday at 10 for the next 6 months") become an
+# RFC 5545 RRULE. Occurrences are expanded lazily, a chunk at a time, and
+# checked against merged busy intervals with a binary search each, so a long
+# horizon costs nothing until it is actually walked.
+
+FREQS = {"day": "DAILY", "weekday": "WEEKLY", "week": "WEEKLY", "month": "MONTHLY", "year": "YEARLY"}
+ADVERBS = {
+    "daily": ("DAILY", 1), "weekly": ("WEEKLY", 1), "biweekly": ("WEEKLY", 2), "fortnightly": ("WEEKLY", 2),
+    "monthly": ("MONTHLY", 1), "yearly": ("YEARLY", 1), "annually": ("YEARLY", 1),
+}
+BYDAY = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+WORKWEEK = (0, 1, 2, 3, 4)
+
+_COUNT = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+_DAY = r"(?:" + "|".join(sorted(WEEKDAYS, key=len, reverse=True)) + r")s?"
+
+EVERY_DAYS_RE = re.compile(r"\b(?:every\s+(other\s+)?|on\s+)(" + _DAY + r"(?:\s*(?:,|and|&)\s*" + _DAY + r")*)\b")
+EVERY_UNIT_RE = re.compile(r"\bevery\s+(other\s+)?(?:" + _COUNT + r"\s+)?(day|weekday|week|month|year)s?\b")
+ADVERB_RE = re.compile(r"\b(" + "|".join(ADVERBS) + r")\b")
+WEEKDAY_NAME_RE = re.compile(r"\b(" + "|".join(sorted(WEEKDAYS, key=len, reverse=True)) + r")s?\b")
+FOR_SPAN_RE = re.compile(r"\bfor\s+(?:the\s+)?(?:next\s+)?" + _COUNT + r"\s+(week|month|year)s?\b")
+FOR_COUNT_RE = re.compile(r"\bfor\s+(\d+)\s+(?:occurrences|times|sessions|meetings|weeks running)\b")
+UNTIL_RE = re.compile(r"\buntil\s+(\d{4})-(\d{2})-(\d{2})\b")
+# Cheap screen so prompts with no recurrence words skip the patterns above
+TRIGGER_RE = re.compile(r"every|daily|weekly|biweekly|fortnightly|monthly|yearly|annually|days\b")
+
+
+class Recurrence(NamedTuple):
+    freq: str                       # DAILY, WEEKLY, MONTHLY or YEARLY
+    interval: int = 1
+    byweekday: Tuple[int, ...] = ()  # Monday == 0
+    count: Optional[int] = None
+    span: Optional[Tuple[int, str]] = None  # "for the next 6 months" -> (6, "month")
+    until: Optional[datetime] = None
+
+    def until_for(self, dtstart: datetime) -> Optional[datetime]:
+        if self.until is not None:
+            return self.until
+        if self.span is not None:
+            from dateutil.relativedelta import relativedelta
+
+            n, unit = self.span
+            return dtstart + relativedelta(**{unit + "s": n})
+        return None
+
+    def rrule_line(self, dtstart: datetime) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval > 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.byweekday:
+            parts.append("BYDAY=" + ",".join(BYDAY[d] for d in self.byweekday))
+        if self.count:
+            parts.append(f"COUNT={self.count}")
+        else:
+            until = self.until_for(dtstart)
+            if until is not None:
+                parts.append("UNTIL=" + until.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ"))
+        return "RRULE:" + ";".join(parts)
+
+    def rrule(self, dtstart: datetime):
+        from dateutil import rrule
+
+        return rrule.rrule(
+            getattr(rrule, self.freq),
+            dtstart=dtstart,
+            interval=self.interval,
+            byweekday=self.byweekday or None,
+            count=self.count,
+            until=None if self.count else self.until_for(dtstart),
+        )
+
+
+def _number(token: Optional[str]) -> int:
+    if not token:
+        return 1
+    return NUMBER_WORDS.get(token) or int(token)
+
+
+def parse_recurrence(text: str) -> Tuple[Optional[Recurrence], str]:
+    """Find a recurrence in a lower-cased prompt.
+
+    Returns the recurrence (or None) and the prompt with the recurrence words
+    removed, leaving one weekday name in place so the date parser still
+    finds the first occurrence.
+    """
+    if not TRIGGER_RE.search(text):
+        return None, text
+
+    spans: List[Tuple[int, int, str]] = []
+    rule = None
+
+    # "every tuesday", or a plural "on tuesdays"; a bare "on tuesday" is a single date
+    m = next((m for m in EVERY_DAYS_RE.finditer(text)
+              if m.group(0).startswith("every") or re.search(r"days\b", m.group(2))), None)
+    if m:
+        days = tuple(sorted({WEEKDAYS[d] for d in WEEKDAY_NAME_RE.findall(m.group(2))}))
+        rule = Recurrence("WEEKLY", 2 if m.group(1) else 1, days)
+        spans.append((m.start(), m.end(), WEEKDAY_NAME_RE.search(m.group(2)).group(1)))
+    else:
+        m = EVERY_UNIT_RE.search(text)
+        if m:
+            other, count, unit = m.groups()
+            rule = Recurrence(FREQS[unit], 2 if other else _number(count), WORKWEEK if unit == "weekday" else ())
+            spans.append((m.start(), m.end(), ""))
+        else:
+            m = ADVERB_RE.search(text)
+            if m:
+                freq, interval = ADVERBS[m.group(1)]
+                rule = Recurrence(freq, interval)
+                spans.append((m.start(), m.end(), ""))
+
+    if rule is None:
+        return None, text
+    if rule.interval < 1:
+        # dateutil would look for the next occurrence forever
+        raise ValueError("A series has to repeat at least every 1 day, week, month or year")
+
+    m = UNTIL_RE.search(text)
+    if m:
+        y, mo, d = (int(g) for g in m.groups())
+        rule = rule._replace(until=datetime(y, mo, d, 23, 59, tzinfo=timezone.utc))
+        spans.append((m.start(), m.end(), ""))
+    else:
+        m = FOR_COUNT_RE.search(text)
+        if m:
+            rule = rule._replace(count=int(m.group(1)))
+            spans.append((m.start(), m.end(), ""))
+        else:
+            m = FOR_SPAN_RE.search(text)
+            if m:
+                rule = rule._replace(span=(_number(m.group(1)), m.group(2)))
+                spans.append((m.start(), m.end(), ""))
+
+    rest = text
+    for start, end, keep in sorted(spans, reverse=True):
+        rest = rest[:start] + f" {keep} " + rest[end:]
+    return rule, " ".join(rest.split())
+
+
+def occurrence_minutes(rule: Recurrence, dtstart: datetime, stop: datetime, chunk: int = 16) -> Iterator[np.ndarray]:
+    """Lazily yield occurrence starts up to `stop`, as epoch-minute arrays of up to `chunk`."""
+    it = itertools.takewhile(lambda dt: dt <= stop, rule.rrule(dtstart))
+    while True:
+        block = list(itertools.islice(it, chunk))
+        if not block:
+            return
+        yield np.fromiter((to_epoch_min(dt) for dt in block), dtype=np.int64, count=len(block))
+
+
+def merge_busy(intervals) -> Tuple[np.ndarray, np.ndarray]:
+    """Everyone's busy intervals as sorted starts plus the running max of ends."""
+    arrays = [a for a in intervals.values() if len(a)]
+    if not arrays:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    iv = np.concatenate(arrays)
+    iv = iv[np.argsort(iv[:, 0], kind="stable")]
+    return iv[:, 0], np.maximum.accumulate(iv[:, 1])
+
+
+def conflicts(starts: np.ndarray, duration_min: int, busy_starts: np.ndarray, busy_reach: np.ndarray) -> np.ndarray:
+    """True where [start, start + duration) overlaps any busy interval.
+
+    The last busy interval starting before the window ends is found by
+    bisection; the window is clear unless something before it reaches past
+    the window start.
+    """
+    if not len(busy_starts):
+        return np.zeros(starts.shape, dtype=bool)
+    idx = np.searchsorted(busy_starts, starts + duration_min, side="left")
+    return (idx > 0) & (busy_reach[np.maximum(idx - 1, 0)] > starts)
+
+
+class RecurringCandidate(NamedTuple):
+    shift_min: int
+    checked: int
+    conflicts: int
+    first_conflicts: List[int]      # epoch minutes of the first few clashes
+
+
+def rank_recurring(
+    occurrences: Iterator[np.ndarray],
+    duration_min: int,
+    shifts: np.ndarray,
+    busy_starts: np.ndarray,
+    busy_reach: np.ndarray,
+    max_conflicts: int,
+    max_conflict_rate: float = 1.0,
+) -> List[RecurringCandidate]:
+    """Score the same series at several start shifts by how many occurrences clash.
+
+    A shift is dropped as soon as it has more than max_conflicts clashes and
+    more than max_conflict_rate of the occurrences seen so far, and expansion
+    stops once every shift is dropped. Survivors come back sorted by
+    conflicts, then by shift.
+    """
+    shifts = np.asarray(shifts, dtype=np.int64)
+    counts = np.zeros(len(shifts), dtype=np.int64)
+    alive = np.ones(len(shifts), dtype=bool)
+    first: List[List[int]] = [[] for _ in shifts]
+    checked = 0
+
+    for block in occurrences:
+        idx = np.flatnonzero(alive)
+        starts = block[None, :] + shifts[idx, None]
+        hit = conflicts(starts, duration_min, busy_starts, busy_reach)
+        counts[idx] += hit.sum(axis=1)
+        for row in np.flatnonzero(hit.any(axis=1)):
+            sample = first[idx[row]]
+            if len(sample) < 3:
+                sample.extend(starts[row][hit[row]][: 3 - len(sample)].tolist())
+        checked += len(block)
+        alive[idx] = counts[idx] <= max(max_conflicts, max_conflict_rate * checked)
+        if not alive.any():
+            break
+
+    order = sorted(np.flatnonzero(alive).tolist(), key=lambda i: (counts[i], shifts[i]))
+    return [RecurringCandidate(int(shifts[i]), checked, int(counts[i]), first[i]) for i in order]
@@ -1,9 +1,50 @@
 # backend/app/scheduler_engine.py
 
 import re
-import dateparser
-from datetime import timedelta
-from typing import List, Dict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from backend.app.availability import (
+    BusySource,
+    busy_mask,
+    from_epoch_min,
+    iter_free_windows,
+    to_epoch_min,
+)
+from backend.app.date_grammar import parse_when, resolve
+from backend.app.metrics import stage
+from backend.app.ranking import Candidates, candidate_starts, score, top_k
+from backend.app.recurrence import (
+    Recurrence,
+    conflicts,
+    merge_busy,
+    occurrence_minutes,
+    parse_recurrence,
+    rank_recurring,
+)
+from backend.app.timezones import (
+    WorkProfile,
+    local_span,
+    off_hours_intervals,
+    profile_directory,
+    shared_working_mask,
+    zone,
+)
+from backend.app.config import (
+    BUSY_SOURCE,
+    DEFAULT_TIMEZONE,
+    RECURRENCE_CANDIDATE_HOURS,
+    RECURRENCE_HORIZON_DAYS,
+    RECURRENCE_MAX_CONFLICT_RATE,
+    RECURRENCE_MAX_CONFLICTS,
+    RANK_STEP_MIN,
+    RANK_WINDOW_DAYS,
+    SEARCH_FIRST_CHUNK_DAYS,
+    SEARCH_HORIZON_DAYS,
+    SLOT_STEP_MIN,
+)
 
 EMAIL_RE = re.compile(r"([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)")
 
@@ -22,38 +63,307 @@ def extract_duration(text: str) -> int:
     return 30  # default
 
 
-def find_date_window(text: str):
-    settings = {"PREFER_DATES_FROM": "future", "RETURN_AS_TIMEZONE_AWARE": True}
+def find_date_window(text: str, time_zone: Optional[str] = None, now: Optional[datetime] = None):
+    now = now or datetime.now(zone(time_zone or DEFAULT_TIMEZONE))
+
+    dt = parse_when(text, now)
+    if dt is not None:
+        return dt
+
+    # nothing in the prompt: tomorrow 10am
+    return resolve(("days", 1, None), now)
+
+
+_busy_source: Optional[BusySource] = None
+
+
+def set_busy_source(source: BusySource):
+    global _busy_source
+    _busy_source = source
+
+
+def get_busy_source() -> BusySource:
+    global _busy_source
+    if _busy_source is None:
+        if BUSY_SOURCE == "google":
+            from backend.app.calendar_cache import BusyIntervalCache, GoogleEventsAPI, set_busy_cache
+            from backend.app.calendar_tool import GoogleCalendarTool
+            _busy_source = BusyIntervalCache(GoogleEventsAPI(GoogleCalendarTool({})))
+            set_busy_cache(_busy_source)
+        elif BUSY_SOURCE == "freebusy":
+            from backend.app.calendar_tool import GoogleCalendarTool
+            _busy_source = GoogleCalendarTool({})
+        else:
+            from backend.app.db import StoredBusySource
+            _busy_source = StoredBusySource()
+    return _busy_source
+
+
+def render_slot(start: datetime, end: datetime, time_zone: str, profiles: Dict[str, WorkProfile]) -> dict:
+    """Slot in the organizer's zone, plus the same span in each attendee's zone."""
+    zones = {p.tz for p in profiles.values()} - {time_zone}
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "human": local_span(start, end, time_zone),
+        "local": {tz: local_span(start, end, tz) for tz in sorted(zones)},
+    }
+
+
+def iter_free_slots(source: BusySource, emails: List[str], profiles: Dict[str, WorkProfile],
+                    start_min: int, duration_min: int) -> Iterator[int]:
+    """Yield offsets of free windows from start_min, searching the horizon in growing chunks.
+
+    Busy time is read once; the bitmaps are built and scanned one chunk at a
+    time, the first SEARCH_FIRST_CHUNK_DAYS long and each next one four times
+    the last, so an early slot goes out without building the whole horizon.
+    Windows stay on the epoch-minute multiples of SLOT_STEP_MIN and never
+    overlap across chunks.
+    """
+    horizon = SEARCH_HORIZON_DAYS * 1440
+    step = max(1, SLOT_STEP_MIN)
+
+    with stage("propose", "busy_lookup"):
+        intervals = source.busy_intervals(emails, start_min, start_min + horizon)
+        arrays = [a for a in intervals.values() if len(a)]
+        everyone = {"all": np.concatenate(arrays)} if arrays else {}
+
+    chunk_start, size, next_allowed = 0, SEARCH_FIRST_CHUNK_DAYS * 1440, 0
+    while chunk_start < horizon:
+        chunk_end = min(horizon, chunk_start + size)
+        lo, hi = start_min + chunk_start, start_min + min(horizon, chunk_end + duration_min)
+
+        with stage("propose", "working_hours"):
+            working = shared_working_mask(profiles.values(), lo, hi)
+        with stage("propose", "slot_generation"):
+            busy = busy_mask(everyone, lo, hi)
+            if working is not None:
+                busy |= ~working
+            first = -(-(start_min + max(chunk_start, next_allowed)) // step) * step - lo
+            windows = iter_free_windows(busy, duration_min, step, first)
+
+        for offset in windows:
+            if offset >= chunk_end - chunk_start:
+                break  # starts in the next chunk; found there
+            next_allowed = chunk_start + offset + duration_min
+            yield chunk_start + offset
+
+        # Each chunk costs a fixed few hundred microseconds on top of its
+        # length, so grow fast and fold a short tail into the last chunk.
+        chunk_start, size = chunk_end, size * 4
+        if horizon - chunk_start < size * 2:
+            size = horizon
+
 
-    result = dateparser.search.search_dates(text, settings=settings)
-    if result:
-        return result[0][1]
+def iter_proposal(prompt: str, n_slots: int = 3, busy_source: Optional[BusySource] = None,
+                  time_zone: Optional[str] = None, now: Optional[datetime] = None) -> Iterator[dict]:
+    """Yield the parsed intent first, then each slot as soon as it is found.
 
-    return dateparser.parse("tomorrow 10am", settings=settings)
+    Ranked slots (RANK_WINDOW_DAYS > 0) all come out once the window is
+    scored; with ranking off, each free slot goes out as the search reaches it.
 
+    Items are {"type": "intent", ...} followed by {"type": "slot", "index": i, ...}.
+    Raises ValueError when nothing can be proposed.
+    """
+    time_zone = time_zone or DEFAULT_TIMEZONE
+    tz = zone(time_zone)
+    now = (now or datetime.now(tz)).astimezone(tz)
 
-def propose_slots(prompt: str, n_slots: int = 3):
-    duration_min = extract_duration(prompt)
-    emails = extract_emails(prompt)
+    with stage("propose", "duration_extraction"):
+        duration_min = extract_duration(prompt)
+    if duration_min < 1:
+        raise ValueError("A meeting has to last at least a minute")
+    with stage("propose", "email_extraction"):
+        emails = extract_emails(prompt)
 
-    start_dt = find_date_window(prompt)
+    with stage("propose", "recurrence_extraction"):
+        rule, when_text = parse_recurrence(prompt.lower())
+
+    with stage("propose", "date_search"):
+        start_dt = find_date_window(when_text, time_zone, now)
     if start_dt is None:
         raise ValueError("Could not parse date")
 
-    cursor = start_dt.replace(second=0, microsecond=0)
+    # "today at 9am" asked at 22:47: search from now, never before it. A
+    # series keeps its time of day and starts on the next day instead.
+    if rule is not None:
+        while start_dt < now:
+            start_dt += timedelta(days=1)
+    cursor = max(start_dt, now).astimezone(tz).replace(second=0, microsecond=0)
+    if rule is not None and start_dt <= now:
+        # "daily standup today" has no time of day: start the series on the
+        # slot grid, not at the current minute
+        step = max(1, SLOT_STEP_MIN)
+        cursor = from_epoch_min(-(-to_epoch_min(cursor) // step) * step, tz)
+    source = busy_source if busy_source is not None else get_busy_source()
 
-    slots = []
-    for i in range(n_slots):
-        start = cursor + timedelta(hours=i)
-        end = start + timedelta(minutes=duration_min)
-        slots.append({
-            "start": start.isoformat(),
-            "end": end.isoformat(),
-            "human": f"{start.strftime('%Y-%m-%d %H:%M')} - {end.strftime('%H:%M')} (Asia/Kolkata)"
-        })
+    with stage("propose", "profile_lookup"):
+        profiles = profile_directory().lookup(emails)
 
-    return {
+    start_min = to_epoch_min(cursor)
+    yield {
+        "type": "intent",
         "summary": "Meeting",
         "emails": emails,
-        "slots": slots
+        "duration_min": duration_min,
+        "window": {
+            "start": cursor.isoformat(),
+            "end": from_epoch_min(start_min + SEARCH_HORIZON_DAYS * 1440, tz).isoformat(),
+        },
+        "time_zone": time_zone,
+        "attendee_time_zones": {email: p.tz for email, p in profiles.items()},
+        "recurrence": rule.rrule_line(cursor) if rule is not None else None,
     }
+
+    if rule is not None:
+        slots = propose_recurring(rule, cursor, duration_min, emails, n_slots, source, time_zone, profiles)
+        for i, slot in enumerate(slots):
+            yield dict(slot, type="slot", index=i)
+        return
+
+    if RANK_WINDOW_DAYS > 0:
+        slots = propose_ranked(source, emails, profiles, start_min, duration_min, n_slots, time_zone)
+        if not slots:
+            raise ValueError(f"No common free time in the next {SEARCH_HORIZON_DAYS} days")
+        for i, slot in enumerate(slots):
+            yield dict(slot, type="slot", index=i)
+        return
+
+    found = 0
+    for offset in iter_free_slots(source, emails, profiles, start_min, duration_min):
+        start = from_epoch_min(start_min + offset, tz)
+        end = from_epoch_min(start_min + offset + duration_min, tz)
+        yield dict(render_slot(start, end, time_zone, profiles), type="slot", index=found)
+        found += 1
+        if found == n_slots:
+            return
+    if not found:
+        raise ValueError(f"No common free time in the next {SEARCH_HORIZON_DAYS} days")
+
+
+def propose_slots(prompt: str, n_slots: int = 3, busy_source: Optional[BusySource] = None,
+                  time_zone: Optional[str] = None, now: Optional[datetime] = None):
+    """iter_proposal collected into one response."""
+    result, slots = {}, []
+    for item in iter_proposal(prompt, n_slots, busy_source, time_zone, now):
+        kind = item.pop("type")
+        if kind == "intent":
+            result = item
+        else:
+            item.pop("index")
+            slots.append(item)
+    if result.pop("recurrence") is not None:
+        result["recurrence"] = slots[0]["recurrence"]  # the best start's rule, not the requested one
+    return dict(result, slots=slots)
+
+
+def propose_ranked(source: BusySource, emails: List[str], profiles: Dict[str, WorkProfile],
+                   start_min: int, duration_min: int, n_slots: int, time_zone: str) -> List[dict]:
+    """Score every free start on the RANK_STEP_MIN grid and return the best n_slots.
+
+    The first RANK_WINDOW_DAYS are ranked; if they hold fewer than n_slots
+    free starts, the whole search horizon is ranked instead. Each slot
+    carries its score and the per-feature scores behind it.
+    """
+    horizon = SEARCH_HORIZON_DAYS * 1440
+    with stage("propose", "busy_lookup"):
+        intervals = source.busy_intervals(emails, start_min, start_min + horizon)
+    with stage("propose", "slot_generation"):
+        busy_starts, busy_reach = merge_busy(intervals)
+
+    window = min(horizon, RANK_WINDOW_DAYS * 1440)
+    while True:
+        with stage("propose", "working_hours"):
+            off_hours = [off_hours_intervals(p, start_min, start_min + window) for p in set(profiles.values())]
+        with stage("propose", "slot_generation"):
+            starts = candidate_starts(start_min, window, duration_min, RANK_STEP_MIN, busy_starts, busy_reach)
+            # Outside someone's working hours rules a start out but does not
+            # count against the buffer around meetings, so it is checked
+            # apart; these intervals are sorted and disjoint, which makes the
+            # ends their own running max.
+            for off in off_hours:
+                starts = starts[~conflicts(starts, duration_min, off[:, 0], off[:, 1])]
+        if len(starts) >= n_slots or window >= horizon:
+            break
+        window = horizon
+
+    with stage("propose", "ranking"):
+        zones = (time_zone,) + tuple(sorted({p.tz for p in profiles.values()} - {time_zone}))
+        candidates = Candidates.build(starts, duration_min, start_min, window, busy_starts, busy_reach,
+                                      zones, profiles.values())
+        scores, parts = score(candidates)
+        picks = top_k(candidates, scores, n_slots)
+
+    tz = zone(time_zone)
+    slots = []
+    for i in picks:
+        start = from_epoch_min(starts[i], tz)
+        end = from_epoch_min(starts[i] + duration_min, tz)
+        slots.append(dict(
+            render_slot(start, end, time_zone, profiles),
+            score=round(float(scores[i]), 3),
+            score_detail={name: round(float(values[i]), 3) for name, values in parts.items()},
+        ))
+    return slots
+
+
+def propose_recurring(rule: Recurrence, first: datetime, duration_min: int, emails: List[str],
+                      n_slots: int, source: BusySource, time_zone: str,
+                      profiles: Dict[str, WorkProfile]) -> List[dict]:
+    """Rank start times for a series by how many of its occurrences are conflict-free.
+
+    Candidates are the requested time and every SLOT_STEP_MIN after it for
+    RECURRENCE_CANDIDATE_HOURS, all on the same rule. Occurrences are checked
+    up to the rule's end or RECURRENCE_HORIZON_DAYS, whichever is sooner.
+    """
+    first_occurrence = next(iter(rule.rrule(first)), None)
+    if first_occurrence is None:
+        raise ValueError("Recurrence has no occurrences")
+
+    stop = first_occurrence + timedelta(days=RECURRENCE_HORIZON_DAYS)
+    until = rule.until_for(first_occurrence)
+    if until is not None and until < stop:
+        stop = until
+    shifts = np.arange(0, RECURRENCE_CANDIDATE_HOURS * 60 + 1, SLOT_STEP_MIN)
+
+    with stage("propose", "busy_lookup"):
+        start_min = to_epoch_min(first_occurrence)
+        end_min = to_epoch_min(stop) + int(shifts[-1]) + duration_min
+        intervals = dict(source.busy_intervals(emails, start_min, end_min))
+    with stage("propose", "working_hours"):
+        # outside someone's working hours counts as a clash
+        for i, profile in enumerate(set(profiles.values())):
+            intervals[f"off_hours:{i}"] = off_hours_intervals(profile, start_min, end_min)
+    with stage("propose", "slot_generation"):
+        busy_starts, busy_reach = merge_busy(intervals)
+        ranked = rank_recurring(
+            occurrence_minutes(rule, first_occurrence, stop),
+            duration_min, shifts, busy_starts, busy_reach,
+            RECURRENCE_MAX_CONFLICTS, RECURRENCE_MAX_CONFLICT_RATE,
+        )
+
+    chosen = []
+    for cand in ranked:
+        if all(abs(cand.shift_min - c.shift_min) >= duration_min for c in chosen):
+            chosen.append(cand)
+            if len(chosen) == n_slots:
+                break
+    if not chosen:
+        raise ValueError(
+            f"No start time keeps the series under {RECURRENCE_MAX_CONFLICT_RATE:.0%} conflicts; try another day or time"
+        )
+
+    slots = []
+    for cand in chosen:
+        start = from_epoch_min(start_min + cand.shift_min, first.tzinfo)
+        end = from_epoch_min(start_min + cand.shift_min + duration_min, first.tzinfo)
+        slot = render_slot(start, end, time_zone, profiles)
+        slot["human"] += f", {cand.checked - cand.conflicts}/{cand.checked} occurrences free"
+        slots.append(dict(
+            slot,
+            recurrence=rule.rrule_line(start),
+            occurrences=cand.checked,
+            conflicts=cand.conflicts,
+            conflict_starts=[from_epoch_min(m, start.tzinfo).isoformat() for m in cand.first_conflicts],
+        ))
+    return slots
@@ -1,13 +1,57 @@
 # backend/app/schemas.py
 
-from pydantic import BaseModel
-from typing import Optional, Dict
+from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Dict, List, Union
 
 
 class ProposeRequest(BaseModel):
     prompt: str
+    time_zone: Optional[str] = None  # IANA name; defaults to DEFAULT_TIMEZONE
+    n_slots: int = Field(3, ge=1, le=20)
+
+
+class ProfileRequest(BaseModel):
+    email: str
+    time_zone: str
+    working_hours: str = "09:00-18:00"
+    working_days: List[Annotated[int, Field(ge=0, le=6)]] = Field([0, 1, 2, 3, 4], min_length=1)  # Monday == 0
+
+
+class ProposeBatchRequest(BaseModel):
+    prompts: List[str]
+    time_zone: Optional[str] = None  # IANA name; defaults to DEFAULT_TIMEZONE
+    n_slots: int = Field(3, ge=1, le=20)
+
+
+class RoomSpec(BaseModel):
+    id: str  # calendar id; its bookings are read like an attendee's busy time
+    capacity: int = Field(ge=1)
+
+
+class BatchMeeting(BaseModel):
+    prompt: str
+    summary: Optional[str] = None
+    room: Optional[bool] = None  # defaults to needing one whenever rooms are given
+    capacity: Optional[int] = Field(None, ge=1)  # defaults to the number of attendees
+    window_days: Optional[float] = Field(None, gt=0, le=60)
+
+
+class ScheduleBatchRequest(BaseModel):
+    meetings: List[Union[str, BatchMeeting]]
+    rooms: List[RoomSpec] = []
+    time_zone: Optional[str] = None
+    time_budget_s: Optional[float] = Field(None, gt=0, le=60)
 
 
 class ConfirmRequest(BaseModel):
     event: Dict
     token_dict: Optional[Dict] = None
+
+
+class ConfirmBatchRequest(BaseModel):
+    events: List[Dict]
+    token_dict: Optional[Dict] = None
+
+
+class TracingRequest(BaseModel):
+    sample_rate: float = Field(ge=0.0, le=1.0)
@@ -0,0 +1,380 @@
+# backend/app/shared_cache.py
+# One cache for all the uvicorn workers on a host. Every worker maps the
+# same file, so an entry parsed or fetched by one worker is a hit for the
+# others, and the memory is the file's pages, paid once rather than once
+# per worker. Records are fixed width: a lookup is a hash, a probe of a
+# few records and a copy, with no server process and no pickling.
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from importlib import metadata
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no byte-range locks, the cache stays off
+    fcntl = None
+
+from backend.app.config import (
+    SHARED_BUSY_CALENDARS,
+    SHARED_BUSY_DAYS,
+    SHARED_CACHE,
+    SHARED_CACHE_DIR,
+    SHARED_PARSE_ENTRIES,
+)
+
+logger = logging.getLogger("meeting_agent")
+
+MAGIC = b"MSAC\x01\x00\x00\x00"
+PAGE = 4096
+WAYS = 4            # a key lives in one of the WAYS records of its set
+STRIPES = 64        # write locks per table; reads take none
+SPINS = 100         # re-reads of a record a writer holds before giving up (a miss)
+MAX_WORKERS = 256   # processes that get a stats slot
+LOCK_BYTE = 64      # fcntl locks are taken on header bytes LOCK_BYTE + stripe
+
+# Record: sequence number, payload length, key hash, wall-clock write time.
+# An odd sequence number means a write is in progress.
+HEAD = struct.Struct("<IIQd")
+SEQ = struct.Struct("<I")
+COUNTERS = ("hits", "misses", "puts")
+
+# Modules whose code decides what the records hold: a change to any of
+# them, or a dateparser upgrade, maps a new file (see default_path).
+RECORD_MODULES = ("shared_cache.py", "date_grammar.py", "calendar_cache.py")
+
+# (records, payload bytes) per table. A parse result encodes to well under
+# 100 bytes; a busy record is the window start plus one bit per minute.
+TABLES = {
+    "parse": (SHARED_PARSE_ENTRIES, 232),
+    "busy": (SHARED_BUSY_CALENDARS, 8 + SHARED_BUSY_DAYS * 1440 // 8),
+}
+
+
+class Layout(NamedTuple):
+    index: int
+    offset: int
+    sets: int
+    record: int  # bytes per record, header included
+    width: int   # payload bytes per record
+
+
+def _align(n: int, to: int) -> int:
+    return -(-n // to) * to
+
+
+def _hash(key: str) -> int:
+    # 64 bits; 0 marks an empty record. The key itself is not stored.
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def code_version() -> str:
+    """Digest of the code that decides what the records hold, and of dateparser's version."""
+    digest = hashlib.blake2b(digest_size=4)
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in RECORD_MODULES:
+        try:
+            with open(os.path.join(folder, name), "rb") as f:
+                digest.update(f.read())
+        except OSError:  # e.g. run from a zip; the layout alone still keys the file
+            pass
+    try:
+        digest.update(metadata.version("dateparser").encode())
+    except metadata.PackageNotFoundError:
+        pass
+    return digest.hexdigest()
+
+
+def default_path(tables: Dict[str, Tuple[int, int]] = TABLES, version: Optional[str] = None) -> str:
+    """One file per user, table layout and code version.
+
+    Workers started with other sizes never share it, and after a deploy
+    the new code starts from an empty file instead of reading records the
+    old code wrote.
+    """
+    version = code_version() if version is None else version
+    layout = hashlib.blake2b(repr((MAGIC, MAX_WORKERS, WAYS, sorted(tables.items()), version)).encode(),
+                             digest_size=4).hexdigest()
+    folder = SHARED_CACHE_DIR or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(folder, f"meeting-agent-{uid}-{layout}.cache")
+
+
+class SharedCache:
+    """Tables of fixed-width records in a file that every worker maps.
+
+    Each table is WAYS-way set associative: a key hashes to one set and may
+    sit in any of its records; a full set gives up its oldest. Each record
+    is guarded by a sequence number (a seqlock). A writer makes it odd,
+    writes, and makes it even again; a reader copies the record and reads
+    again if the number was odd or changed meanwhile, so reads take no lock.
+    Writers to a set serialise on one of STRIPES locks: a thread lock in
+    the process and an fcntl byte-range lock across processes, which the
+    kernel drops if the holder dies.
+
+    Each process counts its hits, misses and puts per table in its own slot
+    of the file, so any worker can report the hit rate of every worker.
+    """
+
+    def __init__(self, path: str, tables: Dict[str, Tuple[int, int]] = TABLES):
+        self.path = path
+        self.pid = os.getpid()
+        self.tables: Dict[str, Layout] = {}
+        self._slot_size = _align(8 + 8 * len(COUNTERS) * len(tables), 64)
+        offset = PAGE + _align(MAX_WORKERS * self._slot_size, PAGE)
+        for index, (name, (records, width)) in enumerate(tables.items()):
+            layout = Layout(index, offset, max(1, -(-records // WAYS)), _align(HEAD.size + width, 8), width)
+            self.tables[name] = layout
+            offset += _align(layout.sets * WAYS * layout.record, PAGE)
+        self.size = offset
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+            try:
+                if os.fstat(self._fd).st_size < self.size:
+                    os.ftruncate(self._fd, self.size)  # new pages read as zeros: every record empty
+                self._mm = mmap.mmap(self._fd, self.size)
+                if self._mm[:len(MAGIC)] != MAGIC:
+                    self._mm[:len(MAGIC)] = MAGIC
+                self._slot = self._claim_slot()
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._locks = [threading.Lock() for _ in range(STRIPES * len(tables))]
+        self._counts = [0] * (len(COUNTERS) * len(tables))
+        self._counts_lock = threading.Lock()
+
+    # -- stats slots -------------------------------------------------------
+
+    def _claim_slot(self) -> Optional[int]:
+        for i in range(MAX_WORKERS):
+            off = PAGE + i * self._slot_size
+            pid = SEQ.unpack_from(self._mm, off)[0]
+            if pid == 0 or pid == self.pid or not _alive(pid):
+                self._mm[off:off + self._slot_size] = bytes(self._slot_size)
+                SEQ.pack_into(self._mm, off, self.pid)
+                return off
+        logger.warning("shared cache: all %d worker slots taken, pid %d not counted", MAX_WORKERS, self.pid)
+        return None
+
+    def _count(self, table: Layout, counter: int):
+        i = table.index * len(COUNTERS) + counter
+        with self._counts_lock:
+            self._counts[i] += 1
+            if self._slot is not None:
+                struct.pack_into("<Q", self._mm, self._slot + 8 + 8 * i, self._counts[i])
+
+    # -- records -----------------------------------------------------------
+
+    def _set(self, table: Layout, h: int) -> int:
+        return table.offset + (h % table.sets) * WAYS * table.record
+
+    @contextmanager
+    def _locked(self, table: Layout, h: int):
+        stripe = table.index * STRIPES + (h % table.sets) % STRIPES
+        with self._locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, LOCK_BYTE + stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, LOCK_BYTE + stripe)
+
+    def _read(self, off: int, h: int, width: int) -> Optional[Tuple[bytes, float]]:
+        mm = self._mm
+        for _ in range(SPINS):
+            seq, length, key, stamp = HEAD.unpack_from(mm, off)
+            if seq & 1:
+                continue
+            if key != h:
+                return None
+            payload = mm[off + HEAD.size: off + HEAD.size + min(length, width)]
+            if SEQ.unpack_from(mm, off)[0] == seq:
+                return payload, stamp
+        return None
+
+    def _write(self, off: int, h: int, payload: bytes, stamp: float):
+        mm = self._mm
+        # a record left odd by a writer that died mid-write stays odd here
+        seq = SEQ.unpack_from(mm, off)[0] | 1
+        SEQ.pack_into(mm, off, seq)
+        mm[off + HEAD.size: off + HEAD.size + len(payload)] = payload
+        HEAD.pack_into(mm, off, seq, len(payload), h, stamp)
+        SEQ.pack_into(mm, off, (seq + 1) & 0xFFFFFFFF)
+
+    def _find(self, base: int, table: Layout, h: int) -> Optional[int]:
+        for way in range(WAYS):
+            off = base + way * table.record
+            if HEAD.unpack_from(self._mm, off)[2] == h:
+                return off
+        return None
+
+    def get(self, table: str, key: str, max_age_s: Optional[float] = None,
+            accept: Optional[Callable[[bytes], bool]] = None) -> Optional[bytes]:
+        """The payload stored under key, or None if absent, older than max_age_s or not accepted."""
+        layout = self.tables[table]
+        h = _hash(key)
+        base = self._set(layout, h)
+        for way in range(WAYS):
+            found = self._read(base + way * layout.record, h, layout.width)
+            if found is not None:
+                payload, stamp = found
+                if max_age_s is not None and time.time() - stamp > max_age_s:
+                    break
+                if accept is not None and not accept(payload):
+                    break
+                self._count(layout, 0)
+                return payload
+        self._count(layout, 1)
+        return None
+
+    def put(self, table: str, key: str, payload: bytes) -> bool:
+        """Store payload under key, replacing its old value or the oldest record of the set."""
+        layout = self.tables[table]
+        if len(payload) > layout.width:
+            return False
+        h = _hash(key)
+        base = self._set(layout, h)
+        with self._locked(layout, h):
+            off = self._find(base, layout, h)
+            if off is None:
+                heads = [HEAD.unpack_from(self._mm, base + way * layout.record) for way in range(WAYS)]
+                # an empty record first, else the oldest
+                way = min(range(WAYS), key=lambda w: (heads[w][2] != 0, heads[w][3]))
+                off = base + way * layout.record
+            self._write(off, h, payload, time.time())
+        self._count(layout, 2)
+        return True
+
+    def update(self, table: str, key: str, change: Callable[[bytes], Optional[bytes]]) -> bool:
+        """Rewrite key's payload in place with change(payload), keeping its write time.
+
+        Nothing happens if the key is absent or change returns None."""
+        layout = self.tables[table]
+        h = _hash(key)
+        base = self._set(layout, h)
+        with self._locked(layout, h):
+            off = self._find(base, layout, h)
+            if off is None:
+                return False
+            _, length, _, stamp = HEAD.unpack_from(self._mm, off)
+            payload = change(self._mm[off + HEAD.size: off + HEAD.size + min(length, layout.width)])
+            if payload is None or len(payload) > layout.width:
+                return False
+            self._write(off, h, payload, stamp)
+        return True
+
+    def delete(self, table: str, key: str):
+        layout = self.tables[table]
+        h = _hash(key)
+        base = self._set(layout, h)
+        with self._locked(layout, h):
+            off = self._find(base, layout, h)
+            if off is not None:
+                self._write(off, 0, b"", 0.0)
+
+    def clear(self, table: str):
+        layout = self.tables[table]
+        for s in range(layout.sets):
+            base = layout.offset + s * WAYS * layout.record
+            with self._locked(layout, s):
+                for way in range(WAYS):
+                    off = base + way * layout.record
+                    if HEAD.unpack_from(self._mm, off)[2]:
+                        self._write(off, 0, b"", 0.0)
+
+    # -- reporting ---------------------------------------------------------
+
+    def entries(self, table: str) -> int:
+        layout = self.tables[table]
+        return sum(1 for i in range(layout.sets * WAYS)
+                   if HEAD.unpack_from(self._mm, layout.offset + i * layout.record)[2])
+
+    def stats(self) -> dict:
+        """Entries per table, and hits, misses and puts of every live process using the file."""
+        names = list(self.tables)
+        counters = struct.Struct(f"<{len(COUNTERS) * len(names)}Q")
+        workers: List[dict] = []
+        for i in range(MAX_WORKERS):
+            off = PAGE + i * self._slot_size
+            pid = SEQ.unpack_from(self._mm, off)[0]
+            if pid == 0 or not _alive(pid):
+                continue
+            counts = counters.unpack_from(self._mm, off + 8)
+            worker = {"pid": pid}
+            for name in names:
+                first = self.tables[name].index * len(COUNTERS)
+                table = dict(zip(COUNTERS, counts[first:first + len(COUNTERS)]))
+                reads = table["hits"] + table["misses"]
+                table["hit_rate"] = table["hits"] / reads if reads else 0.0
+                worker[name] = table
+            workers.append(worker)
+        return {
+            "path": self.path,
+            "bytes": self.size,
+            "entries": {name: self.entries(name) for name in names},
+            "workers": workers,
+        }
+
+    def close(self):
+        if self._slot is not None and self.pid == os.getpid():
+            SEQ.pack_into(self._mm, self._slot, 0)  # the slot is free for the next worker
+        self._mm.close()
+        os.close(self._fd)
+
+
+_cache: Optional[SharedCache] = None
+_cache_lock = threading.Lock()
+_unavailable = not SHARED_CACHE or fcntl is None
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """This process's handle on the host's shared cache; None when it is off or cannot be opened."""
+    global _cache, _unavailable
+    cache = _cache
+    if cache is not None and cache.pid == os.getpid():
+        return cache
+    if _unavailable:
+        return None
+    with _cache_lock:
+        # a forked child inherits the parent's handle; it needs its own stats slot
+        if _cache is None or _cache.pid != os.getpid():
+            path = default_path()
+            try:
+                _cache = SharedCache(path)
+            except OSError as exc:
+                logger.warning("shared cache off: cannot map %s: %s", path, exc)
+                _unavailable = True
+                return None
+        return _cache
+
+
+def set_shared_cache(cache: Optional[SharedCache]):
+    global _cache, _unavailable
+    _cache = cache
+    _unavailable = cache is None
+
+
+def shutdown():
+    global _cache
+    if _cache is not None and _cache.pid == os.getpid():
+        _cache.close()
+    _cache = None
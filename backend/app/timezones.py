@@ -0,0 +1,268 @@
+# backend/app/timezones.py
+
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.app.config import DB_PATH, DEFAULT_TIMEZONE, DEFAULT_WORKING_HOURS, PROFILE_CACHE_TTL_S, WORKING_DAYS
+
+# Zone maths is done on epoch minutes with numpy. Each zone's UTC offsets
+# are tabulated once per year as (transition minute, offset) pairs, so a
+# working-hours mask over the search horizon is a few array operations
+# instead of one tz conversion per candidate slot.
+
+HOURS_RE = re.compile(r"^\s*(\d{1,2}):?(\d{2})?\s*-\s*(\d{1,2}):?(\d{2})?\s*$")
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday
+
+
+@lru_cache(maxsize=None)
+def zone(name: str):
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone {name!r}")
+
+
+def parse_hours(text: str) -> Tuple[int, int]:
+    """"09:00-17:30" -> (540, 1050) minutes after local midnight. End < start wraps past midnight."""
+    m = HOURS_RE.match(text or "")
+    if not m:
+        raise ValueError(f"Working hours must look like 09:00-17:00, got {text!r}")
+    h1, m1, h2, m2 = m.groups()
+    start, end = int(h1) * 60 + int(m1 or 0), int(h2) * 60 + int(m2 or 0)
+    if not (0 <= start < 1440 and 0 < end <= 1440) or start == end:
+        raise ValueError(f"Invalid working hours {text!r}")
+    return start, end
+
+
+def parse_days(text: str) -> Tuple[int, ...]:
+    """"0-4" or "0,1,2,3,4" (Monday == 0)."""
+    days = set()
+    for part in text.split(","):
+        lo, _, hi = part.strip().partition("-")
+        days.update(range(int(lo), int(hi or lo) + 1))
+    return tuple(sorted(d for d in days if 0 <= d <= 6))
+
+
+class WorkProfile(NamedTuple):
+    tz: str
+    start_min: int = 9 * 60
+    end_min: int = 18 * 60
+    days: Tuple[int, ...] = (0, 1, 2, 3, 4)
+
+    @classmethod
+    def from_strings(cls, tz: str, hours: str = "09:00-18:00", days: Optional[Iterable[int]] = None) -> "WorkProfile":
+        zone(tz)
+        start, end = parse_hours(hours)
+        if days is None:
+            return cls(tz, start, end, parse_days(WORKING_DAYS))
+        days = tuple(sorted(set(days)))
+        if not days or not all(0 <= d <= 6 for d in days):
+            raise ValueError(f"Working days must be 0-6 (Monday == 0) and not empty, got {list(days)}")
+        return cls(tz, start, end, days)
+
+
+# -- offset tables --------------------------------------------------------
+
+def _offset_min(tz, minute: int) -> int:
+    return int(datetime.fromtimestamp(minute * 60, tz).utcoffset().total_seconds() // 60)
+
+
+@lru_cache(maxsize=512)
+def _year_table(name: str, year: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Transition minutes and offsets for one UTC year: offsets[i] holds from trans[i]."""
+    tz = zone(name)
+    first = int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp() // 60)
+    last = int(datetime(year + 1, 1, 1, tzinfo=timezone.utc).timestamp() // 60)
+    trans, offsets = [first], [_offset_min(tz, first)]
+    # Sample every 12 hours and bisect each change down to the minute; zones
+    # never change offset twice within 12 hours.
+    prev = first
+    for minute in range(first + 720, last + 720, 720):
+        minute = min(minute, last)
+        off = _offset_min(tz, minute)
+        if off != offsets[-1]:
+            lo, hi = prev, minute
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if _offset_min(tz, mid) == off:
+                    hi = mid
+                else:
+                    lo = mid
+            trans.append(hi)
+            offsets.append(off)
+        prev = minute
+    return tuple(trans), tuple(offsets)
+
+
+def offset_table(name: str, start_min: int, end_min: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(transition minutes, offsets) covering [start_min, end_min) for a zone."""
+    y0 = datetime.fromtimestamp(start_min * 60, timezone.utc).year
+    y1 = datetime.fromtimestamp(end_min * 60, timezone.utc).year
+    trans: List[int] = []
+    offsets: List[int] = []
+    for year in range(y0, y1 + 1):
+        t, o = _year_table(name, year)
+        for minute, off in zip(t, o):
+            if not offsets or off != offsets[-1]:
+                trans.append(minute)
+                offsets.append(off)
+    return np.asarray(trans, dtype=np.int64), np.asarray(offsets, dtype=np.int64)
+
+
+def offsets_at(table: Tuple[np.ndarray, np.ndarray], minutes: np.ndarray) -> np.ndarray:
+    trans, offsets = table
+    return offsets[np.maximum(np.searchsorted(trans, minutes, side="right") - 1, 0)]
+
+
+# -- working hours --------------------------------------------------------
+
+@lru_cache(maxsize=1024)
+def _work_days(profile: WorkProfile, first_day: int, last_day: int) -> np.ndarray:
+    """Working intervals for UTC days [first_day, last_day], built once per profile and window."""
+    table = offset_table(profile.tz, first_day * 1440 - 1440, last_day * 1440 + 2880)
+    days = np.arange(first_day - 1, last_day + 2, dtype=np.int64)
+    days = days[np.isin((days + EPOCH_WEEKDAY) % 7, profile.days)]
+
+    span = (profile.end_min - profile.start_min) % 1440 or 1440
+    local_start = days * 1440 + profile.start_min
+    local_end = local_start + span
+
+    def to_utc(local):
+        # Local wall time -> UTC: guess with the offset at the local reading,
+        # then correct with the offset actually in force at the guess.
+        return local - offsets_at(table, local - offsets_at(table, local))
+
+    iv = np.stack((to_utc(local_start), to_utc(local_end)), axis=1)
+    iv.setflags(write=False)
+    return iv
+
+
+def work_intervals(profile: WorkProfile, start_min: int, end_min: int) -> np.ndarray:
+    """A profile's working time in [start_min, end_min) as UTC epoch-minute intervals (k, 2)."""
+    iv = np.clip(_work_days(profile, start_min // 1440, end_min // 1440), start_min, end_min)
+    return iv[iv[:, 1] > iv[:, 0]]
+
+
+def working_mask(profile: WorkProfile, start_min: int, end_min: int) -> np.ndarray:
+    """Minute bitmap over [start_min, end_min) that is True inside working hours."""
+    horizon = end_min - start_min
+    iv = work_intervals(profile, start_min, end_min) - start_min
+    # Working intervals are sorted and disjoint, so the mask is alternating
+    # off/on runs between consecutive edges.
+    edges = np.concatenate(([0], iv.ravel(), [horizon]))
+    runs = np.zeros(len(edges) - 1, dtype=bool)
+    runs[1::2] = True
+    return np.repeat(runs, np.diff(edges))
+
+
+def shared_working_mask(profiles: Iterable[WorkProfile], start_min: int, end_min: int) -> Optional[np.ndarray]:
+    """Minutes inside everyone's working hours, or None if nobody has a profile.
+
+    Attendees with the same zone and hours share one mask.
+    """
+    mask = None
+    for profile in set(profiles):
+        m = working_mask(profile, start_min, end_min)
+        mask = m if mask is None else (mask & m)
+    return mask
+
+
+def off_hours_intervals(profile: WorkProfile, start_min: int, end_min: int) -> np.ndarray:
+    """Complement of work_intervals, for treating time outside working hours as busy."""
+    work = work_intervals(profile, start_min, end_min)
+    starts = np.concatenate(([start_min], work[:, 1]))
+    ends = np.concatenate((work[:, 0], [end_min]))
+    iv = np.stack((starts, ends), axis=1)
+    return iv[iv[:, 1] > iv[:, 0]]
+
+
+# -- attendee directory ---------------------------------------------------
+
+def _profile_from_user(user: dict) -> Optional[WorkProfile]:
+    if not user.get("timezone"):
+        return None
+    return WorkProfile.from_strings(user["timezone"], user.get("working_hours") or "09:00-18:00", user.get("working_days"))
+
+
+def _load_from_db(email: str) -> Optional[WorkProfile]:
+    from backend.app import db
+
+    if db.store_stats() is None and not os.path.exists(DB_PATH):
+        return None  # no users table yet; don't create one just to read it
+    users = db.get_user(email)["data"]
+    return _profile_from_user(users[0]) if users else None
+
+
+class ProfileDirectory:
+    """Attendee email -> WorkProfile, read through to the users table with a TTL."""
+
+    def __init__(self, loader: Callable[[str], Optional[WorkProfile]] = _load_from_db,
+                 ttl_s: float = PROFILE_CACHE_TTL_S, clock: Callable[[], float] = time.monotonic):
+        self.loader = loader
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self._cache: Dict[str, Tuple[Optional[WorkProfile], float]] = {}
+        self._lock = threading.Lock()
+        self.default = (
+            WorkProfile.from_strings(DEFAULT_TIMEZONE, DEFAULT_WORKING_HOURS) if DEFAULT_WORKING_HOURS else None
+        )
+
+    def put(self, email: str, profile: Optional[WorkProfile]):
+        with self._lock:
+            self._cache[email.lower()] = (profile, self.clock() + self.ttl_s)
+
+    def get(self, email: str) -> Optional[WorkProfile]:
+        key = email.lower()
+        with self._lock:
+            hit = self._cache.get(key)
+        if hit is None or hit[1] <= self.clock():
+            try:
+                profile = self.loader(key)
+            except ValueError:
+                profile = None
+            self.put(key, profile)
+        else:
+            profile = hit[0]
+        return profile if profile is not None else self.default
+
+    def lookup(self, emails: Iterable[str]) -> Dict[str, WorkProfile]:
+        found = {}
+        for email in emails:
+            profile = self.get(email)
+            if profile is not None:
+                found[email] = profile
+        return found
+
+
+_directory: Optional[ProfileDirectory] = None
+
+
+def set_profile_directory(directory: ProfileDirectory):
+    global _directory
+    _directory = directory
+
+
+def profile_directory() -> ProfileDirectory:
+    global _directory
+    if _directory is None:
+        _directory = ProfileDirectory()
+    return _directory
+
+
+# -- rendering ------------------------------------------------------------
+
+def local_span(start: datetime, end: datetime, tz_name: str) -> str:
+    tz = zone(tz_name)
+    s, e = start.astimezone(tz), end.astimezone(tz)
+    end_fmt = "%H:%M" if s.date() == e.date() else "%a %H:%M"
+    return f"{WEEKDAY_NAMES[s.weekday()]} {s.strftime('%Y-%m-%d %H:%M')} - {e.strftime(end_fmt)} {s.tzname()}"
@@ -0,0 +1,122 @@
+# backend/app/warmup.py
+
+import logging
+import time
+from typing import Dict, Optional
+
+from backend.app.config import WARMUP
+
+logger = logging.getLogger("meeting_agent")
+
+# One prompt the grammar handles and one it hands to dateparser, so both the
+# fast path and dateparser's language data are loaded before traffic arrives.
+# Warm-up writes nothing, records no timings and calls no calendar.
+WARMUP_PROMPTS = (
+    "Schedule a 30-minute meeting tomorrow at 10am with warmup@example.com",
+    "Lunch on Dec 5 at 1pm",
+)
+
+_ready = not WARMUP
+_timings: Dict[str, float] = {}
+_error: Optional[str] = None
+
+
+def _warm_parser():
+    from backend.app.scheduler_engine import find_date_window
+
+    for prompt in WARMUP_PROMPTS:
+        find_date_window(prompt)
+
+
+def _warm_slot_search():
+    from backend.app.availability import InMemoryBusySource
+    from backend.app.scheduler_engine import propose_slots
+
+    # an empty local store: no busy lookup leaves the process
+    propose_slots(WARMUP_PROMPTS[0], busy_source=InMemoryBusySource())
+
+
+def _warm_calendar():
+    import google.oauth2.credentials  # noqa: F401
+    import googleapiclient.discovery  # noqa: F401
+    import httpx  # noqa: F401
+
+    from backend.app.calendar_tool import _discovery_document, client_pool, resolve_token_dict
+
+    _discovery_document()
+    try:
+        token_dict = resolve_token_dict({})
+    except ValueError:
+        return  # no server token configured; clients get built per user on demand
+    client_pool().get(token_dict)
+
+
+STEPS = (
+    ("parser", _warm_parser),
+    ("slot_search", _warm_slot_search),
+    ("calendar", _warm_calendar),
+)
+
+
+def _timed(name: str, t0: float):
+    _timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+def run_warmup() -> Dict[str, float]:
+    """Run every blocking warm-up step, timing each; a failing step is logged and skipped."""
+    global _error
+    from backend.app.metrics import muted
+
+    for name, step in STEPS:
+        t0 = time.perf_counter()
+        try:
+            with muted():
+                step()
+        except Exception as exc:
+            _error = f"{name}: {exc}"
+            logger.warning("warmup step=%s failed: %s", name, exc)
+        _timed(name, t0)
+    return dict(_timings)
+
+
+async def warm_routes(app):
+    """Send requests through the app so routing, body parsing and validation are built.
+
+    None of them reaches a handler with side effects: the /propose body is
+    rejected by validation (n_slots=0) before the endpoint runs.
+    """
+    import httpx
+
+    from backend.app.metrics import muted
+
+    t0 = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    with muted():
+        async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+            resp = await client.post("/propose", json={"prompt": WARMUP_PROMPTS[0], "n_slots": 0})
+            if resp.status_code != 422:
+                raise RuntimeError(f"/propose warm-up was not rejected: HTTP {resp.status_code}")
+            await client.get("/metrics")
+    _timed("routes", t0)
+
+
+async def warm(app):
+    global _ready, _error
+    from backend.app.concurrency import run_cpu
+
+    await run_cpu(run_warmup)
+    try:
+        await warm_routes(app)
+    except Exception as exc:
+        _error = f"routes: {exc}"
+        logger.warning("warmup step=routes failed: %s", exc)
+    _ready = True
+    logger.info("warmup done %s", " ".join(f"{k}_ms={v}" for k, v in _timings.items()))
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def status() -> dict:
+    return {"ready": _ready, "warmup_ms": dict(_timings), "error": _error}
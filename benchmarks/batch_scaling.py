@@ -0,0 +1,61 @@
+# benchmarks/batch_scaling.py
+"""Throughput of propose_many as the process pool grows.
+
+    python -m benchmarks.batch_scaling --prompts 4000 --max-workers 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.app import batch_propose
+from benchmarks import corpus
+
+
+async def drain(prompts):
+    count = 0
+    async for _ in batch_propose.propose_many(batch_propose.iterate(prompts)):
+        count += 1
+    return count
+
+
+def run(workers: int, prompts) -> float:
+    batch_propose.shutdown()
+    batch_propose._pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=batch_propose._warm_worker,
+    )
+    # start and warm every worker before timing
+    asyncio.run(drain([f"{p} warmup {i}" for i, p in enumerate(corpus.SHORT * workers * 4)]))
+
+    started = time.perf_counter()
+    asyncio.run(drain(prompts))
+    elapsed = time.perf_counter() - started
+    batch_propose.shutdown()
+    return len(prompts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # unique prompts so dedupe does not hide the work
+    base = corpus.SHORT + corpus.MEDIUM + corpus.LONG
+    prompts = [f"{base[i % len(base)]} #{i}" for i in range(args.prompts)]
+
+    single = None
+    workers = 1
+    while workers <= args.max_workers:
+        rate = run(workers, prompts)
+        single = single or rate
+        print(f"workers={workers:<3} {rate:10.1f} prompts/s   speedup x{rate / single:.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
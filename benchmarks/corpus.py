@@ -0,0 +1,39 @@
+# benchmarks/corpus.py
+# Realistic /propose prompts of varying length and language.
+
+SHORT = [
+    "tomorrow 3pm",
+    "next Monday at 10",
+    "in 2 days",
+    "friday 4:30pm",
+    "meet at 3",
+]
+
+MEDIUM = [
+    "Schedule a 30-minute meeting tomorrow with alice@example.com",
+    "Set up a 1 hour sync next Tuesday at 11am with bob@example.com and carol@example.com",
+    "Can we do a 45 min call on Thursday afternoon with dev@team.io",
+    "Book 2 hours in 3 days for the design review with pm@corp.com, eng@corp.com",
+    "Quick 15 minute standup today at 9:15 with ops@example.org",
+]
+
+LONG = [
+    "Hi! I'd like to get the whole launch team together to go over the final checklist before the release. "
+    "Please schedule a 90 minute meeting next Wednesday at 2pm with alice@example.com, bob@example.com, "
+    "carol@example.com, dave@example.com and erin@example.com. If that does not work, anything later in the week is fine.",
+    "Following up on the thread from last week: we still need a 1 hour retro with the on-call rotation "
+    "(oncall1@infra.dev, oncall2@infra.dev, oncall3@infra.dev, oncall4@infra.dev). Tomorrow morning would be ideal, "
+    "otherwise the day after tomorrow in the afternoon.",
+]
+
+# Phrasings the fast path does not cover; these exercise the dateparser fallback.
+FALLBACK = [
+    "Lunch on Dec 5 at 1pm with sam@example.com",
+    "Réunion de 30 minutes demain à 15h avec jean@exemple.fr",
+    "Reunión el 12/03 a las 10 con ana@ejemplo.es",
+    "Planning session the first week of next month",
+]
+
+ALL = SHORT + MEDIUM + LONG + FALLBACK
+
+ATTENDEES = [f"user{i}@example.com" for i in range(50)]
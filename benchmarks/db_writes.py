@@ -0,0 +1,89 @@
+# benchmarks/db_writes.py
+"""Sustained write throughput of the SQLite store under concurrent writers.
+
+    python -m benchmarks.db_writes --threads 16 --writes 2000
+
+Each thread saves meetings as a request handler would; the run ends when
+everything is committed. batch=1 is the one-transaction-per-write baseline.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.app.db import SQLiteStore
+from benchmarks import corpus
+from benchmarks.harness import percentile
+
+BASE = datetime(2026, 1, 5, 9, tzinfo=timezone.utc)
+
+
+def meeting(thread: int, i: int) -> dict:
+    start = BASE + timedelta(minutes=30 * (thread * 7919 + i) % (60 * 24 * 90))
+    return {
+        "event_id": f"t{thread}-{i}",
+        "summary": f"Sync {i}",
+        "start": start.isoformat(),
+        "end": (start + timedelta(minutes=30)).isoformat(),
+        "attendees": [corpus.ATTENDEES[(thread + i) % 50], corpus.ATTENDEES[(thread * 3 + i) % 50]],
+    }
+
+
+def run(batch_size: int, threads: int, writes: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(os.path.join(tmp, "bench.db"), batch_size=batch_size)
+        enqueue_us = [[] for _ in range(threads)]
+
+        def writer(t: int):
+            for i in range(writes):
+                t0 = time.perf_counter()
+                store.enqueue("meeting", meeting(t, i))
+                enqueue_us[t].append((time.perf_counter() - t0) * 1e6)
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        store.flush()
+        elapsed = time.perf_counter() - started
+
+        lookups = []
+        lo, hi = int(BASE.timestamp()), int((BASE + timedelta(days=14)).timestamp())
+        for email in corpus.ATTENDEES:
+            t0 = time.perf_counter()
+            store.meetings_for_attendee(email, lo, hi)
+            lookups.append((time.perf_counter() - t0) * 1e6)
+
+        stats = store.stats()
+        store.close()
+
+    latencies = sorted(x for per_thread in enqueue_us for x in per_thread)
+    return {
+        "writes_per_s": threads * writes / elapsed,
+        "transactions": stats["transactions"],
+        "enqueue_p99_us": percentile(latencies, 0.99),
+        "lookup_p50_us": percentile(sorted(lookups), 0.5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=1000, help="writes per thread")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 500])
+    args = parser.parse_args()
+
+    for batch_size in args.batch:
+        r = run(batch_size, args.threads, args.writes)
+        print(
+            f"batch={batch_size:<5} {r['writes_per_s']:10.0f} writes/s  transactions={r['transactions']:<6} "
+            f"enqueue_p99={r['enqueue_p99_us']:.1f}us  attendee_lookup_p50={r['lookup_p50_us']:.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
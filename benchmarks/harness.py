@@ -0,0 +1,118 @@
+# benchmarks/harness.py
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_THRESHOLD = 0.25  # fail when a gated metric is >25% worse than baseline
+GATED_METRICS = ("p50_us", "p95_us", "peak_alloc_kb")
+# Absolute differences below these are timer/allocator noise, not regressions
+NOISE_FLOOR = {"p50_us": 10.0, "p95_us": 25.0, "peak_alloc_kb": 1.0}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 5, alloc_samples: int = 20) -> Dict[str, float]:
+    """Time fn() one call at a time, then sample its peak allocation per call."""
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    timings = []
+    started = time.perf_counter()
+    try:
+        for _ in range(iterations):
+            t0 = time.perf_counter_ns()
+            fn()
+            timings.append((time.perf_counter_ns() - t0) / 1000.0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    elapsed = time.perf_counter() - started
+
+    # tracemalloc slows every allocation, so it gets its own, shorter pass
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_samples):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    peaks.sort()
+    return {
+        "iterations": iterations,
+        "p50_us": round(percentile(timings, 0.50), 2),
+        "p95_us": round(percentile(timings, 0.95), 2),
+        "p99_us": round(percentile(timings, 0.99), 2),
+        "ops_per_s": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "peak_alloc_kb": round(percentile(peaks, 0.50) / 1024.0, 2),
+    }
+
+
+def best_of(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    """Combine repeated runs, keeping the least noisy value of each metric."""
+    best = dict(runs[0])
+    for run in runs[1:]:
+        for metric, value in run.items():
+            pick = max if metric == "ops_per_s" else min
+            best[metric] = pick(best[metric], value)
+    return best
+
+
+def load_baselines(path: str) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baselines(path: str, results: Dict[str, Dict[str, float]]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Return one message per gated metric that regressed beyond threshold."""
+    regressions = []
+    for name, result in results.items():
+        base = baselines.get(name)
+        if not base:
+            continue
+        for metric in GATED_METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > NOISE_FLOOR[metric]:
+                regressions.append(f"{name}.{metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, float]], baselines: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    cols = ("p50_us", "p95_us", "p99_us", "ops_per_s", "peak_alloc_kb")
+    width = max([len(n) for n in results] + [9])
+    lines = [f"{'benchmark':<{width}}  " + "  ".join(f"{c:>13}" for c in cols)]
+    for name, result in results.items():
+        row = f"{name:<{width}}  " + "  ".join(f"{result.get(c, 0):>13}" for c in cols)
+        base = (baselines or {}).get(name)
+        if base and base.get("p95_us"):
+            row += f"   p95 vs baseline {(result['p95_us'] / base['p95_us'] - 1) * 100:+.0f}%"
+        lines.append(row)
+    return "\n".join(lines)
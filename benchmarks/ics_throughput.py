@@ -0,0 +1,145 @@
+# benchmarks/ics_throughput.py
+"""Events per second through the .ics reader, the busy-time loader and the exporter.
+
+    python -m benchmarks.ics_throughput --events 200000 --recurring 0.05
+
+Writes a synthetic calendar export (Google-style: VTIMEZONE, TZID times,
+attendees with PARTSTAT, a VALARM per event, folded long lines, a share of
+weekly series with overrides) to a temp file, then times:
+  parse   every VEVENT read from the file in ICS_READ_CHUNK_KB chunks
+  load    the same file into an InMemoryBusySource, series expanded over a year
+  export  as many confirmed meetings from a SQLite store back out as .ics
+Peak Python memory while parsing is measured on a second pass with
+tracemalloc; it depends on the chunk size, not on the file size.
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from backend.app import ics
+from backend.app.availability import InMemoryBusySource, to_epoch_min
+from backend.app.db import SQLiteStore
+from benchmarks import corpus
+
+BASE = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)
+HEADER = (
+    "BEGIN:VCALENDAR\r\nPRODID:-//Google Inc//Google Calendar 70.9054//EN\r\nVERSION:2.0\r\n"
+    "BEGIN:VTIMEZONE\r\nTZID:Europe/Berlin\r\nBEGIN:STANDARD\r\nTZOFFSETFROM:+0200\r\nTZOFFSETTO:+0100\r\n"
+    "DTSTART:19701025T030000\r\nEND:STANDARD\r\nEND:VTIMEZONE\r\n"
+)
+
+
+def vevent(i: int, rng: random.Random, recurring: float) -> str:
+    start = BASE + timedelta(minutes=15 * rng.randrange(4 * 24 * 365))
+    end = start + timedelta(minutes=rng.choice((15, 30, 45, 60, 90)))
+    fmt = "%Y%m%dT%H%M%S"
+    people = rng.sample(corpus.ATTENDEES, rng.randint(1, 6))
+    lines = [
+        "BEGIN:VEVENT",
+        f"DTSTART;TZID=Europe/Berlin:{start.strftime(fmt)}",
+        f"DTEND;TZID=Europe/Berlin:{end.strftime(fmt)}",
+        f"DTSTAMP:{BASE.strftime(fmt)}Z",
+        f"ORGANIZER;CN={people[0]}:mailto:{people[0]}",
+        f"UID:{i:08d}-{rng.getrandbits(64):016x}@google.com",
+    ]
+    for email in people:
+        status = rng.choice(("ACCEPTED", "ACCEPTED", "TENTATIVE", "DECLINED", "NEEDS-ACTION"))
+        lines.append(f'ATTENDEE;CUTYPE=INDIVIDUAL;ROLE=REQ-PARTICIPANT;PARTSTAT={status};CN="{email}";X-NUM-GUESTS=0:mailto:{email}')
+    series = rng.random() < recurring
+    if series:
+        lines.append(f"RRULE:FREQ=WEEKLY;BYDAY={start.strftime('%a')[:2].upper()};COUNT={rng.randint(4, 52)}")
+    lines += [
+        f"DESCRIPTION:Agenda for meeting {i}: review the open items\\, decide owners and dates\\; notes in the shared doc.",
+        "LOCATION:",
+        "SEQUENCE:0",
+        "STATUS:CONFIRMED",
+        f"SUMMARY:Meeting {i}",
+        "TRANSP:" + ("TRANSPARENT" if rng.random() < 0.05 else "OPAQUE"),
+        "BEGIN:VALARM", "ACTION:DISPLAY", "DESCRIPTION:Reminder", "TRIGGER:-P0DT0H10M0S", "END:VALARM",
+        "END:VEVENT",
+    ]
+    if series and rng.random() < 0.5:
+        moved = start + timedelta(weeks=1)
+        lines += [
+            "BEGIN:VEVENT",
+            f"DTSTART;TZID=Europe/Berlin:{(moved + timedelta(hours=2)).strftime(fmt)}",
+            f"DTEND;TZID=Europe/Berlin:{(moved + timedelta(hours=2) + (end - start)).strftime(fmt)}",
+            f"RECURRENCE-ID;TZID=Europe/Berlin:{moved.strftime(fmt)}",
+            f"UID:{i:08d}-override@google.com",
+            f"ATTENDEE;PARTSTAT=ACCEPTED:mailto:{people[0]}",
+            "END:VEVENT",
+        ]
+    return "".join(ics.fold(line) + "\r\n" for line in lines)
+
+
+def write_calendar(path: str, events: int, recurring: float, seed: int) -> int:
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as out:
+        out.write(HEADER)
+        for i in range(events):
+            out.write(vevent(i, rng, recurring))
+        out.write("END:VCALENDAR\r\n")
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--recurring", type=float, default=0.05, help="share of events that are weekly series")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "calendar.ics")
+        size = write_calendar(path, args.events, args.recurring, args.seed)
+        print(f"{path}: {size / 2 ** 20:.1f} MiB")
+
+        with open(path, "rb") as f:
+            started = time.perf_counter()
+            parsed = sum(1 for _ in ics.read_events(ics.read_chunks(f), "UTC"))
+            elapsed = time.perf_counter() - started
+        print(f"parse   {parsed:>9} events {elapsed:7.2f}s {parsed / elapsed:>10.0f} events/s "
+              f"{size / 2 ** 20 / elapsed:6.1f} MiB/s")
+
+        source = InMemoryBusySource()
+        lo = to_epoch_min(BASE)
+        with open(path, "rb") as f:
+            stats = ics.load_busy(source, ics.read_chunks(f), start_min=lo, end_min=lo + 400 * 1440,
+                                  time_zone="UTC")
+        print(f"load    {stats['events']:>9} events {stats['elapsed_ms'] / 1000:7.2f}s "
+              f"{stats['events_per_s']:>10.0f} events/s {stats['intervals']} intervals, "
+              f"{stats['series']} series, {stats['calendars']} calendars")
+
+        with open(path, "rb") as f:
+            tracemalloc.start()
+            for _ in ics.read_events(ics.read_chunks(f), "UTC"):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"parse peak memory {peak / 2 ** 20:.1f} MiB")
+
+        store = SQLiteStore(os.path.join(tmp, "export.db"))
+        rng = random.Random(args.seed)
+        for i in range(args.events):
+            start = BASE + timedelta(minutes=30 * rng.randrange(2 * 24 * 365))
+            store.enqueue("meeting", {
+                "event_id": f"m{i}", "summary": f"Meeting {i}", "start": start.isoformat(),
+                "end": (start + timedelta(minutes=30)).isoformat(), "attendees": rng.sample(corpus.ATTENDEES, 3),
+            })
+        store.flush()
+        out = io.StringIO()
+        started = time.perf_counter()
+        exported = sum(chunk.count("BEGIN:VEVENT") for chunk in ics.write_events(store.iter_meetings())
+                       if out.write(chunk) or True)
+        elapsed = time.perf_counter() - started
+        store.close()
+        print(f"export  {exported:>9} events {elapsed:7.2f}s {exported / elapsed:>10.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# benchmarks/loadgen.py
+"""Open-loop load on /propose and /confirm through uvicorn, stepping the arrival rate.
+
+    python -m benchmarks.loadgen --rates 5,10,20,40,80 --duration 15 --confirm-ratio 0.2
+
+Unless --url is given, starts the calendar emulator and the backend
+(CALENDAR_BACKEND=google, pointed at the emulator) as subprocesses on free
+ports. Requests arrive as a Poisson process at each rate whether or not
+earlier ones have finished, and latency is measured from the scheduled
+arrival, so time spent queued behind a slow server counts. The saturation
+point is the first rate where achieved throughput drops below 95% of the
+target, more than 1% of requests fail, or p99 exceeds --slo-ms.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from benchmarks import corpus
+from benchmarks.harness import percentile
+
+ENDPOINTS = ("propose", "confirm")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, timeout_s: float = 120.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} not ready after {timeout_s:.0f}s")
+
+
+@contextmanager
+def local_stack(args):
+    """Emulator + backend on free ports; yields the backend URL."""
+    emu_port, api_port = free_port(), free_port()
+    emu_url = f"http://127.0.0.1:{emu_port}"
+    procs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "backend.app.calendar_emulator", "--port", str(emu_port),
+                 "--latency-ms", str(args.emulator_latency_ms), "--jitter-ms", str(args.emulator_jitter_ms),
+                 "--error-rate", str(args.emulator_error_rate),
+                 "--user-qps", str(args.user_qps), "--project-qps", str(args.project_qps)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            ))
+            wait_ready(f"{emu_url}/emulator/stats")
+
+            env = dict(
+                os.environ,
+                CALENDAR_BACKEND="google",
+                GOOGLE_API_ROOT=emu_url,
+                GOOGLE_TOKEN_URI=f"{emu_url}/token",
+                DEMO_MODE="true",
+                DEMO_REFRESH_TOKEN="loadgen",
+                GOOGLE_CLIENT_ID="loadgen",
+                GOOGLE_CLIENT_SECRET="loadgen",
+                DB_PATH=os.path.join(tmp, "loadgen.db"),
+            )
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--host", "127.0.0.1",
+                 "--port", str(api_port), "--workers", str(args.workers), "--log-level", "warning",
+                 "--no-access-log"],
+                env=env, stdout=subprocess.DEVNULL, stderr=None if args.server_logs else subprocess.DEVNULL,
+            ))
+            api_url = f"http://127.0.0.1:{api_port}"
+            wait_ready(f"{api_url}/ready")
+            yield api_url
+        finally:
+            for proc in reversed(procs):
+                proc.terminate()
+            for proc in procs:
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+
+
+def confirm_body(rng: random.Random) -> dict:
+    start = datetime(2030, 1, 7, 9, tzinfo=timezone.utc) + timedelta(minutes=30 * rng.randrange(2000))
+    return {"event": {
+        "summary": "Load test",
+        "start": start.isoformat(),
+        "end": (start + timedelta(minutes=30)).isoformat(),
+        "attendees": rng.sample(corpus.ATTENDEES, 2),
+    }}
+
+
+async def step(client: httpx.AsyncClient, rate: float, duration_s: float, confirm_ratio: float,
+               rng: random.Random) -> dict:
+    latencies = {name: [] for name in ENDPOINTS}
+    errors = {name: 0 for name in ENDPOINTS}
+
+    async def fire(name: str, scheduled: float, body: dict, headers: dict):
+        ok = False
+        try:
+            resp = await client.post(f"/{name}", json=body, headers=headers)
+            ok = resp.status_code == 200 and resp.json().get("status") != "error"
+        except (httpx.HTTPError, ValueError):
+            pass
+        if ok:
+            latencies[name].append(time.perf_counter() - scheduled)
+        else:
+            errors[name] += 1
+
+    tasks = []
+    started = time.perf_counter()
+    scheduled = started
+    while True:
+        scheduled += rng.expovariate(rate)
+        if scheduled - started >= duration_s:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if rng.random() < confirm_ratio:
+            job = fire("confirm", scheduled, confirm_body(rng), {"Idempotency-Key": uuid.uuid4().hex})
+        else:
+            job = fire("propose", scheduled, {"prompt": rng.choice(corpus.ALL)}, {})
+        tasks.append(asyncio.create_task(job))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    sent = len(tasks)
+    failed = sum(errors.values())
+    everything = sorted(latencies["propose"] + latencies["confirm"])
+    result = {
+        "rate": rate,
+        "sent": sent,
+        "achieved_rps": (sent - failed) / elapsed,
+        "error_rate": failed / sent if sent else 0.0,
+        "p99_ms": percentile(everything, 0.99) * 1000,
+    }
+    for name in ENDPOINTS:
+        lat = sorted(latencies[name])
+        for q in (50, 95, 99):
+            result[f"{name}_p{q}_ms"] = percentile(lat, q / 100) * 1000
+    return result
+
+
+def saturated(result: dict, slo_ms: float) -> bool:
+    return (result["achieved_rps"] < 0.95 * result["rate"]
+            or result["error_rate"] > 0.01
+            or result["p99_ms"] > slo_ms)
+
+
+async def run(url: str, args) -> list:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    results = []
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout_s) as client:
+        for rate in args.rates:
+            results.append(await step(client, rate, args.duration, args.confirm_ratio, rng))
+            r = results[-1]
+            print(f"{r['rate']:>7g}{r['sent']:>7}{r['achieved_rps']:>10.1f}{r['error_rate'] * 100:>8.2f}"
+                  + "".join(f"{r[f'{n}_p{q}_ms']:>9.1f}" for n in ENDPOINTS for q in (50, 95, 99)), flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="load an already running backend instead of starting one")
+    parser.add_argument("--rates", type=lambda s: [float(x) for x in s.split(",")], default=[5, 10, 20, 40, 80],
+                        help="comma-separated arrival rates, requests/s")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per rate")
+    parser.add_argument("--confirm-ratio", type=float, default=0.2)
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="p99 latency objective")
+    parser.add_argument("--timeout-s", type=float, default=30.0)
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--emulator-latency-ms", type=float, default=40.0)
+    parser.add_argument("--emulator-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--emulator-error-rate", type=float, default=0.0)
+    parser.add_argument("--user-qps", type=float, default=0.0, help="emulated per-user limit, 0 = none")
+    parser.add_argument("--project-qps", type=float, default=0.0, help="emulated project limit, 0 = none")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--server-logs", action="store_true", help="show the backend's log output")
+    args = parser.parse_args()
+
+    header = "".join(f"{f'{n[:4]}_p{q}':>9}" for n in ENDPOINTS for q in (50, 95, 99))
+    print(f"{'rate':>7}{'sent':>7}{'achieved':>10}{'err_%':>8}{header}")
+    if args.url:
+        results = asyncio.run(run(args.url, args))
+    else:
+        with local_stack(args) as url:
+            results = asyncio.run(run(url, args))
+
+    knee = next((r["rate"] for r in results if saturated(r, args.slo_ms)), None)
+    if knee is None:
+        print(f"not saturated up to {args.rates[-1]:g} req/s")
+    else:
+        print(f"saturation point: {knee:g} req/s")
+
+
+if __name__ == "__main__":
+    main()
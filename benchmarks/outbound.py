@@ -0,0 +1,99 @@
+# benchmarks/outbound.py
+"""Bursty calendar writes against the throttling emulator, with and without pacing.
+
+    python -m benchmarks.outbound --users 4 --interactive 25 --bulk 100
+
+Each user fires a burst of interactive inserts while a bulk job inserts
+one user's events as fast as it can. The server allows --user-qps per
+user and --project-qps overall. "unpaced" sends everything at once and
+gives up on the first throttle, which is what /confirm used to do;
+"paced" goes through the OutboundScheduler, configured above the
+server's limits so it has to find them by backing off.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DEMO_MODE", "false")
+
+import httpx  # noqa: E402
+
+from backend.app.async_calendar import AsyncGoogleCalendarClient, CalendarAPIError  # noqa: E402
+from backend.app.calendar_emulator import Faults, emulator_app  # noqa: E402
+from backend.app.outbound import BULK, INTERACTIVE, OutboundScheduler  # noqa: E402
+from benchmarks.harness import percentile  # noqa: E402
+
+
+class StaticTokenClient(AsyncGoogleCalendarClient):
+    """Bearer token = the user's refresh token; the emulator only uses it to tell users apart."""
+
+    async def access_token(self, token_dict):
+        return token_dict["refresh_token"]
+
+
+def token(user: int) -> dict:
+    return {"refresh_token": f"user{user}", "client_id": "bench", "client_secret": "bench"}
+
+
+async def run(paced: bool, args) -> dict:
+    app = emulator_app(Faults(user_qps=args.user_qps, project_qps=args.project_qps))
+    if paced:
+        scheduler = OutboundScheduler(project_qps=args.project_qps * 2, user_qps=args.user_qps * 2,
+                                      max_attempts=8, backoff_s=0.1, max_backoff_s=2.0)
+    else:
+        scheduler = OutboundScheduler(project_qps=1e9, user_qps=1e9, workers=10_000, max_attempts=1)
+    client = StaticTokenClient("http://calendar", transport=httpx.ASGITransport(app=app), scheduler=scheduler)
+
+    latencies = {INTERACTIVE: [], BULK: []}
+    failures = {INTERACTIVE: 0, BULK: 0}
+
+    async def insert(user: int, i: int, priority: int):
+        body = {"summary": f"u{user}-{i}", "start": {"dateTime": "2030-01-01T10:00:00Z"},
+                "end": {"dateTime": "2030-01-01T10:30:00Z"}}
+        t0 = time.perf_counter()
+        try:
+            await client.request("POST", "/calendar/v3/calendars/primary/events", token(user), priority, json=body)
+            latencies[priority].append(time.perf_counter() - t0)
+        except CalendarAPIError:
+            failures[priority] += 1
+
+    started = time.perf_counter()
+    jobs = [insert(args.users, i, BULK) for i in range(args.bulk)]
+    jobs += [insert(u, i, INTERACTIVE) for u in range(args.users) for i in range(args.interactive)]
+    await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - started
+    scheduler.close()
+    await client.aclose()
+
+    server = app.state.calendar.stats
+    inter = sorted(latencies[INTERACTIVE])
+    return {
+        "mode": "paced" if paced else "unpaced",
+        "ok": len(latencies[INTERACTIVE]) + len(latencies[BULK]),
+        "failed": failures[INTERACTIVE] + failures[BULK],
+        "throttled": server["user_throttled"] + server["project_throttled"],
+        "interactive_p50_ms": percentile(inter, 0.5) * 1000 if inter else float("nan"),
+        "interactive_p99_ms": percentile(inter, 0.99) * 1000 if inter else float("nan"),
+        "elapsed_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--interactive", type=int, default=25, help="interactive inserts per user")
+    parser.add_argument("--bulk", type=int, default=100, help="bulk inserts, from one extra user")
+    parser.add_argument("--user-qps", type=float, default=10)
+    parser.add_argument("--project-qps", type=float, default=40)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'ok':>6}{'failed':>8}{'throttled':>11}{'inter_p50_ms':>14}{'inter_p99_ms':>14}{'elapsed_s':>11}")
+    for paced in (False, True):
+        r = asyncio.run(run(paced, args))
+        print(f"{r['mode']:<10}{r['ok']:>6}{r['failed']:>8}{r['throttled']:>11}"
+              f"{r['interactive_p50_ms']:>14.1f}{r['interactive_p99_ms']:>14.1f}{r['elapsed_s']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# benchmarks/run.py
+"""Benchmarks for the /propose and /confirm hot paths.
+
+    python -m benchmarks.run                  # run and gate against baselines.json
+    python -m benchmarks.run --update         # run and overwrite baselines.json
+    python -m benchmarks.run -k propose       # only benchmarks whose name contains "propose"
+
+Exits non-zero when a gated metric regresses beyond --threshold.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault("CALENDAR_BACKEND", "fake")
+
+from benchmarks import corpus  # noqa: E402
+from benchmarks.harness import (  # noqa: E402
+    DEFAULT_THRESHOLD,
+    best_of,
+    compare,
+    format_table,
+    load_baselines,
+    measure,
+    save_baselines,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+def cycle(items):
+    it = itertools.cycle(items)
+    return lambda: next(it)
+
+
+def seeded_busy_source(attendees, days=30, meetings_per_day=4, seed=7, stride_days=1):
+    from backend.app.availability import InMemoryBusySource
+
+    rng = random.Random(seed)
+    source = InMemoryBusySource()
+    base = datetime.now().astimezone().replace(hour=9, minute=0, second=0, microsecond=0)
+    for email in attendees:
+        for day in range(0, days, stride_days):
+            for _ in range(meetings_per_day):
+                start = base + timedelta(days=day, minutes=30 * rng.randrange(0, 18))
+                source.add(email, start, start + timedelta(minutes=rng.choice((30, 60))))
+    return source
+
+
+def parsing_benchmarks():
+    from backend.app import date_grammar, shared_cache
+    from backend.app.scheduler_engine import extract_duration, extract_emails, find_date_window
+
+    next_prompt = cycle(corpus.ALL)
+    next_fast = cycle(corpus.SHORT + corpus.MEDIUM)
+    shared = shared_cache.get_shared_cache()
+
+    def uncached():
+        # the grammar itself: neither this process's cache nor the host's
+        date_grammar._cache.clear()
+        shared_cache.set_shared_cache(None)
+        find_date_window(next_fast())
+        shared_cache.set_shared_cache(shared)
+
+    return {
+        "extract_emails": lambda: extract_emails(next_prompt()),
+        "extract_duration": lambda: extract_duration(next_prompt()),
+        "find_date_window": lambda: find_date_window(next_prompt()),
+        "find_date_window_uncached": uncached,
+    }
+
+
+def slot_benchmarks():
+    from backend.app.scheduler_engine import iter_proposal, propose_slots
+    from backend.app.timezones import ProfileDirectory, WorkProfile, set_profile_directory
+
+    # attendees spread over three zones with working hours, so every search
+    # also builds and intersects working-hours masks
+    zones = ("America/New_York", "Europe/London", "Asia/Kolkata")
+    directory = ProfileDirectory(loader=lambda email: None)
+    for i, email in enumerate(corpus.ATTENDEES):
+        directory.put(email, WorkProfile.from_strings(zones[i % 3], "08:00-20:00"))
+    set_profile_directory(directory)
+
+    source = seeded_busy_source(corpus.ATTENDEES)
+    few = "Schedule 30 min tomorrow at 10am with " + ", ".join(corpus.ATTENDEES[:3])
+    many = "Schedule 1 hour tomorrow at 10am with " + ", ".join(corpus.ATTENDEES)
+    # a year of weekly occurrences against 20 calendars with a meeting every few days
+    series = [f"series{i}@example.com" for i in range(20)]
+    yearly = seeded_busy_source(series, days=400, meetings_per_day=1, stride_days=5)
+    weekly = "Weekly sync every Tuesday at 10 for the next 12 months, 1 hour with " + ", ".join(series)
+    return {
+        "propose_slots_3_attendees": lambda: propose_slots(few, busy_source=source),
+        "propose_slots_50_attendees": lambda: propose_slots(many, busy_source=source),
+        "propose_recurring_20_attendees_1y": lambda: propose_slots(weekly, busy_source=yearly),
+        # intent plus the first slot, as /propose/stream sends them
+        "first_slot_50_attendees": lambda: list(itertools.islice(iter_proposal(many, busy_source=source), 2)),
+        "rank_10k_candidates": ranking_benchmark(zones),
+    }
+
+
+def ranking_benchmark(zones):
+    """Score 10k candidate starts on every feature and pick the top 3."""
+    import numpy as np
+
+    from backend.app.availability import to_epoch_min
+    from backend.app.ranking import Candidates, score, top_k
+    from backend.app.recurrence import merge_busy
+    from backend.app.timezones import WorkProfile
+
+    origin = to_epoch_min(datetime(2030, 1, 7, 9))
+    starts = origin + np.arange(10_000, dtype=np.int64) * 15
+    rng = np.random.default_rng(7)
+    busy = origin + np.sort(rng.integers(0, 150_000, 2_000))
+    busy_starts, busy_reach = merge_busy({"all": np.stack((busy, busy + 30), axis=1)})
+    profiles = [WorkProfile.from_strings(tz, "08:00-20:00") for tz in zones]
+
+    def run():
+        candidates = Candidates.build(starts, 30, origin, 150_000, busy_starts, busy_reach, zones, profiles)
+        scores, _ = score(candidates)
+        top_k(candidates, scores, 3)
+
+    return run
+
+
+def endpoint_benchmarks():
+    import httpx
+
+    from backend.app.async_calendar import FakeAsyncCalendarClient, set_calendar_client
+    from backend.app.main import app
+
+    set_calendar_client(FakeAsyncCalendarClient())
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    next_prompt = cycle(corpus.SHORT + corpus.MEDIUM + corpus.LONG)
+    event = {"summary": "Bench", "start": "2030-01-01T10:00:00+05:30", "end": "2030-01-01T10:30:00+05:30"}
+
+    def post(path, body):
+        resp = loop.run_until_complete(client.post(path, json=body))
+        if resp.status_code != 200:
+            raise RuntimeError(f"{path} returned {resp.status_code}: {resp.text}")
+
+    return {
+        "http_propose": lambda: post("/propose", {"prompt": next_prompt()}),
+        "http_confirm": lambda: post("/confirm", {"event": event}),
+    }
+
+
+SUITES = (parsing_benchmarks, slot_benchmarks, endpoint_benchmarks)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("-n", "--iterations", type=int, default=500)
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="runs per benchmark; the best is kept")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="write results as the new baseline")
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.disable(logging.INFO)
+
+    results = {}
+    for suite in SUITES:
+        for name, fn in suite().items():
+            if args.pattern in name:
+                results[name] = best_of([measure(fn, args.iterations) for _ in range(max(1, args.repeat))])
+
+    baselines = load_baselines(args.baseline)
+    print(format_table(results, baselines))
+
+    if args.update:
+        save_baselines(args.baseline, dict(baselines, **results))
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
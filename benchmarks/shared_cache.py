@@ -0,0 +1,94 @@
+# benchmarks/shared_cache.py
+"""Date-parse hit rate and dateparser calls per worker, with and without the shared cache.
+
+    python -m benchmarks.shared_cache --workers 1,2,4 --phrases 500 --prompts 1000
+
+Each worker is a fresh spawned process, like a uvicorn worker, and parses
+its own stream of --prompts prompts. The streams are drawn from the same
+--phrases date phrasings with Zipf popularity, all of them phrasings the
+fast grammar hands to dateparser. Without the shared cache, every worker
+pays for each phrase it meets once. With it, the host pays once for all
+the workers. The shared file lives in a temp dir and starts empty each run.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def phrases(count: int):
+    out = []
+    for i in range(count):
+        month, day, hour = MONTHS[i % 12], 1 + (i // 12) % 28, 1 + (i // (12 * 28)) % 11
+        out.append(f"Lunch on {month} {day} at {hour}pm with sam@example.com")
+    return out
+
+
+def worker(seed: int, args, start, results):
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+
+    from backend.app import date_grammar, shared_cache
+
+    now = datetime(2026, 4, 20, 9, tzinfo=ZoneInfo("UTC"))
+    date_grammar.parse_when("Dinner on Feb 30 at 25pm", now)  # import dateparser before timing
+    date_grammar._cache.clear()
+
+    pool = phrases(args.phrases)
+    rng = random.Random(seed)
+    stream = rng.choices(pool, weights=[1 / (rank + 1) for rank in range(len(pool))], k=args.prompts)
+
+    start.wait()
+    started = time.perf_counter()
+    for prompt in stream:
+        date_grammar.parse_when(prompt, now)
+    elapsed = time.perf_counter() - started
+    stats = date_grammar.parse_stats()
+    results.put((elapsed, stats["cache_hits"] + stats["shared_hits"], stats["fallback"], stats["size"]))
+    shared_cache.shutdown()
+
+
+def run(workers: int, shared: bool, args):
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        # read by backend.app.config in each spawned worker
+        os.environ["SHARED_CACHE"] = "true" if shared else "false"
+        os.environ["SHARED_CACHE_DIR"] = tmp
+        start, results = ctx.Event(), ctx.Queue()
+        procs = [ctx.Process(target=worker, args=(args.seed + i, args, start, results)) for i in range(workers)]
+        for proc in procs:
+            proc.start()
+        time.sleep(args.settle)
+        start.set()
+        out = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+    elapsed = max(r[0] for r in out)
+    hits = sum(r[1] for r in out)
+    dateparser_calls = sum(r[2] for r in out)
+    local_entries = sum(r[3] for r in out)
+    return elapsed, hits / (workers * args.prompts), dateparser_calls, local_entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4])
+    parser.add_argument("--phrases", type=int, default=500)
+    parser.add_argument("--prompts", type=int, default=1000, help="prompts per worker")
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds for workers to start and warm up")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        for shared in (False, True):
+            elapsed, hit_rate, calls, local = run(workers, shared, args)
+            print(f"workers={workers:<3} shared={'on ' if shared else 'off'} {elapsed:7.2f}s  "
+                  f"hit rate {hit_rate:6.1%}  dateparser calls {calls:>6}  local entries {local:>6}")
+
+
+if __name__ == "__main__":
+    main()
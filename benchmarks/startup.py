@@ -0,0 +1,113 @@
+# benchmarks/startup.py
+"""Cold-start budget: import time and time to first request, in fresh interpreters.
+
+    python -m benchmarks.startup            # gate against budgets and baselines.json
+    python -m benchmarks.startup --update   # record a new baseline
+
+Each run starts a new Python process, so nothing is shared between samples.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import DEFAULT_THRESHOLD, compare, format_table, load_baselines, percentile, save_baselines
+from benchmarks.run import BASELINE_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Hard ceilings in milliseconds, independent of the stored baseline.
+BUDGETS_MS = {
+    "startup_import": 1500.0,
+    "startup_first_propose_cold": 1000.0,
+    "startup_first_propose_warm": 50.0,
+}
+
+PROBE = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import backend.app.main as main
+import_ms = (time.perf_counter() - t0) * 1000
+
+import httpx
+from backend.app import warmup
+
+PROMPT = "Schedule a 30-minute meeting tomorrow at 10am with alice@example.com"
+
+async def first_propose():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://probe") as client:
+        t = time.perf_counter()
+        resp = await client.post("/propose", json={"prompt": PROMPT})
+        assert resp.status_code == 200, resp.text
+        return (time.perf_counter() - t) * 1000
+
+async def probe():
+    if WARM:
+        await warmup.warm(main.app)
+    return await first_propose()
+
+print(json.dumps({"import_ms": import_ms, "first_ms": asyncio.run(probe())}))
+"""
+
+
+def probe(warm: bool) -> dict:
+    env = dict(os.environ, CALENDAR_BACKEND="fake", WARMUP="false", PYTHONPATH=ROOT)
+    out = subprocess.run(
+        [sys.executable, "-c", f"WARM = {warm}\n" + PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples_ms):
+    samples_ms = sorted(samples_ms)
+    return {
+        "iterations": len(samples_ms),
+        "p50_us": round(percentile(samples_ms, 0.50) * 1000, 1),
+        "p95_us": round(percentile(samples_ms, 0.95) * 1000, 1),
+        "p99_us": round(percentile(samples_ms, 0.99) * 1000, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args(argv)
+
+    cold = [probe(warm=False) for _ in range(args.runs)]
+    warm = [probe(warm=True) for _ in range(args.runs)]
+    results = {
+        "startup_import": summarize([s["import_ms"] for s in cold + warm]),
+        "startup_first_propose_cold": summarize([s["first_ms"] for s in cold]),
+        "startup_first_propose_warm": summarize([s["first_ms"] for s in warm]),
+    }
+
+    baselines = load_baselines(args.baseline)
+    print(format_table(results, baselines))
+
+    failures = [
+        f"{name}: p50 {results[name]['p50_us'] / 1000:.1f}ms over budget {budget:.0f}ms"
+        for name, budget in BUDGETS_MS.items()
+        if results[name]["p50_us"] / 1000 > budget
+    ]
+    if args.update:
+        save_baselines(args.baseline, dict(baselines, **results))
+        print(f"\nbaseline written to {args.baseline}")
+    else:
+        failures += compare(results, baselines, args.threshold)
+
+    if failures:
+        print("\nREGRESSIONS:")
+        for line in failures:
+            print("  " + line)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# frontend/backend_client.py
+
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# One client is shared by every Streamlit session in the process: its
+# keep-alive pool, circuit breaker and proposal cache only help if they
+# outlive a single rerun.
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class BackendUnavailable(Exception):
+    """The circuit is open, or every attempt failed with a retryable error."""
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.lower().split())
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and fails fast for
+    `reset_after_s`; then one trial request is let through (half-open),
+    and its outcome closes or re-opens the circuit."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold: int = 5, reset_after_s: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.reset_after_s = reset_after_s
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_after_s:
+                self.state = self.HALF_OPEN  # this caller is the trial
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.reset_after_s - (self.clock() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class TTLCache:
+    """Small LRU whose entries also expire after ttl_s."""
+
+    def __init__(self, maxsize: int = 256, ttl_s: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self._data: "OrderedDict[Tuple, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[dict]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            if hit[0] <= self.clock():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return hit[1]
+
+    def put(self, key, value: dict):
+        if self.ttl_s <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class BackendClient:
+    """Calls the FastAPI backend over a pooled keep-alive session.
+
+    Connection errors, timeouts and RETRYABLE_STATUSES are retried with
+    exponential backoff and full jitter (a 429/503 Retry-After is honoured).
+    Anything else - a 4xx, a body that is not JSON, {"status": "error"} - is
+    returned at once, since sending it again gives the same answer.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 10, max_attempts: int = 3,
+                 backoff_s: float = 0.2, max_backoff_s: float = 2.0,
+                 connect_timeout_s: float = 3.05, read_timeout_s: float = 30.0,
+                 cache_ttl_s: float = 30.0, breaker: Optional[CircuitBreaker] = None,
+                 sleep: Callable[[float], None] = time.sleep, rand: Callable[[], float] = random.random):
+        self.base_url = base_url.rstrip("/")
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.timeout = (connect_timeout_s, read_timeout_s)
+        self.breaker = breaker or CircuitBreaker()
+        self.proposals = TTLCache(ttl_s=cache_ttl_s)
+        self.sleep = sleep
+        self.rand = rand
+        self.counts = {"requests": 0, "retries": 0, "short_circuited": 0, "cache_hits": 0}
+
+        self.session = requests.Session()
+        # urllib3 retries are off: retrying is done here, where the breaker sees it
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def stats(self) -> dict:
+        return dict(self.counts, breaker=self.breaker.state)
+
+    # -- transport --------------------------------------------------------
+
+    def _delay(self, attempt: int, resp: Optional[requests.Response]) -> float:
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff_s)
+            except ValueError:
+                pass  # an HTTP date; fall back to backoff
+        return self.rand() * min(self.max_backoff_s, self.backoff_s * 2 ** attempt)
+
+    def _post(self, path: str, payload: dict, headers: Optional[dict] = None, stream: bool = False) -> requests.Response:
+        """POST with retries. Returns the first non-retryable response."""
+        if not self.breaker.allow():
+            self.counts["short_circuited"] += 1
+            raise BackendUnavailable(f"Backend unavailable; retrying in {self.breaker.retry_in():.1f}s")
+
+        last_err = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.counts["retries"] += 1
+            self.counts["requests"] += 1
+            resp = None
+            try:
+                resp = self.session.post(f"{self.base_url}{path}", json=payload, headers=headers,
+                                         timeout=self.timeout, stream=stream)
+                if resp.status_code not in RETRYABLE_STATUSES:
+                    self.breaker.record_success()
+                    return resp
+                last_err = f"status {resp.status_code}"
+                resp.close()
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                last_err = str(exc)
+
+            self.breaker.record_failure()
+            if attempt + 1 == self.max_attempts or not self.breaker.allow():
+                break
+            self.sleep(self._delay(attempt, resp))
+        raise BackendUnavailable(f"Backend unavailable after {attempt + 1} attempt(s): {last_err}")
+
+    @staticmethod
+    def _json(resp: requests.Response) -> dict:
+        try:
+            return resp.json()
+        except ValueError:
+            return {"status": "error", "message": f"Backend returned non-JSON (status={resp.status_code})."}
+
+    # -- endpoints --------------------------------------------------------
+
+    def propose(self, prompt: str, time_zone: Optional[str] = None) -> dict:
+        key = (normalize_prompt(prompt), time_zone)
+        cached = self.proposals.get(key)
+        if cached is not None:
+            self.counts["cache_hits"] += 1
+            return cached
+        body = {"prompt": prompt}
+        if time_zone:
+            body["time_zone"] = time_zone
+        try:
+            data = self._json(self._post("/propose", body))
+        except BackendUnavailable as exc:
+            return {"status": "error", "message": str(exc)}
+        if data.get("status") == "ok":
+            self.proposals.put(key, data)
+        return data
+
+    def propose_stream(self, prompt: str, time_zone: Optional[str] = None) -> Iterator[dict]:
+        """Events from /propose/stream: intent, slot..., then done or error.
+
+        Only connecting is retried; once events have been shown, a dropped
+        stream ends with an error event. A cached proposal is replayed as events.
+        """
+        key = (normalize_prompt(prompt), time_zone)
+        cached = self.proposals.get(key)
+        if cached is not None:
+            self.counts["cache_hits"] += 1
+            yield dict({k: v for k, v in cached.items() if k not in ("status", "slots")}, type="intent")
+            for i, slot in enumerate(cached["slots"]):
+                yield dict(slot, type="slot", index=i)
+            yield {"type": "done", "slots": len(cached["slots"])}
+            return
+
+        body = {"prompt": prompt}
+        if time_zone:
+            body["time_zone"] = time_zone
+        try:
+            resp = self._post("/propose/stream", body, stream=True)
+        except BackendUnavailable as exc:
+            yield {"type": "error", "message": str(exc)}
+            return
+
+        with resp:
+            if resp.status_code != 200:
+                yield {"type": "error", "message": self._json(resp).get("message") or f"Backend error (status {resp.status_code})"}
+                return
+            result: Dict = {"status": "ok", "slots": []}
+            try:
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    kind = event.get("type")
+                    if kind == "intent":
+                        result.update({k: v for k, v in event.items() if k != "type"})
+                    elif kind == "slot":
+                        result["slots"].append({k: v for k, v in event.items() if k not in ("type", "index")})
+                    elif kind == "done" and result["slots"]:
+                        self.proposals.put(key, result)
+                    yield event
+            except (requests.RequestException, ValueError) as exc:
+                self.breaker.record_failure()
+                yield {"type": "error", "message": f"Stream interrupted: {exc}"}
+
+    def confirm(self, event: dict, token_dict: Optional[dict] = None, idempotency_key: Optional[str] = None) -> dict:
+        """Safe to retry: the backend runs one insert per idempotency key."""
+        payload = {"event": event}
+        if token_dict:
+            payload["token_dict"] = token_dict
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        try:
+            return self._json(self._post("/confirm", payload, headers=headers))
+        except BackendUnavailable as exc:
+            return {"status": "error", "message": str(exc)}
@@ -1,10 +1,12 @@
 # frontend/streamlit_app.py
 import os
 import time
-import requests
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
 
+from backend_client import BackendClient
+
 load_dotenv()
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
@@ -29,51 +31,47 @@ if "confirmed" not in st.session_state:
 def append_message(role: str, text: str):
     st.session_state.messages.append((role, text))
 
-def call_propose(prompt: str, timeout: int = 30):
-    """Call backend /propose with retry & fallback logic."""
-    url = f"{BACKEND_URL}/propose"
-    payload = {"prompt": prompt}
-    attempts = 0
-    max_attempts = 2
-    last_err = None
-    while attempts <= max_attempts:
-        try:
-            r = requests.post(url, json=payload, timeout=timeout)
-            # If backend returns non-json (empty) handle that gracefully
-            try:
-                data = r.json()
-            except Exception:
-                raise RuntimeError(f"Backend returned non-JSON (status={r.status_code}).")
-
-            if r.status_code != 200 or data.get("status") != "ok":
-                last_err = data.get("message") or f"Backend error (status {r.status_code})"
-                attempts += 1
-                time.sleep(0.6)
-                continue
-
-            return data
-        except Exception as exc:
-            last_err = str(exc)
-            attempts += 1
-            time.sleep(0.6)
-    # all attempts failed
-    return {"status": "error", "message": f"Failed to propose: {last_err}"}
-
-def call_confirm(event: dict, token_dict: dict | None = None, timeout: int = 30):
+@st.cache_resource
+def backend_client() -> BackendClient:
+    """One pooled client per process, shared across reruns and sessions."""
+    return BackendClient(
+        BACKEND_URL,
+        pool_size=int(os.getenv("BACKEND_POOL_SIZE", "10")),
+        max_attempts=int(os.getenv("BACKEND_MAX_ATTEMPTS", "3")),
+        cache_ttl_s=float(os.getenv("PROPOSAL_CACHE_TTL_S", "30")),
+    )
+
+def call_propose(prompt: str):
+    """Call backend /propose (pooled, retried, cached per prompt)."""
+    return backend_client().propose(prompt)
+
+def propose_incrementally(prompt: str):
+    """Show each option as soon as the backend finds it; return the full /propose-shaped response."""
+    resp = {"status": "error", "message": "No response from backend", "slots": []}
+    status = st.empty()
+    status.info("Thinking... proposing time slots")
+    options = st.container()
+    for event in backend_client().propose_stream(prompt):
+        kind = event.get("type")
+        if kind == "intent":
+            resp.update(event, status="ok")
+            who = ", ".join(event.get("emails") or []) or "no attendees"
+            status.info(f"Looking for {event.get('duration_min')} min with {who}...")
+        elif kind == "slot":
+            resp["slots"].append(event)
+            options.markdown(f"**Option {event['index'] + 1}:** {event.get('human')}")
+        elif kind == "error":
+            resp.update(status="error", message=event.get("message"))
+            break
+    status.empty()
+    if resp.get("status") == "ok" and not resp["slots"]:
+        resp.update(status="error", message="No slots found")
+    return resp
+
+def call_confirm(event: dict, token_dict: dict | None = None, idempotency_key: str | None = None):
     """Call backend /confirm. Return JSON dict."""
-    url = f"{BACKEND_URL}/confirm"
-    payload = {"event": event}
-    # optionally include token_dict if available
-    if token_dict:
-        payload["token_dict"] = token_dict
-    try:
-        r = requests.post(url, json=payload, timeout=timeout)
-        try:
-            return r.json()
-        except Exception:
-            return {"status": "error", "message": f"Invalid response from backend (status {r.status_code})"}
-    except Exception as exc:
-        return {"status": "error", "message": str(exc)}
+    # same key for every click on the same option, so the backend inserts it once
+    return backend_client().confirm(event, token_dict=token_dict, idempotency_key=idempotency_key)
 
 # --- UI ---
 st.title("🙂 Meeting Scheduler Agent (Demo)")
@@ -91,11 +89,11 @@ with left_col:
             st.session_state.pending_options = None
             st.session_state.confirmed = False
             append_message("user", prompt)
-            with st.spinner("Thinking... proposing time slots"):
-                resp = call_propose(prompt)
+            resp = propose_incrementally(prompt)
             if resp.get("status") == "ok" and resp.get("slots"):
-                st.success("Here are three available time slots:")
+                st.success(f"Here are {len(resp['slots'])} available time slots:")
                 st.session_state.pending_options = resp
+                st.session_state.proposal_id = uuid.uuid4().hex
                 # Add assistant message with friendly text
                 human_summary = resp.get("summary","Meeting")
                 append_message("assistant", f"Here are {len(resp['slots'])} options for '{human_summary}':")
@@ -121,7 +119,7 @@ opts = st.session_state.pending_options
 if opts:
     st.markdown("### 📅 Available time options:")
     for i, slot in enumerate(opts["slots"]):
-        human = slot.get("human") or f"{slot.get('start_iso')} - {slot.get('end_iso')}"
+        human = slot.get("human") or f"{slot.get('start')} - {slot.get('end')}"
         st.markdown(f"**Option {i+1}:** {human}")
         btn_key = f"confirm_{i}"
         if st.button(f"Confirm Option {i+1}", key=btn_key):
@@ -136,10 +134,12 @@ if opts:
                 # If frontend stored token (optional), you could pass it here
                 resp = call_confirm({
                     "summary": opts.get("summary","Meeting"),
-                    "start": slot.get("start_iso"),
-                    "end": slot.get("end_iso"),
+                    "start": slot.get("start"),
+                    "end": slot.get("end"),
+                    "recurrence": slot.get("recurrence"),
+                    "time_zone": opts.get("time_zone"),
                     "human": human
-                }, token_dict=token_dict)
+                }, token_dict=token_dict, idempotency_key=f"{st.session_state.get('proposal_id')}-{i}")
                 st.session_state.confirm_lock = False
 
                 if resp.get("status") == "ok":
@@ -171,6 +171,7 @@ with cols[0]:
                 resp = call_propose(st.session_state.last_request)
             if resp.get("status") == "ok" and resp.get("slots"):
                 st.session_state.pending_options = resp
+                st.session_state.proposal_id = uuid.uuid4().hex
                 append_message("assistant", f"Retry result: Found {len(resp['slots'])} slots.")
             else:
                 append_message("assistant", f"Retry failed: {resp.get('message','unknown')}")
@@ -0,0 +1,100 @@
+# tests/conftest.py
+import os
+import tempfile
+
+import pytest
+
+# backend.app.config reads these at import: keep the tests off the real
+# database, Google Calendar and the host-wide shared cache.
+_tmp = tempfile.mkdtemp(prefix="meeting-agent-tests-")
+os.environ.setdefault("DB_PATH", os.path.join(_tmp, "meetings.db"))
+os.environ.setdefault("CHROMA_PATH", os.path.join(_tmp, "chroma"))
+os.environ.setdefault("SHARED_CACHE_DIR", _tmp)
+os.environ.setdefault("CALENDAR_BACKEND", "fake")
+os.environ.setdefault("BUSY_SOURCE", "memory")
+os.environ.setdefault("WARMUP", "false")
+os.environ.setdefault("DEMO_MODE", "false")
+
+
+@pytest.fixture
+def busy():
+    """A fresh in-memory busy store behind propose_slots."""
+    from backend.app.availability import InMemoryBusySource
+    from backend.app.scheduler_engine import set_busy_source
+
+    source = InMemoryBusySource()
+    set_busy_source(source)
+    yield source
+    set_busy_source(None)
+
+
+@pytest.fixture
+def profiles():
+    """A profile directory that never reads the database."""
+    from backend.app.timezones import ProfileDirectory, set_profile_directory
+
+    directory = ProfileDirectory(loader=lambda email: None)
+    set_profile_directory(directory)
+    yield directory
+    set_profile_directory(None)
+
+
+@pytest.fixture(scope="session")
+def emulator_url():
+    """The calendar emulator served by uvicorn on a free local port."""
+    import socket
+    import threading
+    import time
+
+    import uvicorn
+
+    from backend.app.calendar_emulator import emulator_app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(emulator_app(seed=0), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture
+def google_token(emulator_url, monkeypatch):
+    """OAuth fields for a calendar client that talks to the emulator."""
+    from backend.app import calendar_tool
+
+    # the discovery document's rootUrl is fixed when it is first loaded
+    monkeypatch.setattr(calendar_tool, "GOOGLE_API_ROOT", emulator_url)
+    monkeypatch.setattr(calendar_tool, "_discovery_doc", None)
+    calendar_tool.client_pool().clear()
+    yield {"refresh_token": "tester", "client_id": "tests", "client_secret": "tests",
+           "token_uri": f"{emulator_url}/token"}
+    calendar_tool.client_pool().clear()
+
+
+@pytest.fixture
+def calendar():
+    """The in-memory calendar client behind /confirm, with fresh idempotency keys."""
+    from backend.app.async_calendar import FakeAsyncCalendarClient, set_calendar_client
+    from backend.app.idempotency import IdempotencyStore, set_idempotency_store
+
+    client = FakeAsyncCalendarClient()
+    set_calendar_client(client)
+    set_idempotency_store(IdempotencyStore())
+    yield client
+    set_calendar_client(None)
+
+
+@pytest.fixture
+def api(calendar):
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as client:
+        yield client
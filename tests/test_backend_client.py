@@ -0,0 +1,228 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from frontend.backend_client import BackendClient, BackendUnavailable, CircuitBreaker, TTLCache
+
+PROPOSAL = {"status": "ok", "summary": "Sync", "emails": ["a@example.com"], "time_zone": "UTC",
+            "slots": [{"start": "2030-01-01T10:00:00+00:00", "end": "2030-01-01T10:30:00+00:00"}]}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Backend:
+    """A local HTTP server answering each POST with the next scripted
+    (status, headers, body) - the last one repeats - and recording the requests."""
+
+    def __init__(self):
+        self.script = []
+        self.requests = []
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                backend.requests.append((self.path, dict(self.headers), json.loads(self.rfile.read(length))))
+                status, headers, body = backend.script.pop(0) if len(backend.script) > 1 else backend.script[0]
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def answer(self, *responses):
+        self.script = [r if isinstance(r, tuple) else (200, {}, r) for r in responses]
+
+
+@pytest.fixture
+def backend():
+    server = Backend()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+@pytest.fixture
+def client(backend):
+    sleeps = []
+    client = BackendClient(backend.url, max_attempts=3, backoff_s=0.1, max_backoff_s=1.0,
+                           breaker=CircuitBreaker(threshold=5), sleep=sleeps.append, rand=lambda: 1.0)
+    client.sleeps = sleeps
+    yield client
+    client.close()
+
+
+def test_retryable_statuses_are_retried_with_backoff(backend, client):
+    backend.answer((503, {}, {"status": "error"}), (502, {}, b"bad gateway"), PROPOSAL)
+
+    assert client.propose("Sync with a@example.com") == PROPOSAL
+    assert len(backend.requests) == 3
+    assert client.sleeps == [0.1, 0.2]
+    assert client.stats()["retries"] == 2 and client.stats()["breaker"] == "closed"
+
+
+def test_retry_after_is_honoured_up_to_the_cap(backend, client):
+    backend.answer((429, {"Retry-After": "0.5"}, {}), (503, {"Retry-After": "30"}, {}), PROPOSAL)
+
+    client.propose("sync")
+
+    assert client.sleeps == [0.5, 1.0]
+
+
+def test_client_errors_are_not_retried(backend, client):
+    backend.answer((422, {}, {"status": "error", "message": "A meeting has to last at least a minute"}))
+
+    assert client.propose("0 min sync")["message"] == "A meeting has to last at least a minute"
+    assert len(backend.requests) == 1
+
+
+def test_non_json_body_is_an_error_result(backend, client):
+    backend.answer((200, {}, b"<html>proxy</html>"))
+
+    assert client.propose("sync") == {"status": "error", "message": "Backend returned non-JSON (status=200)."}
+
+
+def test_giving_up_is_an_error_result(backend, client):
+    backend.answer((503, {}, {}))
+
+    result = client.propose("sync")
+
+    assert result["status"] == "error"
+    assert result["message"] == "Backend unavailable after 3 attempt(s): status 503"
+
+
+def test_connection_refused_is_retried_then_reported(backend):
+    url = backend.url
+    backend.server.shutdown()
+    backend.server.server_close()
+    client = BackendClient(url, max_attempts=2, sleep=lambda s: None)
+
+    with pytest.raises(BackendUnavailable):
+        client._post("/propose", {"prompt": "sync"})
+    assert client.stats()["requests"] == 2
+
+
+def test_circuit_opens_then_lets_one_trial_through(backend):
+    clock = Clock()
+    client = BackendClient(backend.url, max_attempts=1, breaker=CircuitBreaker(2, 10.0, clock), sleep=lambda s: None)
+    backend.answer((503, {}, {}))
+
+    client.propose("a")
+    client.propose("b")
+    assert client.stats()["breaker"] == "open"
+    assert client.propose("c")["message"] == "Backend unavailable; retrying in 10.0s"
+    assert len(backend.requests) == 2 and client.stats()["short_circuited"] == 1
+
+    clock.now = 10
+    backend.answer(PROPOSAL)
+    assert client.propose("d") == PROPOSAL
+    assert client.stats()["breaker"] == "closed"
+
+
+def test_failed_trial_reopens_the_circuit(backend):
+    clock = Clock()
+    breaker = CircuitBreaker(1, 10.0, clock)
+    client = BackendClient(backend.url, max_attempts=3, breaker=breaker, sleep=lambda s: None)
+    backend.answer((503, {}, {}))
+
+    client.propose("a")
+    clock.now = 10
+    client.propose("b")
+
+    assert len(backend.requests) == 2  # one attempt each: an open circuit stops the retries
+    assert breaker.state == "open" and breaker.retry_in() == 10.0
+
+
+def test_proposals_are_cached_by_normalized_prompt(backend, client):
+    backend.answer(PROPOSAL)
+
+    client.propose("Sync with A@example.com ")
+    client.propose("sync  with a@example.com")
+    client.propose("sync with a@example.com", time_zone="Asia/Kolkata")
+
+    assert len(backend.requests) == 2
+    assert backend.requests[1][2] == {"prompt": "sync with a@example.com", "time_zone": "Asia/Kolkata"}
+    assert client.stats()["cache_hits"] == 1
+
+
+def test_errors_are_not_cached(backend, client):
+    backend.answer({"status": "error", "message": "Could not parse date"})
+
+    client.propose("sync")
+    client.propose("sync")
+
+    assert len(backend.requests) == 2
+
+
+def test_ttl_cache_expires_and_evicts():
+    clock = Clock()
+    cache = TTLCache(maxsize=2, ttl_s=30, clock=clock)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None  # least recently used
+    assert cache.get("a") == {"n": 1}
+    clock.now = 30
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def test_stream_is_read_and_cached(backend, client):
+    events = [{"type": "intent", "summary": "Sync", "emails": ["a@example.com"]},
+              dict(PROPOSAL["slots"][0], type="slot", index=0), {"type": "done", "slots": 1}]
+    backend.answer((200, {"Content-Type": "application/x-ndjson"},
+                    "".join(json.dumps(e) + "\n" for e in events).encode()))
+
+    assert list(client.propose_stream("sync")) == events
+    replayed = list(client.propose_stream("sync"))
+
+    assert len(backend.requests) == 1
+    assert [e["type"] for e in replayed] == ["intent", "slot", "done"]
+    assert replayed[1]["start"] == PROPOSAL["slots"][0]["start"]
+    assert client.propose("sync")["slots"] == PROPOSAL["slots"]
+
+
+def test_broken_stream_ends_with_an_error_event(backend, client):
+    backend.answer((200, {}, b'{"type": "intent"}\n{"type": "sl'))
+
+    events = list(client.propose_stream("sync"))
+
+    assert events[0] == {"type": "intent"}
+    assert events[-1]["type"] == "error" and events[-1]["message"].startswith("Stream interrupted")
+    assert client.proposals.get(("sync", None)) is None
+
+
+def test_stream_error_status_is_an_error_event(backend, client):
+    backend.answer((400, {}, {"status": "error", "message": "Invalid request"}))
+
+    assert list(client.propose_stream("sync")) == [{"type": "error", "message": "Invalid request"}]
+
+
+def test_confirm_sends_the_idempotency_key(backend, client):
+    backend.answer((503, {}, {}), {"status": "ok", "event": {"id": "evt1"}})
+
+    result = client.confirm({"summary": "Sync"}, {"refresh_token": "r"}, idempotency_key="k1")
+
+    assert result["status"] == "ok"
+    assert [r[1]["Idempotency-Key"] for r in backend.requests] == ["k1", "k1"]
+    assert backend.requests[0][2] == {"event": {"summary": "Sync"}, "token_dict": {"refresh_token": "r"}}
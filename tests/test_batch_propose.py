@@ -0,0 +1,47 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.app import batch_propose, db
+from backend.app.availability import to_epoch_min
+from backend.app.scheduler_engine import propose_slots, set_busy_source
+from backend.app.timezones import zone
+
+TZ = "America/New_York"
+PROMPTS = ["30 min with dana@example.com tomorrow at 9am", "1 hour with dana@example.com tomorrow at 2pm"]
+
+
+@pytest.fixture
+def pool():
+    yield batch_propose.process_pool()
+    batch_propose.shutdown()
+
+
+async def collect(prompts, **kwargs):
+    return [r async for r in batch_propose.propose_many(batch_propose.iterate(prompts), **kwargs)]
+
+
+def test_batch_answers_like_propose(pool):
+    # busy time stored by this process, read by the spawned workers
+    source = db.StoredBusySource(db.get_store())
+    tomorrow = (datetime.now(zone(TZ)) + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    source.add_minutes("dana@example.com", [(to_epoch_min(tomorrow), to_epoch_min(tomorrow.replace(hour=15)))])
+    source.flush()
+
+    results = asyncio.run(collect(PROMPTS + PROMPTS[:1], n_slots=2, time_zone=TZ))
+
+    set_busy_source(source)
+    try:
+        for result, prompt in zip(results, PROMPTS + PROMPTS[:1]):
+            alone = propose_slots(prompt, 2, time_zone=TZ)
+            assert result["status"] == "ok" and result["time_zone"] == TZ
+            assert result["slots"] == alone["slots"]
+            assert datetime.fromisoformat(result["slots"][0]["start"]) >= tomorrow.replace(hour=15)
+    finally:
+        set_busy_source(None)
+
+    store = db.get_store()
+    store.flush()
+    saved = [row["prompt"] for row in store._reader().execute("SELECT prompt FROM proposals")]
+    assert saved.count(PROMPTS[0]) == 2 and saved.count(PROMPTS[1]) == 1
@@ -0,0 +1,154 @@
+from datetime import datetime, timezone
+from itertools import combinations
+
+import pytest
+
+from backend.app.batch_scheduler import MeetingRequest, Room, schedule, schedule_batch
+
+MONDAY = 29_630_880  # 2026-05-04 00:00 UTC, in epoch minutes
+TEN = MONDAY + 600
+
+
+def meeting(*emails, duration=60, start=TEN, end=TEN + 240, room=False, capacity=None):
+    return MeetingRequest("Sync", tuple(emails), duration, start, end, room, capacity or len(emails))
+
+
+def run(busy, requests, rooms=(), budget=2.0):
+    return schedule(requests, rooms, busy, "UTC", time_budget_s=budget, workers=1)
+
+
+def span(entry):
+    return datetime.fromisoformat(entry["start"]), datetime.fromisoformat(entry["end"])
+
+
+def overlaps(a, b):
+    (s1, e1), (s2, e2) = span(a), span(b)
+    return s1 < e2 and s2 < e1
+
+
+def test_meetings_sharing_an_attendee_do_not_overlap(busy, profiles):
+    result = run(busy, [meeting("a@x.com", "b@x.com"), meeting("a@x.com", "c@x.com"), meeting("a@x.com")])
+
+    assert result["scheduled"] == 3 and result["unscheduled"] == 0
+    assert result["components"] == 1
+    for m1, m2 in combinations(result["meetings"], 2):
+        assert not overlaps(m1, m2)
+
+
+def test_busy_time_is_avoided(busy, profiles):
+    busy.add_minutes("a@x.com", [(TEN, TEN + 120)])
+
+    (entry,) = run(busy, [meeting("a@x.com")])["meetings"]
+
+    assert span(entry)[0] >= datetime(2026, 5, 4, 12, 0, tzinfo=timezone.utc)
+
+
+def test_clashing_meetings_drop_one_and_name_the_blocker(busy, profiles):
+    result = run(busy, [meeting("a@x.com", end=TEN + 60), meeting("a@x.com", "b@x.com", end=TEN + 60)])
+
+    first, second = result["meetings"]
+    assert first["status"] == "scheduled"
+    assert second["status"] == "unscheduled"
+    assert second["reasons"] == ["every free time clashes with meeting(s) 0 that share attendees",
+                                 "no placement fits every meeting it shares attendees or rooms with"]
+    assert result["search"] == {"infeasible": 1}
+
+
+def test_unrelated_meetings_are_solved_apart(busy, profiles):
+    result = run(busy, [meeting("a@x.com"), meeting("b@x.com"), meeting("a@x.com", "c@x.com")])
+
+    assert result["scheduled"] == 3
+    assert result["components"] == 2
+
+
+def test_smallest_room_that_seats_everyone_is_taken(busy, profiles):
+    rooms = [Room("hall", 40), Room("small", 2), Room("medium", 6)]
+
+    (entry,) = run(busy, [meeting("a@x.com", room=True, capacity=5)], rooms)["meetings"]
+
+    assert entry["room"] == "medium"
+
+
+def test_a_room_is_not_double_booked(busy, profiles):
+    rooms = [Room("only", 8)]
+    requests = [meeting("a@x.com", room=True, end=TEN + 120), meeting("b@x.com", room=True, end=TEN + 120)]
+
+    first, second = run(busy, requests, rooms)["meetings"]
+
+    assert first["room"] == second["room"] == "only"
+    assert not overlaps(first, second)
+
+
+def test_room_taken_by_another_meeting_is_a_reason(busy, profiles):
+    rooms = [Room("only", 8)]
+    requests = [meeting("a@x.com", room=True, end=TEN + 60), meeting("b@x.com", room=True, end=TEN + 60)]
+
+    result = run(busy, requests, rooms)
+
+    assert result["scheduled"] == 1
+    (dropped,) = [m for m in result["meetings"] if m["status"] == "unscheduled"]
+    assert dropped["reasons"][0] == "no room that seats 1 is left when the attendees are free"
+
+
+def test_room_bookings_come_from_the_busy_source(busy, profiles):
+    busy.add_minutes("only", [(TEN, TEN + 240)])
+
+    (entry,) = run(busy, [meeting("a@x.com", room=True)], [Room("only", 8)])["meetings"]
+
+    assert entry["reasons"] == ["no room that seats 1 is free when the attendees are"]
+
+
+@pytest.mark.parametrize("request_, reason", [
+    (meeting("a@x.com", capacity=12, room=True), "no room seats 12"),
+    (meeting("a@x.com", duration=90, end=TEN + 60), "the window is shorter than 90 min"),
+    (meeting("a@x.com", "b@x.com"), "b@x.com has no free 60 min in the window"),
+    (meeting("a@x.com", "c@x.com"), "the attendees have no free time in common in the window"),
+])
+def test_infeasible_requests_say_why(busy, profiles, request_, reason):
+    busy.add_minutes("b@x.com", [(TEN, TEN + 240)])
+    busy.add_minutes("a@x.com", [(TEN, TEN + 120)])
+    busy.add_minutes("c@x.com", [(TEN + 120, TEN + 240)])
+
+    result = run(busy, [meeting("d@x.com"), request_], [Room("only", 8)])
+
+    assert result["meetings"][0]["status"] == "scheduled"
+    assert result["meetings"][1] == {"index": 1, "summary": "Sync", "emails": list(request_.emails),
+                                     "status": "unscheduled", "reasons": [reason]}
+
+
+def test_far_off_window_is_not_searched(busy, profiles):
+    far = TEN + 400 * 1440
+
+    result = run(busy, [meeting("a@x.com"), meeting("b@x.com", start=far, end=far + 240)])
+
+    assert result["meetings"][1]["reasons"][0].startswith("its window starts more than")
+
+
+def test_spent_budget_keeps_the_greedy_placement(busy, profiles):
+    # nine hours for ten one-hour meetings of one person: proving that
+    # takes far more than the 64 nodes searched before the deadline check
+    requests = [meeting("a@x.com", end=TEN + 540) for _ in range(10)]
+
+    result = run(busy, requests, budget=0)
+
+    assert result["search"] == {"budget": 1}
+    assert result["scheduled"] >= 1
+    for entry in result["meetings"]:
+        if entry["status"] == "unscheduled":
+            assert entry["reasons"][-1] == "the time budget ran out before every meeting could be placed"
+    placed = [m for m in result["meetings"] if m["status"] == "scheduled"]
+    for m1, m2 in combinations(placed, 2):
+        assert not overlaps(m1, m2)
+
+
+def test_prompts_that_do_not_parse_come_back_unscheduled(busy, profiles):
+    result = schedule_batch(
+        ["sync 30 min with a@x.com on 2026-05-04 at 10am", {"prompt": "0 min with a@x.com", "summary": "Lost"}],
+        time_zone="UTC", busy_source=busy, time_budget_s=1,
+    )
+
+    assert [m["index"] for m in result["meetings"]] == [0, 1]
+    assert result["meetings"][0]["status"] == "scheduled"
+    assert result["meetings"][1] == {"index": 1, "summary": "Lost", "emails": [], "status": "unscheduled",
+                                     "reasons": ["A meeting has to last at least a minute"]}
+    assert result["scheduled"] == 1 and result["unscheduled"] == 1
@@ -0,0 +1,91 @@
+import threading
+
+from backend.app.calendar_tool import CALENDAR_BATCH_LIMIT, GoogleCalendarTool
+
+
+def events(n, calendar_id="primary"):
+    return [{"summary": f"Sync {i}", "start": "2026-05-04T10:00:00+05:30", "end": "2026-05-04T10:30:00+05:30",
+             "calendar_id": calendar_id} for i in range(n)]
+
+
+class FlakyHttp:
+    """Lets the first `failures` batch requests time out, passes the rest through.
+
+    With `delivered`, a failing request still reaches the server and only
+    its answer is lost.
+    """
+
+    def __init__(self, http, counter):
+        self.http = http
+        self.counter = counter
+
+    def request(self, *args, **kwargs):
+        with self.counter["lock"]:
+            self.counter["calls"] += 1
+            fail = self.counter["calls"] <= self.counter["failures"]
+        if fail:
+            if self.counter["delivered"]:
+                self.http.request(*args, **kwargs)
+            raise TimeoutError("timed out")
+        return self.http.request(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+
+def flaky_tool(token, failures, delivered=False):
+    tool = GoogleCalendarTool(token)
+    counter = {"lock": threading.Lock(), "calls": 0, "failures": failures, "delivered": delivered}
+    real = tool.client.http
+    tool.client.http = lambda: FlakyHttp(real(), counter)
+    return tool
+
+
+def test_create_events_batches_per_calendar(google_token):
+    batch = events(CALENDAR_BATCH_LIMIT + 1) + events(3, "team@example.com")
+    outcome = GoogleCalendarTool(google_token).create_events(batch)
+
+    assert outcome["round_trips"] == 3
+    assert [r["index"] for r in outcome["results"]] == list(range(len(batch)))
+    assert all(r["status"] == "ok" and r["created"]["id"] for r in outcome["results"])
+
+
+def test_transport_failure_is_recorded_per_item(google_token):
+    batch = events(CALENDAR_BATCH_LIMIT) + events(CALENDAR_BATCH_LIMIT, "team@example.com")
+    outcome = flaky_tool(google_token, failures=1).create_events(batch, max_attempts=1)
+
+    # the other sub-batch's inserts are kept
+    statuses = [r["status"] for r in outcome["results"]]
+    assert statuses.count("ok") == CALENDAR_BATCH_LIMIT
+    failed = [r for r in outcome["results"] if r["status"] != "ok"]
+    assert len(failed) == CALENDAR_BATCH_LIMIT
+    assert all(r["http_status"] == 0 and "TimeoutError" in r["message"] for r in failed)
+
+
+def test_transport_failure_is_retried(google_token):
+    outcome = flaky_tool(google_token, failures=1).create_events(events(5), backoff_s=0)
+
+    assert outcome["round_trips"] == 2
+    assert all(r["status"] == "ok" for r in outcome["results"])
+
+
+def test_resend_of_a_delivered_batch_creates_nothing_twice(google_token):
+    batch = [dict(ev, start="2031-01-06T10:00:00+00:00", end="2031-01-06T10:30:00+00:00") for ev in events(3)]
+    tool = flaky_tool(google_token, failures=1, delivered=True)
+    outcome = tool.create_events(batch, backoff_s=0)
+
+    assert outcome["round_trips"] == 2
+    assert all(r["status"] == "ok" and r["existing"] for r in outcome["results"])
+    listed = tool.client.execute(tool.service.events().list(
+        calendarId="primary", timeMin="2031-01-06T00:00:00Z", timeMax="2031-01-07T00:00:00Z"))
+    assert len(listed["items"]) == 3
+    assert {ev["id"] for ev in listed["items"]} == {r["created"]["id"] for r in outcome["results"]}
+
+
+def test_given_event_ids_are_used(google_token):
+    batch = [dict(ev, event_id=f"given{i}") for i, ev in enumerate(events(2))]
+    outcome = GoogleCalendarTool(google_token).create_events(batch)
+    again = GoogleCalendarTool(google_token).create_events(batch)
+
+    assert [r["created"]["id"] for r in outcome["results"]] == ["given0", "given1"]
+    assert all(r.get("existing") for r in again["results"])
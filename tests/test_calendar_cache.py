@@ -0,0 +1,214 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from backend.app import calendar_cache, shared_cache
+from backend.app.availability import to_epoch_min
+from backend.app.calendar_cache import BusyIntervalCache, FakeEventsAPI, record_created, set_busy_cache
+from backend.app.config import SHARED_BUSY_DAYS
+
+DAY = (datetime.now(timezone.utc) + timedelta(days=2)).replace(hour=0, minute=0, second=0, microsecond=0)
+LO = to_epoch_min(DAY)
+HI = LO + 1440
+
+
+def event(event_id, hour, minutes=60, **extra):
+    start = DAY + timedelta(hours=hour)
+    return dict({"id": event_id, "start": {"dateTime": start.isoformat()},
+                 "end": {"dateTime": (start + timedelta(minutes=minutes)).isoformat()}}, **extra)
+
+
+def at(hour, minutes=60):
+    return [LO + hour * 60, LO + hour * 60 + minutes]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def no_shared(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_cache", None)
+    monkeypatch.setattr(shared_cache, "_unavailable", True)
+
+
+@pytest.fixture
+def shared(tmp_path, monkeypatch):
+    cache = shared_cache.SharedCache(str(tmp_path / "busy.cache"), {"busy": (16, 8 + SHARED_BUSY_DAYS * 1440 // 8)})
+    monkeypatch.setattr(shared_cache, "_cache", cache)
+    monkeypatch.setattr(shared_cache, "_unavailable", False)
+    yield cache
+    cache.close()
+
+
+def busy(cache, email="a@x.com"):
+    return cache.busy_intervals([email], LO, HI)[email].tolist()
+
+
+def test_reads_within_the_ttl_do_not_call_the_api(no_shared):
+    api = FakeEventsAPI()
+    api.upsert("a@x.com", event("e1", 10))
+    cache = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+
+    assert busy(cache) == [at(10)]
+    assert busy(cache) == [at(10)]
+    assert api.calls == {"full": 1, "delta": 0}
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_stale_read_applies_only_the_changes(no_shared):
+    api = FakeEventsAPI()
+    clock = Clock()
+    api.upsert("a@x.com", event("e1", 10))
+    api.upsert("a@x.com", event("e2", 12))
+    cache = BusyIntervalCache(api, ttl_s=60, clock=clock)
+    busy(cache)
+
+    api.upsert("a@x.com", event("e3", 14, 30))
+    api.delete("a@x.com", "e1")
+    api.upsert("a@x.com", event("e2", 13))  # moved
+    api.upsert("b@x.com", event("e4", 9))
+    assert busy(cache) == [at(10), at(12)]  # still within the TTL
+
+    clock.now = 61
+    assert busy(cache) == [at(13), at(14, 30)]
+    assert api.calls == {"full": 1, "delta": 1}
+    assert cache.stats()["avg_staleness_s"] == 61
+
+
+def test_expired_sync_token_falls_back_to_a_full_sync(no_shared):
+    api = FakeEventsAPI()
+    clock = Clock()
+    api.upsert("a@x.com", event("e1", 10))
+    cache = BusyIntervalCache(api, ttl_s=60, clock=clock)
+    busy(cache)
+
+    api.delete("a@x.com", "e1")
+    api.upsert("a@x.com", event("e2", 15))
+    api.expire_tokens()
+    clock.now = 61
+
+    assert busy(cache) == [at(15)]
+    assert api.calls == {"full": 2, "delta": 1}
+    assert cache.stats()["resyncs"] == 1
+
+
+def test_least_recently_used_calendar_is_evicted(no_shared):
+    api = FakeEventsAPI()
+    for email in ("a@x.com", "b@x.com", "c@x.com"):
+        api.upsert(email, event(email, 10))
+    cache = BusyIntervalCache(api, ttl_s=60, max_calendars=2, clock=Clock())
+
+    for email in ("a@x.com", "b@x.com", "a@x.com", "c@x.com"):
+        busy(cache, email)
+    assert api.calls["full"] == 3
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+
+    busy(cache, "a@x.com")  # kept: it was used after b
+    assert api.calls["full"] == 3
+    busy(cache, "b@x.com")
+    assert api.calls["full"] == 4
+
+
+def test_own_inserts_are_written_through(no_shared):
+    api = FakeEventsAPI()
+    api.upsert("a@x.com", event("e1", 10))
+    cache = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+    busy(cache)
+
+    cache.apply_event("a@x.com", event("mine", 16))
+    assert busy(cache) == [at(10), at(16)]
+    cache.apply_event("a@x.com", event("e1", 10, status="cancelled"))
+    cache.apply_event("a@x.com", event("free", 11, transparency="transparent"))
+    assert busy(cache) == [at(16)]
+    assert api.calls == {"full": 1, "delta": 0}
+
+    cache.apply_event("z@x.com", event("other", 9))  # not cached: left for its first sync
+    assert cache.stats()["size"] == 1 and cache.stats()["write_through"] == 3
+
+
+def test_record_created_goes_to_the_organizer_calendar(no_shared):
+    cache = BusyIntervalCache(FakeEventsAPI(), ttl_s=60, clock=Clock())
+    busy(cache, "a@x.com")
+    busy(cache, "primary")
+    set_busy_cache(cache)
+    try:
+        record_created(event("mine", 9, organizer={"email": "a@x.com"}))
+        record_created(event("yours", 11))
+    finally:
+        set_busy_cache(None)
+
+    assert busy(cache, "a@x.com") == [at(9)]
+    assert busy(cache, "primary") == [at(11)]
+
+
+def test_workers_share_one_fetch_per_ttl(shared):
+    api = FakeEventsAPI()
+    api.upsert("a@x.com", event("e1", 10))
+    api.upsert("a@x.com", event("e2", 11))  # back to back: the bitmap merges them
+    first = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+    second = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+
+    assert busy(first) == [at(10), at(11)]
+    assert busy(second) == [at(10, 120)]
+    assert api.calls["full"] == 1
+    assert first.stats()["published"] == 1 and second.stats()["shared_hits"] == 1
+
+
+def test_shared_record_must_cover_the_range(shared):
+    api = FakeEventsAPI()
+    api.upsert("a@x.com", event("e1", 10))
+    BusyIntervalCache(api, ttl_s=60, clock=Clock()).busy_intervals(["a@x.com"], LO, HI)
+    second = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+
+    far = LO + (SHARED_BUSY_DAYS + 5) * 1440
+    assert second.busy_intervals(["a@x.com"], far, far + 60)["a@x.com"].shape == (0, 2)
+    assert api.calls["full"] == 2 and second.stats()["shared_hits"] == 0
+
+
+def test_write_through_reaches_the_other_workers(shared):
+    api = FakeEventsAPI()
+    api.upsert("a@x.com", event("e1", 10))
+    first = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+    second = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+    busy(first)
+
+    first.apply_event("a@x.com", event("mine", 14))
+    assert busy(second) == [at(10), at(14)]
+    assert api.calls["full"] == 1
+
+    # a cancellation cannot clear bits another event may share: the record
+    # is dropped and the next worker to read fetches the calendar again
+    first.apply_event("a@x.com", event("e1", 10, status="cancelled"))
+    api.delete("a@x.com", "e1")
+    third = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+    assert busy(third) == []
+    assert api.calls["full"] == 2
+
+
+def test_invalidate_drops_the_shared_record_too(shared):
+    api = FakeEventsAPI()
+    api.upsert("a@x.com", event("e1", 10))
+    first = BusyIntervalCache(api, ttl_s=60, clock=Clock())
+    busy(first)
+
+    first.invalidate("a@x.com")
+    assert first.stats()["size"] == 0
+    busy(BusyIntervalCache(api, ttl_s=60, clock=Clock()))
+    assert api.calls["full"] == 2
+
+
+def test_busy_bitmap_round_trip():
+    intervals = np.array([at(1), at(2, 30), at(5, 15)], dtype=np.int64)
+    data = calendar_cache.pack_busy(intervals, LO)
+
+    assert calendar_cache.covers(data, LO, HI)
+    assert calendar_cache.unpack_busy(data, LO, HI).tolist() == [at(1, 90), at(5, 15)]
+    assert calendar_cache.unpack_busy(data, LO + 90, LO + 100).tolist() == [[LO + 90, LO + 100]]
+    marked = calendar_cache.mark_busy(data, *at(7))
+    assert calendar_cache.unpack_busy(marked, LO, HI).tolist() == [at(1, 90), at(5, 15), at(7)]
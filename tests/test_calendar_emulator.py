@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import shared_cache
+from backend.app.availability import to_epoch_min
+from backend.app.calendar_cache import BusyIntervalCache, GoogleEventsAPI, SyncTokenExpired
+from backend.app.calendar_emulator import emulator_app
+from backend.app.calendar_tool import GoogleCalendarTool
+
+EVENTS = "/calendar/v3/calendars/primary/events"
+ALICE = {"Authorization": "Bearer alice"}
+
+
+def body(hour, minutes=30, **extra):
+    return dict({"summary": "Sync", "start": {"dateTime": f"2030-01-01T{hour:02d}:00:00Z"},
+                 "end": {"dateTime": f"2030-01-01T{hour:02d}:{minutes:02d}:00Z"}}, **extra)
+
+
+@pytest.fixture
+def emulator():
+    with TestClient(emulator_app(seed=0)) as client:
+        yield client
+
+
+def test_primary_is_per_user(emulator):
+    emulator.post(EVENTS, json=body(10), headers=ALICE)
+    emulator.post(EVENTS, json=body(11), headers={"Authorization": "Bearer bob"})
+
+    items = emulator.get(EVENTS, headers=ALICE).json()["items"]
+
+    assert [ev["start"]["dateTime"] for ev in items] == ["2030-01-01T10:00:00Z"]
+    assert items[0]["organizer"] == {"email": "primary:alice", "self": True}
+
+
+def test_delta_sync_and_expired_tokens(emulator):
+    kept = emulator.post(EVENTS, json=body(10), headers=ALICE).json()
+    gone = emulator.post(EVENTS, json=body(12), headers=ALICE).json()
+    token = emulator.get(EVENTS, headers=ALICE).json()["nextSyncToken"]
+
+    assert emulator.delete(f"{EVENTS}/{gone['id']}", headers=ALICE).status_code == 204
+    assert emulator.delete(f"{EVENTS}/{gone['id']}", headers=ALICE).status_code == 410
+    added = emulator.post(EVENTS, json=body(14), headers=ALICE).json()
+    delta = emulator.get(EVENTS, params={"syncToken": token}, headers=ALICE).json()
+
+    assert {ev["id"]: ev["status"] for ev in delta["items"]} == {gone["id"]: "cancelled", added["id"]: "confirmed"}
+    assert kept["id"] not in {ev["id"] for ev in delta["items"]}
+
+    emulator.post("/emulator/expire_sync_tokens")
+    resp = emulator.get(EVENTS, params={"syncToken": delta["nextSyncToken"]}, headers=ALICE)
+    assert resp.status_code == 410
+    assert resp.json()["error"]["errors"][0]["reason"] == "fullSyncRequired"
+
+
+def test_list_pages_and_time_bounds(emulator):
+    for hour in range(9, 14):
+        emulator.post(EVENTS, json=body(hour), headers=ALICE)
+
+    first = emulator.get(EVENTS, params={"maxResults": 2}, headers=ALICE).json()
+    second = emulator.get(EVENTS, params={"maxResults": 2, "pageToken": first["nextPageToken"]}, headers=ALICE).json()
+    bounded = emulator.get(EVENTS, params={"timeMin": "2030-01-01T10:15:00Z", "timeMax": "2030-01-01T12:00:00Z"},
+                           headers=ALICE).json()
+
+    assert len(first["items"]) == 2 and "nextSyncToken" not in first
+    assert second["items"][0]["start"]["dateTime"] == "2030-01-01T11:00:00Z"
+    assert [ev["start"]["dateTime"][11:16] for ev in bounded["items"]] == ["10:00", "11:00"]
+
+
+def test_freebusy_merges_and_expands_series(emulator):
+    emulator.post(EVENTS, json=body(10), headers=ALICE)
+    emulator.post(EVENTS, json=body(10, 45), headers=ALICE)
+    emulator.post(EVENTS, json=body(8, recurrence=["RRULE:FREQ=DAILY;COUNT=3"]), headers=ALICE)
+    emulator.post(EVENTS, json=body(15, transparency="transparent"), headers=ALICE)
+
+    resp = emulator.post("/calendar/v3/freeBusy", headers=ALICE, json={
+        "timeMin": "2030-01-01T00:00:00Z", "timeMax": "2030-01-02T12:00:00Z", "items": [{"id": "primary:alice"}]})
+
+    busy = resp.json()["calendars"]["primary:alice"]["busy"]
+    assert [(b["start"][5:16], b["end"][5:16]) for b in busy] == [
+        ("01-01T08:00", "01-01T08:30"), ("01-01T10:00", "01-01T10:45"), ("01-02T08:00", "01-02T08:30")]
+
+
+def test_reused_event_id_is_a_conflict(emulator):
+    assert emulator.post(EVENTS, json=body(10, id="abc123"), headers=ALICE).status_code == 200
+    resp = emulator.post(EVENTS, json=body(11, id="abc123"), headers=ALICE)
+
+    assert resp.status_code == 409
+    assert resp.json()["error"]["errors"][0]["reason"] == "duplicate"
+
+
+@pytest.mark.parametrize("faults, status, reason", [
+    ({"user_qps": 1}, 403, "userRateLimitExceeded"),
+    ({"project_qps": 1}, 429, "rateLimitExceeded"),
+    ({"error_rate": 1}, 503, "backendError"),
+])
+def test_injected_faults(emulator, faults, status, reason):
+    emulator.post("/emulator/faults", json=dict(faults, retry_after=2))
+
+    refused = [emulator.get(EVENTS, headers=ALICE) for _ in range(3)][-1]
+
+    assert refused.status_code == status
+    assert refused.json()["error"]["errors"][0]["reason"] == reason
+    if status != 503:
+        assert refused.headers["retry-after"] == "2"
+    stats = emulator.get("/emulator/stats").json()
+    assert stats["faults"]["retry_after"] == 2
+
+
+def test_token_endpoint_needs_a_refresh_token(emulator):
+    assert emulator.post("/token", data={"grant_type": "refresh_token"}).status_code == 400
+    token = emulator.post("/token", data={"grant_type": "refresh_token", "refresh_token": "r"}).json()
+    assert token["access_token"] == "emu-r" and token["expires_in"] == 3600
+
+
+def test_busy_cache_syncs_against_the_emulator(google_token, emulator_url, monkeypatch):
+    monkeypatch.setattr(shared_cache, "_cache", None)
+    monkeypatch.setattr(shared_cache, "_unavailable", True)
+    tool = GoogleCalendarTool(google_token)
+    created = tool.create_event("Sync", "2030-03-01T10:00:00Z", "2030-03-01T11:00:00Z", time_zone="UTC")
+    api = GoogleEventsAPI(tool)
+
+    items, token = api.list_events("primary")
+    assert created["id"] in {ev["id"] for ev in items}
+    assert api.list_events("primary", sync_token=token) == ([], token)
+
+    tool.client.execute(tool.service.events().delete(calendarId="primary", eventId=created["id"]))
+    changed, token = api.list_events("primary", sync_token=token)
+    assert [(ev["id"], ev["status"]) for ev in changed] == [(created["id"], "cancelled")]
+
+    httpx.post(f"{emulator_url}/emulator/expire_sync_tokens")
+    with pytest.raises(SyncTokenExpired):
+        api.list_events("primary", sync_token=token)
+
+    # the cache's delta read hits the 410 and falls back to a full sync
+    cache = BusyIntervalCache(api, ttl_s=0)
+    cache._entry("primary").sync_token = token
+    lo = to_epoch_min(datetime(2030, 3, 1, tzinfo=timezone.utc))
+    assert cache.busy_intervals(["primary"], lo, lo + 1440)["primary"].shape == (0, 2)
+    assert cache.stats()["resyncs"] == 1
@@ -0,0 +1,65 @@
+import threading
+
+import httpx
+
+from backend.app.calendar_tool import CalendarClientPool, GoogleCalendarTool, client_pool
+
+
+def test_same_token_shares_one_client(google_token):
+    pool = CalendarClientPool()
+
+    first = pool.get(google_token)
+    assert pool.get(dict(google_token, token="an access token")) is first  # not part of the identity
+    assert pool.get(dict(google_token, refresh_token="someone else")) is not first
+    assert pool.stats() == {"hits": 1, "misses": 2, "refreshes": 0, "evictions": 0, "size": 2}
+
+
+def test_cached_never_builds_a_client(google_token):
+    pool = CalendarClientPool()
+
+    assert pool.cached(google_token) is None
+    client = pool.get(google_token)
+    assert pool.cached(google_token) is client
+    assert pool.stats()["misses"] == 1
+
+
+def test_least_recently_used_client_is_evicted(google_token):
+    pool = CalendarClientPool(max_clients=2)
+    a, b, c = (dict(google_token, refresh_token=name) for name in "abc")
+
+    first = pool.get(a)
+    pool.get(b)
+    pool.get(a)
+    pool.get(c)
+
+    assert pool.stats()["evictions"] == 1 and pool.stats()["size"] == 2
+    assert pool.cached(a) is first
+    assert pool.cached(b) is None
+
+
+def test_tools_for_one_token_reuse_the_pooled_client(google_token):
+    tool = GoogleCalendarTool(google_token)
+
+    assert GoogleCalendarTool(google_token).client is tool.client
+    assert client_pool().stats()["size"] == 1
+
+
+def test_concurrent_callers_refresh_the_token_once(google_token, emulator_url):
+    pool = CalendarClientPool()
+    client = pool.get(google_token)
+    before = httpx.get(f"{emulator_url}/emulator/stats").json()["tokens"]
+    start = threading.Barrier(8)
+
+    def call():
+        start.wait()
+        client.ensure_token()
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert client.token_fresh()
+    assert pool.stats()["refreshes"] == 1
+    assert httpx.get(f"{emulator_url}/emulator/stats").json()["tokens"] == before + 1
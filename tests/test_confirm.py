@@ -0,0 +1,39 @@
+from backend.app import db
+
+EVENT = {"summary": "Sync", "start": "2026-05-04T10:00:00+05:30", "end": "2026-05-04T10:30:00+05:30"}
+
+
+def test_missing_oauth_fields_are_a_400(api):
+    from backend.app.async_calendar import AsyncGoogleCalendarClient, set_calendar_client
+
+    set_calendar_client(AsyncGoogleCalendarClient())
+    resp = api.post("/confirm", json={"event": EVENT, "token_dict": {"client_id": "x"}})
+
+    assert resp.status_code == 400
+    assert "OAuth" in resp.json()["message"]
+
+
+def test_failing_to_record_a_created_event_does_not_create_it_twice(api, calendar, monkeypatch):
+    def broken(event, created):
+        raise ValueError("bad row")
+
+    monkeypatch.setattr(db, "meeting_record", broken)
+    first = api.post("/confirm", json={"event": EVENT}, headers={"Idempotency-Key": "c1"})
+    second = api.post("/confirm", json={"event": EVENT}, headers={"Idempotency-Key": "c1"})
+
+    assert first.status_code == 200 and first.json()["status"] == "ok"
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert len(calendar.events) == 1
+
+
+def test_failing_to_record_a_batch_keeps_its_results(api, calendar, monkeypatch):
+    def broken(event, created):
+        raise ValueError("bad row")
+
+    monkeypatch.setattr(db, "meeting_record", broken)
+    batch = {"events": [EVENT, dict(EVENT, summary="Other")]}
+    first = api.post("/confirm/batch", json=batch, headers={"Idempotency-Key": "c2"}).json()
+    second = api.post("/confirm/batch", json=batch, headers={"Idempotency-Key": "c2"}).json()
+
+    assert first["created"] == 2 and second["replayed"] == 2
+    assert len(calendar.events) == 2
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from backend.app.async_calendar import FakeAsyncCalendarClient
+from backend.app.calendar_tool import GoogleCalendarTool
+
+
+def events(n):
+    return [{"summary": f"1:1 #{i}", "start": f"2026-05-04T{9 + i:02d}:00:00+05:30",
+             "end": f"2026-05-04T{9 + i:02d}:30:00+05:30"} for i in range(n)]
+
+
+class FailOnce(FakeAsyncCalendarClient):
+    """Fails the event at `index` of the first batch it sees."""
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self.sent = []
+
+    async def create_events(self, events, token_dict=None, cancel=None):
+        self.sent.append([ev["summary"] for ev in events])
+        outcome = await super().create_events(events, token_dict, cancel)
+        if len(self.sent) == 1:
+            self.events.pop(self.index)
+            outcome["results"][self.index] = {"index": self.index, "status": "error", "http_status": 503,
+                                              "message": "Backend Error"}
+        return outcome
+
+
+def test_cancel_stops_before_the_next_sub_batch(google_token):
+    cancel = threading.Event()
+    cancel.set()
+    outcome = GoogleCalendarTool(google_token).create_events(events(3), cancel=cancel)
+
+    assert outcome["round_trips"] == 0
+    assert [r["status"] for r in outcome["results"]] == ["cancelled"] * 3
+
+
+def test_retried_batch_is_replayed(api, calendar):
+    batch = {"events": events(3)}
+    first = api.post("/confirm/batch", json=batch, headers={"Idempotency-Key": "b1"}).json()
+    second = api.post("/confirm/batch", json=batch, headers={"Idempotency-Key": "b1"})
+
+    assert first["created"] == 3 and first["replayed"] == 0
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json()["results"] == first["results"]
+    assert len(calendar.events) == 3
+
+
+def test_retry_after_partial_failure_sends_only_the_rest(api):
+    from backend.app.async_calendar import set_calendar_client
+
+    client = FailOnce(index=1)
+    set_calendar_client(client)
+    batch = {"events": events(3)}
+
+    first = api.post("/confirm/batch", json=batch, headers={"Idempotency-Key": "b2"}).json()
+    second = api.post("/confirm/batch", json=batch, headers={"Idempotency-Key": "b2"}).json()
+
+    assert first["status"] == "partial" and first["failed"] == 1
+    assert second["status"] == "ok" and second["replayed"] == 2
+    assert client.sent == [["1:1 #0", "1:1 #1", "1:1 #2"], ["1:1 #1"]]
+    assert len(client.events) == 3
+
+
+def test_batch_past_its_deadline_is_cancelled(api, calendar):
+    calendar.latency_s = 0.2
+    batch = {"events": events(2)}
+
+    late = api.post("/confirm/batch", json=batch, headers={"X-Request-Deadline": "0.05"})
+    assert late.status_code == 504
+    time.sleep(0.3)  # the insert runs on until it checks the flag
+    assert calendar.events == []
+
+    calendar.latency_s = 0
+    retry = api.post("/confirm/batch", json=batch).json()
+    assert retry["created"] == 2 and retry["replayed"] == 0
+    assert len(calendar.events) == 2
+
+
+def test_key_reused_for_other_events_is_rejected(api):
+    assert api.post("/confirm/batch", json={"events": events(1)}, headers={"Idempotency-Key": "b3"}).status_code == 200
+    other = [dict(events(1)[0], summary="Something else")]
+    assert api.post("/confirm/batch", json={"events": other}, headers={"Idempotency-Key": "b3"}).status_code == 422
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from backend.app import date_grammar
+from backend.app.date_grammar import compile_phrase, normalize, parse_when
+
+NOW = datetime(2026, 4, 20, 9, 30, tzinfo=ZoneInfo("Europe/Berlin"))  # a Monday
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    date_grammar._cache.clear()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("tomorrow 3pm", datetime(2026, 4, 21, 15, 0)),
+    ("next Wednesday at 10", datetime(2026, 4, 22, 10, 0)),
+    ("in 2 days", datetime(2026, 4, 22, 10, 0)),
+    ("2026-05-04 at 14:30", datetime(2026, 5, 4, 14, 30)),
+])
+def test_fast_path(text, expected):
+    assert compile_phrase(normalize(text)) is not None
+    assert parse_when(text, NOW) == expected.replace(tzinfo=NOW.tzinfo)
+
+
+def test_impossible_iso_date_goes_to_dateparser():
+    assert compile_phrase(normalize("sync on 2026-02-30 at 10am")) is None
+    parse_when("sync on 2026-02-30 at 10am", NOW)  # no ValueError
+
+
+def test_relative_dateparser_phrase_follows_the_clock():
+    text = "2 hours from now"
+    assert compile_phrase(normalize(text)) is None
+    assert parse_when(text, NOW) == NOW + timedelta(hours=2)
+    # same day, same cache key: the cached entry is an offset, not a datetime
+    later = NOW + timedelta(minutes=30)
+    assert parse_when(text, later) == later + timedelta(hours=2)
+
+
+def test_absolute_dateparser_phrase_is_cached():
+    text = "Lunch on Dec 5 at 1pm"
+    first = parse_when(text, NOW)
+    assert (first.month, first.day, first.hour) == (12, 5, 13)
+    assert parse_when(text, NOW + timedelta(minutes=30)) == first
+    stats = date_grammar.parse_stats()
+    assert stats["fallback"] == 1 and stats["cache_hits"] == 1
+
+
+def test_shared_records_older_than_the_ttl_are_parsed_again(monkeypatch):
+    text = "Lunch on Dec 5 at 1pm"
+    expected = parse_when(text, NOW)
+    date_grammar._cache.clear()
+    assert parse_when(text, NOW) == expected
+    assert date_grammar.parse_stats()["shared_hits"] == 1
+
+    date_grammar._cache.clear()
+    monkeypatch.setattr(date_grammar, "SHARED_PARSE_TTL_S", -1)
+    assert parse_when(text, NOW) == expected
+    assert date_grammar.parse_stats()["shared_hits"] == 0
@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from backend.app import db
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = db.SQLiteStore(str(tmp_path / "meetings.db"))
+    yield store
+    store.close()
+
+
+def prompts(store):
+    return [row["prompt"] for row in store._reader().execute("SELECT prompt FROM proposals ORDER BY id")]
+
+
+def test_writes_are_batched(store):
+    for i in range(20):
+        store.enqueue("proposal", {"prompt": f"p{i}"})
+    store.flush()
+
+    assert prompts(store) == [f"p{i}" for i in range(20)]
+    assert store.stats()["writes"] == 20 and store.stats()["transactions"] < 20
+
+
+def test_failed_batch_is_retried_row_by_row(store, monkeypatch):
+    write = db.WRITERS["proposal"]
+
+    def flaky(conn, proposal):
+        if proposal["prompt"] == "bad":
+            raise sqlite3.OperationalError("disk I/O error")
+        write(conn, proposal)
+
+    monkeypatch.setitem(db.WRITERS, "proposal", flaky)
+    store.flush()  # let the writer go idle, so the next writes share one batch
+    for prompt in ("a", "bad", "b"):
+        store.enqueue("proposal", {"prompt": prompt})
+    store.flush()
+
+    assert prompts(store) == ["a", "b"]
+    stats = store.stats()
+    assert stats["retried"] == 1 and stats["dropped"] == 1 and stats["writes"] == 2
+
+
+def test_bad_row_is_skipped_inside_the_batch(store):
+    store.enqueue("meeting", {"summary": "no times"})
+    store.enqueue("proposal", {"prompt": "kept"})
+    store.flush()
+
+    assert prompts(store) == ["kept"]
+    assert store.stats()["dropped"] == 1 and store.stats()["retried"] == 0
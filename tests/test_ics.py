@@ -0,0 +1,134 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from backend.app.availability import to_epoch_min
+from backend.app.db import SQLiteStore, StoredBusySource
+from backend.app.ics import load_busy
+
+MAY_4 = to_epoch_min(datetime(2026, 5, 4, tzinfo=ZoneInfo("UTC")))
+SPAN = dict(start_min=MAY_4 - 1440, end_min=MAY_4 + 60 * 1440)
+
+
+def calendar(*events: str) -> str:
+    return "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + "".join(events) + "END:VCALENDAR\r\n"
+
+
+def vevent(uid: str, *lines: str) -> str:
+    return "BEGIN:VEVENT\r\n" + f"UID:{uid}\r\n" + "".join(f"{line}\r\n" for line in lines) + "END:VEVENT\r\n"
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """Two stores on one database file, as two worker processes would have."""
+    path = str(tmp_path / "busy.db")
+    first, second = SQLiteStore(path), SQLiteStore(path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_import_is_seen_by_every_worker(stores):
+    here, there = StoredBusySource(stores[0]), StoredBusySource(stores[1])
+    assert len(there.busy_intervals(["ana@example.com"], MAY_4, MAY_4 + 1440)["ana@example.com"]) == 0
+
+    ics = calendar(vevent("a", "DTSTART:20260504T090000Z", "DTEND:20260504T100000Z",
+                          "ORGANIZER:mailto:Ana@example.com"))
+    stats = load_busy(here, [ics], **SPAN)
+
+    assert stats["intervals"] == 1
+    got = there.busy_intervals(["ana@example.com"], MAY_4, MAY_4 + 1440)["ana@example.com"]
+    assert got.tolist() == [[MAY_4 + 9 * 60, MAY_4 + 10 * 60]]
+
+
+def test_reimport_adds_nothing(stores):
+    source = StoredBusySource(stores[0])
+    ics = calendar(vevent("a", "DTSTART:20260504T090000Z", "DTEND:20260504T100000Z"))
+    load_busy(source, [ics], calendar="room@example.com", **SPAN)
+    load_busy(source, [ics], calendar="room@example.com", **SPAN)
+
+    assert len(source.busy_intervals(["room@example.com"], MAY_4, MAY_4 + 1440)["room@example.com"]) == 1
+
+
+def series(*lines: str) -> list:
+    from backend.app.ics import occurrences, read_events
+
+    (event,) = read_events([calendar(vevent("s", *lines))], "Europe/Berlin")
+    return list(occurrences(event, MAY_4 - 1440, MAY_4 + 60 * 1440))
+
+
+def test_all_day_series_with_date_until():
+    got = series("DTSTART;VALUE=DATE:20260504", "DTEND;VALUE=DATE:20260505",
+                 "RRULE:FREQ=DAILY;UNTIL=20260506")
+    berlin = ZoneInfo("Europe/Berlin")
+    assert got == [(to_epoch_min(datetime(2026, 5, d, tzinfo=berlin)), to_epoch_min(datetime(2026, 5, d + 1, tzinfo=berlin)))
+                   for d in (4, 5, 6)]
+
+
+def test_tzid_series_with_local_until():
+    got = series("DTSTART;TZID=America/New_York:20260504T090000", "DTEND;TZID=America/New_York:20260504T093000",
+                 "RRULE:FREQ=WEEKLY;UNTIL=20260518T090000")
+    new_york = ZoneInfo("America/New_York")
+    assert [start for start, _ in got] == [to_epoch_min(datetime(2026, 5, d, 9, tzinfo=new_york)) for d in (4, 11, 18)]
+
+
+def test_utc_until_is_unchanged():
+    got = series("DTSTART:20260504T090000Z", "DTEND:20260504T100000Z", "RRULE:FREQ=DAILY;UNTIL=20260505T090000Z")
+    assert len(got) == 2
+
+
+def exported(meeting: dict) -> list:
+    from backend.app.ics import occurrences, read_events, write_events
+
+    (event,) = read_events(write_events([meeting]), "UTC")
+    return list(occurrences(event, MAY_4 - 90 * 1440, MAY_4 + 90 * 1440))
+
+
+@pytest.mark.parametrize("tz_name, start, end, rule, days", [
+    # Tuesday 01:00 in Kolkata is Monday 19:30 UTC
+    ("Asia/Kolkata", "2026-05-05T01:00:00+05:30", "2026-05-05T01:30:00+05:30",
+     "RRULE:FREQ=WEEKLY;BYDAY=TU;COUNT=3", [(5, 5), (5, 12), (5, 19)]),
+    # New York moves to summer time on March 8
+    ("America/New_York", "2026-03-02T09:00:00-05:00", "2026-03-02T09:30:00-05:00",
+     "RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=3", [(3, 2), (3, 9), (3, 16)]),
+])
+def test_exported_series_keeps_its_local_time(tz_name, start, end, rule, days):
+    tz = ZoneInfo(tz_name)
+    local = datetime.fromisoformat(start).astimezone(tz)
+    got = exported({"event_id": "e1", "summary": "Sync", "start": start, "end": end,
+                    "recurrence": rule, "time_zone": tz_name})
+
+    assert [s for s, _ in got] == [to_epoch_min(datetime(2026, m, d, local.hour, local.minute, tzinfo=tz))
+                                   for m, d in days]
+
+
+def test_meeting_record_keeps_the_zone():
+    from backend.app.db import meeting_record
+
+    event = {"summary": "Sync", "start": "2026-05-05T01:00:00+05:30", "end": "2026-05-05T01:30:00+05:30"}
+    assert meeting_record(dict(event, time_zone="Asia/Kolkata"), {"id": "e1"})["time_zone"] == "Asia/Kolkata"
+    created = {"id": "e1", "start": {"dateTime": event["start"], "timeZone": "Europe/Berlin"}}
+    assert meeting_record(event, created)["time_zone"] == "Europe/Berlin"
+
+
+def test_clear_reaches_every_worker(stores):
+    here, there = StoredBusySource(stores[0]), StoredBusySource(stores[1])
+    ics = calendar(vevent("a", "DTSTART:20260504T090000Z", "DTEND:20260504T100000Z",
+                          "ORGANIZER:mailto:ana@example.com", "ATTENDEE:mailto:bo@example.com"))
+    load_busy(here, [ics], **SPAN)
+    window = (["ana@example.com", "bo@example.com"], MAY_4, MAY_4 + 1440)
+    assert all(len(v) == 1 for v in there.busy_intervals(*window).values())
+
+    here.clear("Ana@example.com")
+    here.flush()
+    got = there.busy_intervals(*window)
+    assert len(got["ana@example.com"]) == 0 and len(got["bo@example.com"]) == 1
+
+    # imported again after the clear, and then everyone cleared
+    load_busy(here, [ics], **SPAN)
+    assert len(there.busy_intervals(*window)["ana@example.com"]) == 1
+    here.clear()
+    here.flush()
+    assert all(len(v) == 0 for v in there.busy_intervals(*window).values())
+    assert all(len(v) == 0 for v in StoredBusySource(stores[1]).busy_intervals(*window).values())
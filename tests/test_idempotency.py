@@ -0,0 +1,252 @@
+import asyncio
+
+import pytest
+
+from backend.app.idempotency import (
+    COALESCED,
+    EXECUTED,
+    REPLAYED,
+    IdempotencyConflict,
+    IdempotencyStore,
+    batch_keys,
+    request_key,
+)
+
+EVENT = {"summary": "Sync", "start": "2026-05-04T10:00:00+05:30", "end": "2026-05-04T10:30:00+05:30"}
+TOKEN = {"refresh_token": "tester", "client_id": "tests", "client_secret": "tests"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Insert:
+    """Counts calls; each returns a new created event, after `gate` opens if given."""
+
+    def __init__(self, gate=None, fail=0):
+        self.calls = 0
+        self.gate = gate
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("calendar unavailable")
+        return {"id": f"evt{self.calls}"}
+
+
+def test_same_key_is_replayed():
+    store = IdempotencyStore()
+    insert = Insert()
+    key, fp = request_key(EVENT, TOKEN)
+
+    async def main():
+        return [await store.run(key, fp, insert) for _ in range(3)]
+
+    served = asyncio.run(main())
+
+    assert insert.calls == 1
+    assert served == [({"id": "evt1"}, EXECUTED), ({"id": "evt1"}, REPLAYED), ({"id": "evt1"}, REPLAYED)]
+
+
+def test_reworded_summary_keeps_the_key_but_a_new_time_does_not():
+    key, _ = request_key(EVENT, TOKEN)
+
+    assert request_key(dict(EVENT, summary="  sync "), TOKEN)[0] == key
+    assert request_key(dict(EVENT, start="2026-05-04T11:00:00+05:30"), TOKEN)[0] != key
+    assert request_key(EVENT, dict(TOKEN, refresh_token="someone else"))[0] != key
+
+
+def test_header_key_reused_for_another_event_is_a_conflict():
+    store = IdempotencyStore()
+    key, fp = request_key(EVENT, TOKEN, "abc")
+    other_key, other_fp = request_key(dict(EVENT, summary="Review"), TOKEN, "abc")
+    assert other_key == key
+
+    async def main():
+        await store.run(key, fp, Insert())
+        await store.run(other_key, other_fp, Insert())
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(main())
+    assert store.stats()["conflicts"] == 1
+
+
+def test_stored_result_expires_after_the_ttl():
+    clock = Clock()
+    store = IdempotencyStore(ttl_s=60, clock=clock)
+    insert = Insert()
+    key, fp = request_key(EVENT, TOKEN)
+
+    async def main():
+        served = [await store.run(key, fp, insert)]
+        clock.now = 59.9
+        served.append(await store.run(key, fp, insert))
+        clock.now = 60
+        served.append(await store.run(key, fp, insert))
+        return served
+
+    served = asyncio.run(main())
+
+    assert [how for _, how in served] == [EXECUTED, REPLAYED, EXECUTED]
+    assert insert.calls == 2
+
+
+def test_failures_are_not_stored():
+    store = IdempotencyStore()
+    insert = Insert(fail=1)
+    key, fp = request_key(EVENT, TOKEN)
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await store.run(key, fp, insert)
+        return await store.run(key, fp, insert)
+
+    assert asyncio.run(main()) == ({"id": "evt2"}, EXECUTED)
+    assert store.stats()["size"] == 1 and store.stats()["inflight"] == 0
+
+
+def test_oldest_keys_are_evicted_past_max_keys():
+    store = IdempotencyStore(max_keys=2)
+    keys = [request_key(dict(EVENT, summary=f"Sync {i}"), TOKEN) for i in range(3)]
+
+    async def main():
+        for key, fp in keys:
+            await store.run(key, fp, Insert())
+        return await store.run(*keys[0], Insert())
+
+    assert asyncio.run(main())[1] == EXECUTED
+    assert store.stats()["evictions"] == 2
+
+
+def test_concurrent_callers_share_one_insert():
+    store = IdempotencyStore()
+    key, fp = request_key(EVENT, TOKEN)
+
+    async def main():
+        gate = asyncio.Event()
+        insert = Insert(gate)
+        callers = [asyncio.ensure_future(store.run(key, fp, insert)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert store.stats()["inflight"] == 1
+        gate.set()
+        return insert, await asyncio.gather(*callers)
+
+    insert, served = asyncio.run(main())
+
+    assert insert.calls == 1
+    assert [how for _, how in served] == [EXECUTED] + [COALESCED] * 4
+    assert all(created == {"id": "evt1"} for created, _ in served)
+
+
+def test_concurrent_callers_all_see_a_failure():
+    store = IdempotencyStore()
+    key, fp = request_key(EVENT, TOKEN)
+
+    async def main():
+        gate = asyncio.Event()
+        callers = [asyncio.ensure_future(store.run(key, fp, Insert(gate, fail=1))) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+    assert store.stats()["size"] == 0
+
+
+def test_a_caller_giving_up_does_not_cancel_the_insert():
+    store = IdempotencyStore()
+    key, fp = request_key(EVENT, TOKEN)
+
+    async def main():
+        gate = asyncio.Event()
+        insert = Insert(gate)
+        first = asyncio.ensure_future(store.run(key, fp, insert))
+        second = asyncio.ensure_future(store.run(key, fp, insert))
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        return insert, await second, await store.run(key, fp, insert)
+
+    insert, coalesced, replayed = asyncio.run(main())
+
+    assert insert.calls == 1
+    assert coalesced == ({"id": "evt1"}, COALESCED)
+    assert replayed == ({"id": "evt1"}, REPLAYED)
+
+
+def batch(n):
+    return [dict(EVENT, summary=f"Sync {i}") for i in range(n)]
+
+
+def test_retried_batch_sends_only_what_is_missing():
+    store = IdempotencyStore()
+    keys = batch_keys(batch(3), TOKEN, "retry-me")
+    sent = []
+
+    async def insert(todo):
+        sent.append(todo)
+        return [{"status": "ok", "created": {"id": f"evt{i}"}} if i != 1 else {"status": "error", "message": "boom"}
+                for i in todo]
+
+    async def main():
+        return await store.run_many(keys, insert), await store.run_many(keys, insert)
+
+    first, second = asyncio.run(main())
+
+    assert sent == [[0, 1, 2], [1]]
+    assert [how for _, how in first] == [EXECUTED] * 3
+    assert first[1][0] == {"index": 1, "status": "error", "message": "boom"}
+    assert [how for _, how in second] == [REPLAYED, EXECUTED, REPLAYED]
+    assert second[0][0] == {"index": 0, "status": "ok", "created": {"id": "evt0"}}
+
+
+def test_batch_waits_for_an_insert_already_in_flight():
+    store = IdempotencyStore()
+    events = batch(2)
+    keys = batch_keys(events, TOKEN)
+    sent = []
+
+    async def insert(todo):
+        sent.append(todo)
+        return [{"status": "ok", "created": {"id": f"batch{i}"}} for i in todo]
+
+    async def main():
+        gate = asyncio.Event()
+        single = asyncio.ensure_future(store.run(*keys[0], Insert(gate)))
+        await asyncio.sleep(0)
+        many = asyncio.ensure_future(store.run_many(keys + [keys[1]], insert))
+        await asyncio.sleep(0)
+        gate.set()
+        return await single, await many
+
+    single, many = asyncio.run(main())
+
+    assert sent == [[1]]  # event 0 was in flight; the repeat of event 1 rides along
+    assert single == ({"id": "evt1"}, EXECUTED)
+    assert many == [({"index": 0, "status": "ok", "created": {"id": "evt1"}}, COALESCED),
+                    ({"index": 1, "status": "ok", "created": {"id": "batch1"}}, EXECUTED),
+                    ({"index": 2, "status": "ok", "created": {"id": "batch1"}}, COALESCED)]
+
+
+def test_batch_conflict_registers_nothing():
+    store = IdempotencyStore()
+    keys = batch_keys(batch(2), TOKEN, "abc")
+
+    async def insert(todo):
+        return [{"status": "ok", "created": {"id": f"evt{i}"}} for i in todo]
+
+    async def main():
+        await store.run(keys[1][0], "another fingerprint", Insert())
+        await store.run_many(keys, insert)
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(main())
+    assert store.stats()["inflight"] == 0 and store.stats()["size"] == 1
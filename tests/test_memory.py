@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from backend.app.chroma_memory import LocalHashEmbedder, MemoryStore, memory_id
+
+
+class CountingEmbedder(LocalHashEmbedder):
+    name = "counting"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return super().embed_documents(texts)
+
+
+class BrokenEmbedder:
+    name = "broken"
+
+    def embed_documents(self, texts):
+        raise ConnectionError("embedding service unreachable")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MemoryStore(path=str(tmp_path / "chroma"), embedder=CountingEmbedder())
+
+
+def test_local_embedder_is_deterministic_and_normalized():
+    embedder = LocalHashEmbedder(dim=64)
+    a, b, empty = map(np.array, embedder.embed_documents(["Prefers mornings", "prefers  MORNINGS", ""]))
+    assert a.shape == (64,)
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert not empty.any()
+
+
+def test_similar_text_ranks_first(store):
+    store.add_memories("u1", ["Prefers meetings in the morning", "Dislikes Friday afternoon calls",
+                              "Works from the Berlin office"])
+    store.add_memory("u2", "Prefers meetings in the morning with coffee")
+
+    found = store.query_memory("u1", "morning meetings preferred", n_results=1)
+    assert found["documents"] == [["Prefers meetings in the morning"]]
+
+
+def test_re_adding_is_an_upsert_and_embeds_once(store):
+    ids = store.add_memories("u1", ["Likes 30 minute slots", "Likes 30 minute slots"])
+    assert ids == [memory_id("u1", "Likes 30 minute slots")]
+    assert store.add_memory("u1", "Likes 30 minute slots") == ids[0]
+
+    assert store.collection.count() == 1
+    assert store.embedder.calls == [["Likes 30 minute slots"]]
+    assert store.metrics["cache_hits"] == 1
+
+
+def test_add_memory_does_not_raise_when_embedding_fails(tmp_path):
+    store = MemoryStore(path=str(tmp_path / "chroma"), embedder=BrokenEmbedder())
+    assert store.add_memory("u1", "Prefers mornings") is None
+    with pytest.raises(ConnectionError):
+        store.add_memories("u1", ["Prefers mornings"])
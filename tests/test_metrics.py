@@ -0,0 +1,117 @@
+import logging
+
+from backend.app import metrics
+from backend.app.metrics import histogram, muted, render_prometheus, request_trace, set_trace_sample_rate, stage
+
+
+def series(text, name):
+    """{labels: value} for one metric of a Prometheus text exposition."""
+    out = {}
+    for line in text.splitlines():
+        if line.startswith(name + "{") or line.startswith(name + " "):
+            key, value = line.rsplit(" ", 1)
+            out[key[len(name):]] = float(value)
+    return out
+
+
+def test_histogram_buckets_are_cumulative(monkeypatch):
+    monkeypatch.setattr(metrics, "_histograms", {})
+    hist = histogram("unit", "parse")
+    for seconds in (0.0001, 0.0002, 0.003, 20.0):
+        hist.observe(seconds)
+
+    text = render_prometheus()
+    buckets = series(text, "meeting_agent_stage_seconds_bucket")
+    labels = 'pipeline="unit",stage="parse"'
+
+    assert buckets["{le=\"0.0001\"," + labels + "}"] == 1  # a bound is inclusive
+    assert buckets["{le=\"0.00025\"," + labels + "}"] == 2
+    assert buckets["{le=\"0.005\"," + labels + "}"] == 3
+    assert buckets["{le=\"10.0\"," + labels + "}"] == 3
+    assert buckets["{le=\"+Inf\"," + labels + "}"] == 4
+    assert series(text, "meeting_agent_stage_seconds_count") == {"{" + labels + "}": 4}
+    assert series(text, "meeting_agent_stage_seconds_sum")["{" + labels + "}"] == sum((0.0001, 0.0002, 0.003, 20.0))
+
+
+def test_muted_work_is_not_recorded(monkeypatch):
+    monkeypatch.setattr(metrics, "_histograms", {})
+    with muted():
+        with request_trace("warm"):
+            with stage("warm", "parse"):
+                pass
+    with stage("warm", "parse"):
+        pass
+
+    assert histogram("warm", "parse").snapshot()[2] == 1
+    assert histogram("warm", "total").snapshot()[2] == 0
+
+
+def test_sampled_request_logs_its_stages(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "_histograms", {})
+    caplog.set_level(logging.INFO, logger="meeting_agent.trace")
+    set_trace_sample_rate(1.0)
+    try:
+        with request_trace("propose"):
+            with stage("propose", "email_extraction"):
+                pass
+            with stage("propose", "date_search"):
+                pass
+        set_trace_sample_rate(0.0)
+        with request_trace("propose"):
+            with stage("propose", "date_search"):
+                pass
+    finally:
+        set_trace_sample_rate(metrics.TRACE_SAMPLE_RATE)
+
+    (record,) = caplog.records
+    message = record.getMessage()
+    assert message.startswith("trace pipeline=propose total_ms=")
+    assert "error=- email_extraction_ms=" in message and " date_search_ms=" in message
+    assert histogram("propose", "total").snapshot()[2] == 2
+
+
+def test_stages_outside_a_trace_are_not_collected():
+    with stage("unit", "alone"):
+        assert metrics._current_trace.get() is None
+
+
+def test_sample_rate_is_clamped():
+    try:
+        set_trace_sample_rate(3)
+        assert metrics.trace_sample_rate() == 1.0
+        set_trace_sample_rate(-1)
+        assert metrics.trace_sample_rate() == 0.0
+    finally:
+        set_trace_sample_rate(metrics.TRACE_SAMPLE_RATE)
+
+
+def test_a_failing_collector_does_not_break_the_scrape(monkeypatch):
+    def broken():
+        raise RuntimeError("boom")
+
+    def working():
+        yield "things_total", {"kind": "a"}, 3
+
+    monkeypatch.setattr(metrics, "_collectors", [broken, working])
+
+    assert series(render_prometheus(), "meeting_agent_things_total") == {'{kind="a"}': 3}
+
+
+def test_metrics_endpoint_reports_components(api):
+    api.post("/propose", json={"prompt": "sync with a@example.com tomorrow at 10am"})
+
+    resp = api.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert series(resp.text, "meeting_agent_stage_seconds_count")['{pipeline="propose",stage="total"}'] >= 1
+    assert set(series(resp.text, "meeting_agent_idempotency_total")) >= {'{event="executed"}', '{event="replayed"}'}
+
+
+def test_tracing_can_be_changed_at_runtime(api):
+    try:
+        assert api.post("/debug/tracing", json={"sample_rate": 0.25}).json() == {"status": "ok", "sample_rate": 0.25}
+        assert api.get("/debug/tracing").json()["sample_rate"] == 0.25
+        assert api.post("/debug/tracing", json={"sample_rate": 2}).status_code == 422
+    finally:
+        set_trace_sample_rate(metrics.TRACE_SAMPLE_RATE)
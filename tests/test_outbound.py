@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import httpx
+
+from backend.app.async_calendar import AsyncGoogleCalendarClient
+from backend.app.calendar_emulator import Faults, emulator_app
+from backend.app.calendar_tool import resolve_token_dict, token_key
+from backend.app.outbound import BULK, INTERACTIVE, OutboundScheduler
+
+
+def events(n):
+    return [{"summary": f"Sync {i}", "start": "2026-05-04T10:00:00+05:30", "end": "2026-05-04T10:30:00+05:30"}
+            for i in range(n)]
+
+
+class StaticTokenClient(AsyncGoogleCalendarClient):
+    """Bearer token = the refresh token; the emulator only uses it to tell users apart."""
+
+    async def access_token(self, token_dict):
+        return token_dict["refresh_token"]
+
+
+def test_bulk_jobs_cost_no_more_than_a_full_bucket():
+    assert OutboundScheduler(project_qps=100, user_qps=10, burst_s=1).bulk_chunk() == 10
+    assert OutboundScheduler(project_qps=4, user_qps=10, burst_s=1).bulk_chunk() == 4
+    assert OutboundScheduler(project_qps=100, user_qps=0.2, burst_s=1).bulk_chunk() == 1
+
+
+def test_interactive_call_is_not_held_behind_a_bulk_batch(google_token):
+    scheduler = OutboundScheduler(project_qps=1000, user_qps=10, burst_s=1)
+    client = AsyncGoogleCalendarClient(scheduler=scheduler)
+    user = token_key(resolve_token_dict(google_token))
+
+    async def interactive():
+        while not scheduler.metrics["dispatched"]:  # until the first bulk chunk has taken its tokens
+            await asyncio.sleep(0.005)
+        started = time.perf_counter()
+        await scheduler.submit(user, lambda: asyncio.sleep(0), INTERACTIVE)
+        return time.perf_counter() - started
+
+    async def main():
+        try:
+            return await asyncio.gather(client.create_events(events(40), google_token), interactive())
+        finally:
+            scheduler.close()
+
+    outcome, waited = asyncio.run(main())
+
+    # one 40-token job would have left the user bucket 30 tokens (3s) in debt
+    assert waited < 1.0
+    assert [r["index"] for r in outcome["results"]] == list(range(40))
+    assert all(r["status"] == "ok" for r in outcome["results"])
+    assert outcome["round_trips"] == 4
+    assert scheduler.stats()["dispatched"] == 5
+
+
+def test_throttled_calls_back_off_and_succeed():
+    app = emulator_app(Faults(user_qps=10))
+    scheduler = OutboundScheduler(project_qps=1000, user_qps=40, backoff_s=0.05, max_backoff_s=0.5, max_attempts=10)
+    client = StaticTokenClient("http://calendar", transport=httpx.ASGITransport(app=app), scheduler=scheduler)
+    token = {"refresh_token": "user0", "client_id": "tests", "client_secret": "tests"}
+    body = {"summary": "Sync", "start": {"dateTime": "2030-01-01T10:00:00Z"}, "end": {"dateTime": "2030-01-01T10:30:00Z"}}
+
+    async def main():
+        try:
+            return await asyncio.gather(*(
+                client.request("POST", "/calendar/v3/calendars/primary/events", token, priority, json=body)
+                for priority in [INTERACTIVE] * 10 + [BULK] * 10
+            ))
+        finally:
+            await client.aclose()
+            scheduler.close()
+
+    responses = asyncio.run(main())
+
+    assert all(r.status_code == 200 for r in responses)
+    stats = scheduler.stats()
+    assert stats["throttled_user"] > 0 and stats["failed"] == 0
+    assert stats["succeeded"] == 20
@@ -0,0 +1,17 @@
+from backend.app import db
+
+
+def test_profile_keeps_fields_saved_just_before(api):
+    db.save_user({"email": "ana@example.com", "name": "Ana"})
+    resp = api.post("/profile", json={"email": "ana@example.com", "time_zone": "Europe/Berlin"})
+
+    assert resp.status_code == 200
+    assert resp.json()["profile"]["name"] == "Ana"
+
+
+
+def test_profile_rejects_working_days_outside_the_week(api):
+    for days in ([9], [], [0, -1]):
+        resp = api.post("/profile", json={"email": "ana@example.com", "time_zone": "Europe/Berlin",
+                                          "working_days": days})
+        assert resp.status_code == 422, days
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+
+from backend.app import main
+
+
+def ndjson(resp):
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+def test_ndjson_stream_is_intent_slots_done(api, busy, profiles):
+    resp = api.post("/propose/stream", json={"prompt": "sync 30 min with a@example.com tomorrow at 10am", "n_slots": 2})
+
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    items = ndjson(resp)
+    assert [item["type"] for item in items] == ["intent", "slot", "slot", "done"]
+    assert items[0]["emails"] == ["a@example.com"]
+    assert [item["index"] for item in items[1:3]] == [0, 1]
+    assert items[-1] == {"type": "done", "slots": 2}
+
+
+def test_sse_stream_frames_each_event(api, busy, profiles):
+    resp = api.post("/propose/stream", json={"prompt": "sync with a@example.com tomorrow at 10am", "n_slots": 1},
+                    headers={"Accept": "text/event-stream"})
+
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    frames = resp.text.split("\n\n")
+    assert frames[-1] == ""
+    events = []
+    for frame in frames[:-1]:
+        name, data = frame.split("\n")
+        assert name.startswith("event: ") and data.startswith("data: ")
+        body = json.loads(data[len("data: "):])
+        assert body["type"] == name[len("event: "):]
+        events.append(body["type"])
+    assert events == ["intent", "slot", "done"]
+
+
+def test_error_is_the_last_event(api, busy, profiles):
+    resp = api.post("/propose/stream", json={"prompt": "0 min with a@example.com tomorrow at 10am"})
+
+    assert ndjson(resp) == [{"type": "error", "message": "A meeting has to last at least a minute"}]
+
+
+class SlowSearch:
+    """Stands in for iter_proposal: an intent, then a slot every `pause` seconds, forever."""
+
+    def __init__(self, pause):
+        self.pause = pause
+        self.steps = 0
+        self.closed = False
+
+    def __call__(self, prompt, n_slots=3, time_zone=None):
+        try:
+            yield {"type": "intent", "emails": []}
+            while True:
+                time.sleep(self.pause)
+                self.steps += 1
+                yield {"type": "slot", "index": self.steps - 1}
+        finally:
+            self.closed = True
+
+    def settled(self):
+        """Steps taken once nothing is stepping the search any more."""
+        before = -1
+        while before != self.steps:
+            before = self.steps
+            time.sleep(self.pause * 3)
+        return self.steps
+
+
+def test_deadline_ends_the_stream_with_an_error(api, monkeypatch):
+    search = SlowSearch(0.1)
+    monkeypatch.setattr(main, "iter_proposal", search)
+
+    resp = api.post("/propose/stream", json={"prompt": "sync"}, headers={"X-Request-Deadline": "0.25"})
+
+    items = ndjson(resp)
+    assert items[0]["type"] == "intent"
+    assert items[-1] == {"type": "error", "message": "Request exceeded its 0.25s deadline"}
+    assert search.settled() <= 3
+    assert search.closed
+
+
+def test_abandoned_stream_stops_the_search(calendar, monkeypatch):
+    search = SlowSearch(0.05)
+    monkeypatch.setattr(main, "iter_proposal", search)
+    body = json.dumps({"prompt": "sync"}).encode()
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": "/propose/stream", "raw_path": b"/propose/stream",
+             "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+             "client": ("127.0.0.1", 1), "server": ("testserver", 80)}
+
+    async def run():
+        got_slot = asyncio.Event()
+        sent = []
+
+        async def receive():
+            if not sent:
+                sent.append(True)
+                return {"type": "http.request", "body": body, "more_body": False}
+            await got_slot.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and b'"slot"' in message.get("body", b""):
+                got_slot.set()
+
+        await asyncio.wait_for(main.app(scope, receive, send), 5)
+
+    asyncio.run(run())
+
+    assert search.settled() <= 2
+    assert search.closed
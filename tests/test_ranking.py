@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend.app import scheduler_engine
+from backend.app.ranking import Candidates, candidate_starts, score, top_k
+from backend.app.scheduler_engine import propose_slots
+from backend.app.timezones import WorkProfile, zone
+
+TZ = "Asia/Kolkata"
+NONE = np.empty(0, dtype=np.int64)
+MONDAY = 29_630_880  # 2026-05-04 00:00 UTC, in epoch minutes
+
+
+def candidates(starts, duration_min=30, busy=((), ())):
+    starts = np.asarray(starts, dtype=np.int64)
+    busy_starts, busy_reach = (np.asarray(b, dtype=np.int64) for b in busy)
+    return Candidates.build(starts, duration_min, int(starts[0]), 7 * 1440, busy_starts, busy_reach, ("UTC",), ())
+
+
+def test_candidate_starts_are_on_the_step_grid():
+    starts = candidate_starts(MONDAY + 602, 240, 30, 15, NONE, NONE)
+
+    assert starts[0] == MONDAY + 615
+    assert (starts % 15 == 0).all()
+    assert starts[-1] + 30 <= MONDAY + 602 + 240
+
+
+def test_candidate_starts_skip_blocked_time():
+    starts = candidate_starts(MONDAY, 180, 30, 30, np.array([MONDAY + 45]), np.array([MONDAY + 100]))
+
+    assert (starts - MONDAY).tolist() == [0, 120, 150]
+
+
+def test_score_is_the_weighted_mean_of_the_features():
+    c = candidates([MONDAY + 600, MONDAY + 1440 + 600])
+    total, parts = score(c, {"earliness": 3, "time_of_day": 1})
+
+    assert set(parts) == {"earliness", "time_of_day"}
+    np.testing.assert_allclose(total, (3 * parts["earliness"] + parts["time_of_day"]) / 4)
+    assert total[0] > total[1]  # same time of day, sooner wins
+
+
+def test_unknown_feature_is_an_error():
+    with pytest.raises(ValueError):
+        score(candidates([MONDAY]), {"nope": 1})
+
+
+def test_top_k_is_best_first_without_overlaps():
+    starts = MONDAY + np.array([0, 15, 30, 60, 1440])
+    c = candidates(starts)
+    scores = np.array([0.9, 1.0, 0.8, 0.5, 0.7])
+
+    picks = top_k(c, scores, 3)
+
+    # 15 is best; 0 and 30 overlap it; the next day's 0.7 beats the 0.5 at
+    # +60 once the same-day penalty applies
+    assert picks == [1, 4, 3]
+
+
+def test_top_k_spreads_options_across_days():
+    starts = MONDAY + np.array([600, 660, 720, 1440 + 600])
+    c = candidates(starts)
+    scores = np.array([1.0, 0.98, 0.97, 0.95])
+
+    assert top_k(c, scores, 2) == [0, 3]
+
+
+@pytest.mark.parametrize("rank_days", [7, 0])
+def test_proposed_slots_start_on_the_grid(busy, profiles, monkeypatch, rank_days):
+    monkeypatch.setattr(scheduler_engine, "RANK_WINDOW_DAYS", rank_days)
+    now = datetime(2026, 5, 4, 22, 49, tzinfo=zone(TZ))
+
+    result = propose_slots("sync 15 min with a@example.com today", n_slots=3, time_zone=TZ, now=now)
+
+    step = scheduler_engine.RANK_STEP_MIN if rank_days else scheduler_engine.SLOT_STEP_MIN
+    for slot in result["slots"]:
+        start = datetime.fromisoformat(slot["start"])
+        assert start >= now and start.minute % step == 0
+
+
+def test_a_series_without_a_time_starts_on_the_grid(busy, profiles):
+    now = datetime(2026, 5, 4, 22, 49, tzinfo=zone(TZ))
+
+    result = propose_slots("daily standup 15 min with a@example.com today", n_slots=3, time_zone=TZ, now=now)
+
+    for slot in result["slots"]:
+        start = datetime.fromisoformat(slot["start"])
+        assert start >= now and start.minute % scheduler_engine.SLOT_STEP_MIN == 0
+
+
+def test_zero_minute_meeting_is_rejected(busy, profiles):
+    with pytest.raises(ValueError):
+        propose_slots("0 min with a@example.com tomorrow at 10am", time_zone=TZ)
+
+
+def test_ranked_proposals_prefer_working_hours(busy, profiles):
+    profiles.put("a@example.com", WorkProfile(TZ, 9 * 60, 18 * 60, (0, 1, 2, 3, 4)))
+    now = datetime(2026, 5, 4, 7, 3, tzinfo=zone(TZ))
+
+    result = propose_slots("30 min with a@example.com today", n_slots=2, time_zone=TZ, now=now)
+
+    for slot in result["slots"]:
+        start = datetime.fromisoformat(slot["start"])
+        assert 9 <= start.hour < 18 and start.minute % 15 == 0
+        assert set(slot["score_detail"]) == {"earliness", "time_of_day", "buffer", "attendee_hours"}
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from backend.app.recurrence import (
+    Recurrence,
+    conflicts,
+    merge_busy,
+    occurrence_minutes,
+    parse_recurrence,
+    rank_recurring,
+)
+
+START = datetime(2026, 5, 4, 10, 0, tzinfo=timezone.utc)  # a Monday
+
+
+@pytest.mark.parametrize("text, rule, rest", [
+    ("sync every tuesday at 10", Recurrence("WEEKLY", 1, (1,)), "sync tuesday at 10"),
+    ("review every other friday", Recurrence("WEEKLY", 2, (4,)), "review friday"),
+    ("1:1 on mondays and thursdays", Recurrence("WEEKLY", 1, (0, 3)), "1:1 monday"),
+    ("daily standup at 9:30", Recurrence("DAILY", 1), "standup at 9:30"),
+    ("planning every 3 weeks", Recurrence("WEEKLY", 3), "planning"),
+    ("check-in every weekday", Recurrence("WEEKLY", 1, (0, 1, 2, 3, 4)), "check-in"),
+    ("retro biweekly for 10 occurrences", Recurrence("WEEKLY", 2, count=10), "retro"),
+    ("sync every tuesday for the next 6 months", Recurrence("WEEKLY", 1, (1,), span=(6, "month")), "sync tuesday"),
+])
+def test_parse_recurrence(text, rule, rest):
+    assert parse_recurrence(text) == (rule, rest)
+
+
+def test_single_dates_are_not_series():
+    assert parse_recurrence("lunch on tuesday at 1pm") == (None, "lunch on tuesday at 1pm")
+    assert parse_recurrence("tomorrow at 3pm")[0] is None
+
+
+@pytest.mark.parametrize("text", ["sync every 0 days", "sync every 0 weeks on tuesday", "report every 0 months"])
+def test_zero_interval_is_rejected(text):
+    with pytest.raises(ValueError):
+        parse_recurrence(text)
+
+
+def test_rrule_line_ends_on_count_or_until():
+    assert Recurrence("WEEKLY", 2, (1, 3), count=5).rrule_line(START) == "RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH;COUNT=5"
+    assert (Recurrence("DAILY", span=(1, "week")).rrule_line(START)
+            == "RRULE:FREQ=DAILY;UNTIL=20260511T100000Z")
+
+
+def test_occurrences_are_expanded_in_chunks_up_to_stop():
+    rule = Recurrence("DAILY")
+    blocks = list(occurrence_minutes(rule, START, START + timedelta(days=9), chunk=4))
+
+    assert [len(b) for b in blocks] == [4, 4, 2]
+    minutes = np.concatenate(blocks)
+    assert (np.diff(minutes) == 1440).all()
+
+
+def test_conflicts_see_intervals_that_started_earlier():
+    busy_starts, busy_reach = merge_busy({"a": np.array([[0, 100]]), "b": np.array([[50, 60], [200, 210]])})
+    starts = np.array([90, 100, 175, 205, 210])
+    assert conflicts(starts, 30, busy_starts, busy_reach).tolist() == [True, False, True, True, False]
+
+
+def test_rank_recurring_prefers_shifts_with_fewer_clashes():
+    rule = Recurrence("DAILY", count=10)
+    first = int(START.timestamp() // 60)
+    # the 10:00 slot is taken on three days, 10:30 on one, 11:00 never
+    busy = np.array([[first + d * 1440, first + d * 1440 + 30] for d in (0, 1, 2)]
+                    + [[first + 4 * 1440 + 30, first + 4 * 1440 + 60]])
+    busy_starts, busy_reach = merge_busy({"a": busy})
+
+    ranked = rank_recurring(occurrence_minutes(rule, START, START + timedelta(days=30)), 30,
+                            np.array([0, 30, 60]), busy_starts, busy_reach, max_conflicts=2,
+                            max_conflict_rate=0.2)
+
+    assert [(c.shift_min, c.conflicts) for c in ranked] == [(60, 0), (30, 1)]
+    assert ranked[0].checked == 10
+    assert ranked[1].first_conflicts == [first + 4 * 1440 + 30]
+
+
+def test_propose_rejects_a_series_that_never_repeats(api, busy, profiles):
+    resp = api.post("/propose", json={"prompt": "standup with a@example.com tomorrow at 10am every 0 days"})
+
+    assert resp.status_code == 422
+    assert resp.json()["status"] == "error"
@@ -0,0 +1,14 @@
+from backend.app import shared_cache
+
+
+def test_each_code_version_maps_its_own_file():
+    assert shared_cache.default_path(version="a") != shared_cache.default_path(version="b")
+    assert shared_cache.default_path() == shared_cache.default_path(version=shared_cache.code_version())
+
+
+def test_code_version_covers_the_record_writers(tmp_path, monkeypatch):
+    before = shared_cache.code_version()
+    for name in shared_cache.RECORD_MODULES:
+        (tmp_path / name).write_text("# changed\n")
+    monkeypatch.setattr(shared_cache, "__file__", str(tmp_path / "shared_cache.py"))
+    assert shared_cache.code_version() != before
@@ -0,0 +1,110 @@
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.app.availability import InMemoryBusySource, busy_mask, find_free_windows, to_epoch_min
+from backend.app.scheduler_engine import propose_slots
+from backend.app.timezones import zone
+
+TZ = "Asia/Kolkata"
+
+
+def overlaps(slot: dict, start: datetime, end: datetime) -> bool:
+    return datetime.fromisoformat(slot["start"]) < end and datetime.fromisoformat(slot["end"]) > start
+
+
+def test_in_memory_source_returns_only_overlapping_intervals():
+    source = InMemoryBusySource()
+    source.add_minutes("Alice@Example.com", [(100, 200), (300, 400), (10, 20)])
+    source.add_minutes("alice@example.com", [(150, 250)])
+
+    got = source.busy_intervals(["alice@example.com", "nobody@example.com"], 180, 320)
+
+    assert sorted(map(tuple, got["alice@example.com"].tolist())) == [(100, 200), (150, 250), (300, 400)]
+    assert got["nobody@example.com"].shape == (0, 2)
+
+
+def test_in_memory_source_clear():
+    source = InMemoryBusySource()
+    source.add_minutes("a@x.com", [(0, 10)])
+    source.add_minutes("b@x.com", [(0, 10)])
+    source.clear("a@x.com")
+    got = source.busy_intervals(["a@x.com", "b@x.com"], 0, 10)
+    assert len(got["a@x.com"]) == 0 and len(got["b@x.com"]) == 1
+
+
+def test_in_memory_source_under_concurrent_adds_and_reads():
+    source = InMemoryBusySource()
+
+    def add(worker):
+        for i in range(200):
+            source.add_minutes("a@x.com", [(worker * 1000 + i, worker * 1000 + i + 1)])
+            source.busy_intervals(["a@x.com"], 0, 10_000)
+
+    threads = [threading.Thread(target=add, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(source.busy_intervals(["a@x.com"], 0, 10_000)["a@x.com"]) == 800
+
+
+def test_busy_mask_is_the_union_of_attendees():
+    mask = busy_mask({"a": np.array([[2, 4]]), "b": np.array([[3, 6], [8, 20]])}, 0, 10)
+    assert mask.tolist() == [False, False, True, True, True, True, False, False, True, True]
+
+
+def test_free_windows_skip_busy_time_on_the_step_grid():
+    busy = np.zeros(240, dtype=bool)
+    busy[30:90] = True
+    assert find_free_windows(busy, 30, 3, step_min=30) == [0, 90, 120]
+
+
+def test_propose_avoids_everyones_busy_time(busy, profiles):
+    tz = zone(TZ)
+    tomorrow = (datetime.now(tz) + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    # alice is out all morning, bob all afternoon
+    alice = (tomorrow, tomorrow.replace(hour=13))
+    bob = (tomorrow.replace(hour=13), tomorrow.replace(hour=23, minute=59))
+    busy.add_minutes("alice@example.com", [tuple(map(to_epoch_min, alice))])
+    busy.add_minutes("bob@example.com", [tuple(map(to_epoch_min, bob))])
+
+    result = propose_slots("30 min with alice@example.com and bob@example.com tomorrow at 10am",
+                           n_slots=3, time_zone=TZ)
+
+    assert result["emails"] == ["alice@example.com", "bob@example.com"]
+    assert result["duration_min"] == 30
+    assert len(result["slots"]) == 3
+    for slot in result["slots"]:
+        assert not overlaps(slot, *alice) and not overlaps(slot, *bob)
+        start, end = datetime.fromisoformat(slot["start"]), datetime.fromisoformat(slot["end"])
+        assert end - start == timedelta(minutes=30)
+
+
+def test_propose_is_not_blocked_by_other_peoples_time(busy, profiles):
+    tz = zone(TZ)
+    tomorrow_10 = (datetime.now(tz) + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+    busy.add_minutes("carol@example.com", [(to_epoch_min(tomorrow_10), to_epoch_min(tomorrow_10) + 24 * 60)])
+
+    result = propose_slots("meet alice@example.com tomorrow at 10am", n_slots=1, time_zone=TZ)
+
+    assert datetime.fromisoformat(result["slots"][0]["start"]) == tomorrow_10
+
+
+def test_a_time_already_past_today_is_searched_from_now(busy, profiles):
+    now = datetime(2026, 5, 4, 22, 47, tzinfo=zone(TZ))
+
+    result = propose_slots("meet alice@example.com today at 9am", n_slots=3, time_zone=TZ, now=now)
+
+    assert len(result["slots"]) == 3
+    assert all(datetime.fromisoformat(slot["start"]) >= now for slot in result["slots"])
+
+
+def test_a_series_past_its_time_today_starts_tomorrow(busy, profiles):
+    now = datetime(2026, 5, 4, 22, 47, tzinfo=zone(TZ))
+
+    result = propose_slots("standup with alice@example.com today at 9am daily for 5 times",
+                           n_slots=1, time_zone=TZ, now=now)
+
+    assert datetime.fromisoformat(result["slots"][0]["start"]) == datetime(2026, 5, 5, 9, 0, tzinfo=zone(TZ))
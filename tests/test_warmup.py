@@ -0,0 +1,45 @@
+import asyncio
+
+from backend.app import db, metrics, warmup
+from backend.app.availability import BusySource
+from backend.app.scheduler_engine import set_busy_source
+from benchmarks.startup import BUDGETS_MS, probe
+
+
+class Untouchable(BusySource):
+    def busy_intervals(self, emails, start_min, end_min):
+        raise AssertionError("warm-up looked up busy time")
+
+
+def histogram_counts():
+    with metrics._histograms_lock:
+        return {key: hist.count for key, hist in metrics._histograms.items()}
+
+
+def proposal_count():
+    store = db.get_store()
+    store.flush()
+    return store._reader().execute("SELECT COUNT(*) FROM proposals").fetchone()[0]
+
+
+def test_warmup_has_no_side_effects():
+    from backend.app.main import app
+
+    set_busy_source(Untouchable())
+    try:
+        proposals, histograms = proposal_count(), histogram_counts()
+        asyncio.run(warmup.warm(app))
+    finally:
+        set_busy_source(None)
+
+    status = warmup.status()
+    assert status["ready"] and status["error"] is None
+    assert set(status["warmup_ms"]) == {"parser", "slot_search", "calendar", "routes"}
+    assert proposal_count() == proposals
+    assert {k: v for k, v in histogram_counts().items() if v} == {k: v for k, v in histograms.items() if v}
+
+
+def test_first_request_after_warmup_is_within_budget():
+    result = probe(warm=True)
+    assert result["import_ms"] < BUDGETS_MS["startup_import"]
+    assert result["first_ms"] < BUDGETS_MS["startup_first_propose_warm"]